@@ -0,0 +1,91 @@
+"""
+Benchmark: cashflow summary, pure-Python three-pass path vs the NumPy engine.
+
+    legacy   the original calculate_safe_balance / calculate_daily_burn /
+             get_analytics_summary passes over dict lists
+    records  engine.summarize_records on the same dict lists (parse once)
+    arrays   engine.summarize on already-parsed arrays (columnar ledgers)
+
+Dict lists are only built up to --max-dict-rows because 10M dicts need
+several GB of RAM; larger sizes only run the arrays path.
+
+Run from the project root:
+    python -m benchmarks.bench_analytics --sizes 10000 1000000 10000000
+"""
+import argparse
+import calendar
+import random
+import time
+from datetime import datetime
+
+import numpy as np
+
+from features.analytics import engine
+
+
+def legacy_summary(income_data, expense_data):
+    total_income = sum(float(inc['amount']) for inc in income_data)
+    total_fixed = sum(float(exp['amount']) for exp in expense_data if exp['type'].lower() == 'fixed')
+    safe_balance = total_income - total_fixed
+    total_variable = sum(float(exp['amount']) for exp in expense_data if exp['type'].lower() == 'variable')
+    today = datetime.now()
+    remaining_days = calendar.monthrange(today.year, today.month)[1] - today.day + 1
+    daily_burn = total_variable / remaining_days
+    variable_expenses_total = sum(float(exp['amount']) for exp in expense_data if exp['type'].lower() == 'variable')
+    return total_income, total_fixed, safe_balance, daily_burn, variable_expenses_total
+
+
+def make_records(rows, seed=0):
+    rng = random.Random(seed)
+    incomes = [_amounts(rng.randint(100_000, 9_000_000)) for _ in range(max(1, rows // 20))]
+    expenses = [
+        dict(_amounts(rng.randint(1_000, 500_000)), type='Fixed' if rng.random() < 0.3 else 'Variable')
+        for _ in range(rows)
+    ]
+    return incomes, expenses
+
+
+def _amounts(paisa):
+    # 'amount' is the old Rupee string the legacy path parses, 'amount_paisa' the current column
+    return {'amount': f"{paisa / 100:.2f}", 'amount_paisa': str(paisa)}
+
+
+def make_arrays(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    income_paisa = rng.integers(100_000, 9_000_000, size=max(1, rows // 20), dtype=np.int64)
+    expense_paisa = rng.integers(1_000, 500_000, size=rows, dtype=np.int64)
+    is_fixed = rng.random(rows) < 0.3
+    return income_paisa, expense_paisa, is_fixed, ~is_fixed
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--max-dict-rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'legacy (ms)':>12} {'records (ms)':>13} {'arrays (ms)':>12}")
+    for rows in args.sizes:
+        legacy_cell = records_cell = '-'
+        if rows <= args.max_dict_rows:
+            incomes, expenses = make_records(rows)
+            legacy_cell = f"{best_of(lambda: legacy_summary(incomes, expenses), args.repeat):.2f}"
+            records_cell = f"{best_of(lambda: engine.summarize_records(incomes, expenses), args.repeat):.2f}"
+            del incomes, expenses
+        arrays = make_arrays(rows)
+        arrays_ms = best_of(lambda: engine.summarize(*arrays), args.repeat)
+        print(f"{rows:>12,} {legacy_cell:>12} {records_cell:>13} {arrays_ms:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: p50/p99 latency of the local HTTP API under concurrent load.
+
+Starts features.api.server in a child process on an empty temporary database,
+seeds it with --seed-rows expenses, then runs --clients keep-alive connections
+that each send --requests requests. --write-ratio of them are single-expense
+POSTs (which the server coalesces into group commits). The rest alternate
+between GET /summary and a filtered GET /expenses?limit=50.
+
+Run from the project root:
+    python -m benchmarks.bench_api --clients 50 --requests 200 --write-ratio 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATEGORIES = ['Food', 'Shopping', 'Entertainment', 'Health', 'Other']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def random_expense(rng):
+    return {
+        'type': 'Variable',
+        'category': rng.choice(CATEGORIES),
+        'amount_paisa': rng.randint(1_000, 500_000),
+        'date': f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+    }
+
+
+async def request(reader, writer, method, target, document=None):
+    body = json.dumps(document).encode() if document is not None else b''
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = next(
+        int(line.split(b':', 1)[1]) for line in head.split(b'\r\n') if line.lower().startswith(b'content-length:')
+    )
+    payload = await reader.readexactly(length)
+    if status >= 400:
+        raise RuntimeError(f"{method} {target} -> {status} {payload[:200]!r}")
+    return payload
+
+
+async def wait_for_server(port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def client(port, requests, write_ratio, seed, latencies):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for i in range(requests):
+            if rng.random() < write_ratio:
+                name, method, target, document = 'POST /expenses', 'POST', '/expenses', random_expense(rng)
+            elif i % 2:
+                name, method, target, document = 'GET /summary', 'GET', '/summary', None
+            else:
+                month = rng.randint(1, 12)
+                name, method, target, document = (
+                    'GET /expenses', 'GET', f"/expenses?from=2026-{month:02d}-01&to=2026-{month:02d}-31&limit=50", None
+                )
+            start = time.perf_counter()
+            await request(reader, writer, method, target, document)
+            latencies.setdefault(name, []).append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(args, port):
+    await wait_for_server(port)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    rng = random.Random(0)
+    for start in range(0, args.seed_rows, 10_000):
+        batch = [random_expense(rng) for _ in range(min(10_000, args.seed_rows - start))]
+        await request(reader, writer, 'POST', '/expenses', batch)
+    writer.close()
+
+    latencies = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(port, args.requests, args.write_ratio, seed, latencies) for seed in range(args.clients)
+    ))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per client")
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--seed-rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'database'))
+        env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'features.api.server', '--port', str(port)],
+            cwd=tmp, env=env, stdout=subprocess.DEVNULL
+        )
+        try:
+            latencies, elapsed = asyncio.run(run(args, port))
+        finally:
+            server.terminate()
+            server.wait()
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{total:,} requests from {args.clients} clients in {elapsed:.2f}s ({total / elapsed:,.0f} req/s), "
+          f"{args.seed_rows:,} seeded expenses")
+    print(f"{'endpoint':>16} {'count':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9}")
+    for name, samples in sorted(latencies.items()):
+        cuts = statistics.quantiles(samples, n=100)
+        print(f"{name:>16} {len(samples):>8,} {cuts[49] * 1000:>9.2f} {cuts[98] * 1000:>9.2f} {max(samples) * 1000:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
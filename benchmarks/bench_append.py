@@ -0,0 +1,80 @@
+"""
+Benchmark: cost of inserting one expense as the ledger grows.
+
+Compares the append-only write path (append_row) with the old
+load_data + save_data full rewrite. The rewrite path is only measured
+up to --rewrite-max rows because it gets quadratic very quickly.
+
+Run from the project root:
+    python -m benchmarks.bench_append --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from utils.helpers import load_data, save_data, append_row, append_rows
+
+EXPENSE_FIELDS = ['date', 'type', 'category', 'amount_paisa', 'description', 'frequency']
+CHECKPOINTS = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def make_row(i):
+    return {
+        'date': '2025-11-16',
+        'type': 'Variable',
+        'category': 'Food',
+        'amount_paisa': 10_000 + i % 50_000,
+        'description': f'row {i}',
+        'frequency': 'one-time'
+    }
+
+
+def time_append(file_path, samples):
+    start = time.perf_counter()
+    for i in range(samples):
+        append_row(file_path, make_row(i), EXPENSE_FIELDS)
+    return (time.perf_counter() - start) / samples
+
+
+def time_rewrite(file_path, samples):
+    start = time.perf_counter()
+    for i in range(samples):
+        data = load_data(file_path)
+        data.append(make_row(i))
+        save_data(file_path, data)
+    return (time.perf_counter() - start) / samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--rewrite-max', type=int, default=100_000)
+    args = parser.parse_args()
+
+    checkpoints = [c for c in CHECKPOINTS if c <= args.rows]
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'expenses.txt')
+        rows_written = 0
+        print(f"{'rows':>10} {'append (ms)':>12} {'rewrite (ms)':>13}")
+        for checkpoint in checkpoints:
+            # Grow the file to the checkpoint in one bulk append
+            append_rows(file_path, (make_row(i) for i in range(rows_written, checkpoint)), EXPENSE_FIELDS)
+            rows_written = checkpoint
+
+            append_ms = time_append(file_path, args.samples) * 1000
+            rows_written += args.samples
+
+            rewrite_cell = '-'
+            if checkpoint <= args.rewrite_max:
+                rewrite_samples = max(1, min(args.samples, 1_000_000 // checkpoint))
+                rewrite_ms = time_rewrite(file_path, rewrite_samples) * 1000
+                rows_written += rewrite_samples
+                rewrite_cell = f"{rewrite_ms:.3f}"
+
+            print(f"{checkpoint:>10,} {append_ms:>12.3f} {rewrite_cell:>13}")
+
+
+if __name__ == '__main__':
+    main()
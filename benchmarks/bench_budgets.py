@@ -0,0 +1,116 @@
+"""
+Benchmark: budget checks from the running totals versus rescanning the ledger.
+
+Builds a synthetic expense ledger (benchmarks.synthetic) over --months months
+and a budget for every category. Times the check made after each added
+expense, features.budgets.month_status on the running totals, against summing
+this month's rows by category, and the batch mode, evaluate_history over
+every month, on the rows and on the memory-mapped binary ledger against a
+per-row Python loop. Exits with status 1 if any of them disagree.
+
+Run from the project root:
+    python -m benchmarks.bench_budgets --rows 200000 --months 36
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+from benchmarks import synthetic
+from features.analytics.running_totals import RunningTotals
+from features.budgets import budgets
+from features.expenses.expense_input import (
+    EXPENSE_FIELDS, FIXED_EXPENSE_CATEGORIES, VARIABLE_EXPENSE_CATEGORIES,
+)
+from utils import columnar
+
+
+def median_ms(func, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def rescan_month(expenses, limits, month):
+    """The check without running totals: one pass over every row."""
+    spent = {}
+    for row in expenses:
+        if row['date'][:7] == month:
+            spent[row['category']] = spent.get(row['category'], 0) + row['amount_paisa']
+    return budgets.evaluate(limits, spent)
+
+
+def history_loop(expenses, limits):
+    """evaluate_history's spending grid, one row at a time."""
+    column = {category.lower(): i for i, category in enumerate(limits)}
+    grid = {}
+    for row in expenses:
+        c = column.get(row['category'].lower())
+        if c is not None:
+            cells = grid.setdefault(row['date'][:7], [0] * len(limits))
+            cells[c] += row['amount_paisa']
+    return sorted(grid.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--months', type=int, default=36)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    today = date.today()
+    expenses = synthetic.make_expenses(args.rows, args.seed, today, args.months)
+    categories = list(dict.fromkeys(FIXED_EXPENSE_CATEGORIES + VARIABLE_EXPENSE_CATEGORIES))
+    # Limits around a typical month's spend, so all three statuses come up
+    per_month = {}
+    for row in expenses:
+        per_month[row['category']] = per_month.get(row['category'], 0) + row['amount_paisa']
+    limits = {category: max(1, per_month.get(category, 0) // max(1, args.months)) for category in categories}
+
+    totals = RunningTotals()
+    start = time.perf_counter()
+    for row in expenses:
+        totals.add_expense(row)
+    build_ms = (time.perf_counter() - start) * 1000
+    month = today.strftime('%Y-%m')
+    incremental_ms, incremental = median_ms(lambda: budgets.evaluate(limits, totals.month_spend(month)), args.runs)
+    rescan_ms, rescanned = median_ms(lambda: rescan_month(expenses, limits, month), args.runs)
+    print(f"{args.rows:,} expenses, {len(limits)} budgets; running totals built in {build_ms:.1f} ms")
+    print(f"one month:  running totals {incremental_ms * 1000:,.1f} µs, rescan {rescan_ms:,.2f} ms "
+          f"({rescan_ms / incremental_ms:,.0f}x)")
+
+    loop_ms, looped = median_ms(lambda: history_loop(expenses, limits), args.runs)
+    rows_ms, history = median_ms(lambda: budgets.evaluate_history(expenses, limits), args.runs)
+    with tempfile.TemporaryDirectory() as tmp:
+        bin_path = os.path.join(tmp, 'expenses.bin')
+        columnar.write_columnar(bin_path, expenses, EXPENSE_FIELDS)
+        ledger = columnar.read_columnar(bin_path)
+        columns_ms, from_columns = median_ms(lambda: budgets.evaluate_history(ledger, limits), args.runs)
+        same_columns = (from_columns['months'] == history['months']
+                        and np.array_equal(from_columns['spent_paisa'], history['spent_paisa']))
+        del ledger, from_columns  # release the mapping before the directory goes
+    print(f"{len(history['months'])} months: per-row loop {loop_ms:,.1f} ms, vectorized {rows_ms:,.1f} ms on rows, "
+          f"{columns_ms:,.1f} ms on the binary ledger")
+
+    same_month = incremental == rescanned
+    same_history = (history['months'] == [m for m, _ in looped]
+                    and history['spent_paisa'].tolist() == [cells for _, cells in looped])
+    statuses = np.bincount(history['status'].ravel(), minlength=len(budgets.STATUSES))
+    print("budget-months: " + ", ".join(f"{name} {count:,}" for name, count in zip(budgets.STATUSES, statuses)))
+    if not (same_month and same_history and same_columns):
+        print(f"MISMATCH: month {same_month}, history {same_history}, binary ledger {same_columns}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: chart payload size and render time, raw series vs pre-aggregated.
+
+    raw      one point per distinct date / one slice per category, as the
+             Visualizations tab used to plot them
+    reduced  features.visualizations.aggregate (day/week/month rollup, LTTB,
+             pie tail folded into 'Other')
+
+Plotly figures are measured by their JSON payload (fig.to_json(), what the
+browser receives); matplotlib figures by the PNG they render to.
+
+Run from the project root:
+    python -m benchmarks.bench_charts --years 1 5 20 --categories 40
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+
+from features.visualizations.aggregate import chart_series, fold_categories
+
+
+def make_series(years, categories, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = np.arange(np.datetime64('2026-01-01') - np.timedelta64(365 * years, 'D'), np.datetime64('2026-01-01'))
+    daily = rng.integers(1_000, 500_000, size=len(dates), dtype=np.int64)
+    # Zipf-like spread so a few categories dominate and the tail is long
+    weights = 1 / np.arange(1, categories + 1)
+    category_totals = rng.integers(1_000_000, 5_000_000, size=categories) * weights / weights.sum()
+    return dates, daily, [f"Category {i}" for i in range(categories)], category_totals.astype(np.int64)
+
+
+def plotly_line(dates, paisa, markers):
+    import pandas as pd
+    import plotly.express as px
+    return px.line(pd.DataFrame({'date': dates, 'Amount': paisa / 100}), x='date', y='Amount', markers=markers)
+
+
+def plotly_pie(labels, paisa):
+    import pandas as pd
+    import plotly.express as px
+    return px.pie(pd.DataFrame({'category': labels, 'Amount': np.asarray(paisa) / 100}), names='category', values='Amount')
+
+
+def matplotlib_line(dates, paisa, markers):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=(10, 6))
+    plt.plot(dates, paisa / 100, marker='o' if markers else None, linestyle='-')
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def measure(build, repeat=3):
+    """Payload size and best-of-repeat time (the first call also pays for imports)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = build()
+        best = min(best, time.perf_counter() - start)
+    return len(payload), best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--categories', type=int, default=40)
+    args = parser.parse_args()
+
+    print(f"{'years':>5} {'chart':>16} {'points':>8} {'payload (KB)':>13} {'time (ms)':>10}")
+    for years in args.years:
+        dates, daily, labels, category_totals = make_series(years, args.categories)
+        reduced_dates, reduced_paisa, granularity = chart_series(dates, daily)
+        folded_labels, folded_paisa = fold_categories(labels, category_totals)
+        cases = [
+            ('plotly line raw', len(dates), lambda: plotly_line(dates, daily, True).to_json()),
+            (f'plotly line {granularity}', len(reduced_dates),
+             lambda: plotly_line(reduced_dates, reduced_paisa, len(reduced_dates) <= 60).to_json()),
+            ('plotly pie raw', len(labels), lambda: plotly_pie(labels, category_totals).to_json()),
+            ('plotly pie fold', len(folded_labels), lambda: plotly_pie(folded_labels, folded_paisa).to_json()),
+            ('mpl line raw', len(dates), lambda: matplotlib_line(dates, daily, True)),
+            (f'mpl line {granularity}', len(reduced_dates),
+             lambda: matplotlib_line(reduced_dates, reduced_paisa, len(reduced_dates) <= 60)),
+        ]
+        for name, points, build in cases:
+            size, elapsed = measure(build)
+            print(f"{years:>5} {name:>16} {points:>8,} {size / 1024:>13.1f} {elapsed * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
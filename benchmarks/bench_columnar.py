@@ -0,0 +1,78 @@
+"""
+Benchmark: the binary ledger (utils.columnar) against parsing the text file,
+and whether it stays in step with writes.
+
+Builds a synthetic --rows expense ledger in a temporary directory, converts
+it with text_to_columnar, and times reading the total amount both ways. Then
+it writes to the ledger the ways the app does:
+  - an append through the write-ahead log: the copy must not be used while
+    the record is pending
+  - a compaction: the copy must be rewritten and used again, with the new row
+  - a direct text write (CASHFLOW_WAL=0): the copy must not be used
+Exits with status 1 if a stale copy is read or the fast path doesn't come back.
+
+Run from the project root:
+    python -m benchmarks.bench_columnar --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks import synthetic
+from features.expenses.expense_input import EXPENSE_FIELDS
+from utils import columnar, config, helpers, storage, wal
+
+ROW = {'date': '2026-10-17', 'type': 'Variable', 'category': 'Food', 'amount_paisa': 12_345,
+       'description': 'after conversion', 'frequency': 'one-time'}
+
+
+def rows_in(ledger):
+    return None if ledger is None else len(ledger)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+    config.STORAGE_BACKEND = 'text'
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'expenses.txt')
+        synthetic.write_ledger(file_path, synthetic.make_expenses(args.rows), EXPENSE_FIELDS)
+        start = time.perf_counter()
+        columnar.text_to_columnar(file_path)
+        convert_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        text_total = sum(int(row['amount_paisa']) for row in storage.load_data(file_path))
+        text_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        ledger = storage.load_columns(file_path)
+        binary_total = int(ledger.columns['amount_paisa'].sum())
+        binary_ms = (time.perf_counter() - start) * 1000
+        if binary_total != text_total:
+            failures.append(f"binary total {binary_total} != text total {text_total}")
+        print(f"{args.rows:,} rows: converted in {convert_s:.1f} s; total from text {text_ms:,.1f} ms, "
+              f"from the binary ledger {binary_ms:,.2f} ms ({text_ms / binary_ms:,.0f}x)")
+        del ledger
+
+        storage.append_row(file_path, dict(ROW), EXPENSE_FIELDS)
+        if storage.load_columns(file_path) is not None:
+            failures.append("binary copy used with a log record pending")
+        wal.compact(file_path)
+        if rows_in(storage.load_columns(file_path)) != args.rows + 1:
+            failures.append("binary copy not rewritten by the compaction")
+
+        helpers.append_rows(file_path, [dict(ROW)], EXPENSE_FIELDS)
+        if storage.load_columns(file_path) is not None:
+            failures.append("binary copy used after a direct text write")
+        print("after writes: " + ("; ".join(failures) if failures else "never stale, rewritten on compaction"))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
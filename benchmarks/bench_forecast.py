@@ -0,0 +1,83 @@
+"""
+Benchmark: cashflow projection time with thousands of recurring items.
+
+Builds a synthetic ledger of --items recurring entries (a mix of monthly and
+weekly incomes and fixed expenses) plus --history one-off rows, then times
+forecast.build_schedule (once per ledger change, cached by the Streamlit app)
+and forecast.project (every rerun) over 12 and 24 months. Exits with status 1
+if the median project() time is over --budget-ms.
+
+Run from the project root:
+    python -m benchmarks.bench_forecast --items 5000 --budget-ms 50
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from features.analytics import forecast
+
+START = date(2026, 10, 16)
+CATEGORIES = ['Rent', 'Bills', 'School Fees', 'Petrol', 'Internet', 'Insurance', 'Gym']
+
+
+def make_ledgers(items, history, seed=0):
+    rng = random.Random(seed)
+    incomes, expenses = [], []
+    for i in range(items):
+        day = (START - timedelta(days=rng.randint(0, 400))).isoformat()
+        frequency = rng.choice(['monthly', 'monthly', 'weekly'])
+        if i % 4 == 0:
+            incomes.append({'date': day, 'source': 'Salary', 'amount_paisa': rng.randint(100_000, 10_000_000),
+                            'description': '', 'frequency': frequency})
+        else:
+            expenses.append({'date': day, 'type': 'Fixed', 'category': rng.choice(CATEGORIES),
+                             'amount_paisa': rng.randint(1_000, 2_000_000), 'description': '', 'frequency': frequency})
+    for _ in range(history):
+        day = (START + timedelta(days=rng.randint(-365, 60))).isoformat()
+        expenses.append({'date': day, 'type': 'Variable', 'category': 'Food',
+                         'amount_paisa': rng.randint(1_000, 50_000), 'description': '', 'frequency': 'one-time'})
+    return incomes, expenses
+
+
+def median_ms(func, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--history', type=int, default=20_000)
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    incomes, expenses = make_ledgers(args.items, args.history)
+    build_ms = median_ms(lambda: forecast.build_schedule(incomes, expenses, START), args.runs)
+    schedule = forecast.build_schedule(incomes, expenses, START)
+    print(f"{args.items:,} recurring items, {args.history:,} one-off rows, "
+          f"{len(schedule['amounts']):,} scheduled series")
+    print(f"build_schedule: {build_ms:.1f} ms (median of {args.runs})")
+
+    failed = False
+    for months in (12, 24):
+        project_ms = median_ms(lambda: forecast.project(schedule, months), args.runs)
+        result = forecast.project(schedule, months)
+        print(f"project {months:>2} months: {project_ms:6.1f} ms, {len(result['dates'])} days, "
+              f"first negative day {result['first_negative']}")
+        failed = failed or project_ms > args.budget_ms
+    if failed:
+        print(f"\nFAIL: project() is over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == '__main__':
+    main()
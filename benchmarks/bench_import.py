@@ -0,0 +1,90 @@
+"""
+Benchmark: parsing a bank statement for the bulk import.
+
+Writes a synthetic statement of --rows rows with separate Debit and Credit
+columns, where the unused column is zero-filled ("0.00") or left empty the
+way bank exports do it. It is then parsed with features.importer.bank_import
+in this process and on a pool of --workers, reporting rows per second. Nothing
+is written to the ledgers. Every row has to come back as an income or an
+expense with its amount, except the rows that are invalid on purpose (both
+columns filled, or neither). Exits with status 1 otherwise.
+
+Run from the project root:
+    python -m benchmarks.bench_import --rows 1000000 --workers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from features.analytics.batch import run_chunks
+from features.importer import bank_import
+
+
+def write_statement(file_path, rows):
+    """Writes the statement; returns the expected (income paisa, expense paisa, rejected rows)."""
+    income = expense = rejected = 0
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        f.write('Date,Description,Debit,Credit\n')
+        for i in range(rows):
+            paisa = 100 + i % 100_000
+            amount = f"{paisa // 100}.{paisa % 100:02d}"
+            filler = '' if i % 3 == 0 else '0.00'
+            date = f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+            if i % 50 == 0:
+                debit, credit = amount, amount
+                rejected += 1
+            elif i % 50 == 1:
+                debit, credit = filler, '0.00'
+                rejected += 1
+            elif i % 2:
+                debit, credit = filler, amount
+                income += paisa
+            else:
+                debit, credit = amount, filler
+                expense += paisa
+            f.write(f"{date},Grocery mart {i},{debit},{credit}\n")
+    return income, expense, rejected
+
+
+def parse(file_path, workers, chunk_lines):
+    options = {
+        'date_col': 'Date', 'amount_col': None, 'debit_col': 'Debit', 'credit_col': 'Credit',
+        'description_col': 'Description', 'date_format': None, 'delimiter': ',',
+        'expense_rules': bank_import.DEFAULT_EXPENSE_RULES, 'income_rules': bank_import.DEFAULT_INCOME_RULES,
+    }
+    incomes, expenses, rejected = [], [], []
+    tasks = bank_import.read_chunks(file_path, options, chunk_lines)
+    bank_import._collect(run_chunks(bank_import.parse_chunk, tasks, workers), incomes, expenses, rejected)
+    return incomes, expenses, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-lines', type=int, default=bank_import.CHUNK_LINES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, 'statement.csv')
+        expected = write_statement(file_path, args.rows)
+        ok = True
+        for workers in (1, args.workers):
+            start = time.perf_counter()
+            incomes, expenses, rejected = parse(file_path, workers, args.chunk_lines)
+            seconds = time.perf_counter() - start
+            got = (sum(row['amount_paisa'] for row in incomes), sum(row['amount_paisa'] for row in expenses),
+                   len(rejected))
+            print(f"{workers} worker(s): {args.rows:,} rows in {seconds:.2f}s ({args.rows / seconds:,.0f} rows/s), "
+                  f"{len(incomes):,} income, {len(expenses):,} expenses, {len(rejected):,} rejected")
+            if got != expected:
+                print(f"MISMATCH: (income, expenses, rejected) {got}, expected {expected}")
+                ok = False
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: what the hot-path instrumentation costs.
+
+Times a trivial function --calls times undecorated, decorated with
+instrument.timed while instrumentation is disabled (the default), enabled, and
+enabled with memory tracking, and reports nanoseconds per call. Then runs the
+analytics on a synthetic ledger (see bench_forecast) --runs times disabled and
+enabled and reports the end-to-end difference. Exits with status 1 if the
+disabled decorator adds more than --budget-ns per call.
+
+Run from the project root:
+    python -m benchmarks.bench_instrument --calls 1000000 --budget-ns 500
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from utils import instrument
+from benchmarks.bench_forecast import START, make_ledgers
+from features.analytics import forecast
+from features.analytics.cashflow_analysis import calculate_daily_burn, calculate_safe_balance
+
+
+def plain(x):
+    return x
+
+
+timed_plain = instrument.timed('bench.plain')(plain)
+
+
+def ns_per_call(func, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def analyze(incomes, expenses):
+    calculate_safe_balance(incomes, expenses)
+    calculate_daily_burn(expenses)
+    forecast.project(forecast.build_schedule(incomes, expenses, START), 12)
+
+
+def median_ms(incomes, expenses, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        analyze(incomes, expenses)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=1_000_000)
+    parser.add_argument('--items', type=int, default=2_000, help="Recurring items in the synthetic ledger")
+    parser.add_argument('--history', type=int, default=20_000, help="One-off rows in the synthetic ledger")
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--budget-ns', type=float, default=500, help="Allowed ns per call for a disabled decorator")
+    args = parser.parse_args()
+
+    instrument.disable()
+    baseline = ns_per_call(plain, args.calls)
+    disabled = ns_per_call(timed_plain, args.calls)
+    instrument.enable()
+    enabled = ns_per_call(timed_plain, args.calls)
+    instrument.enable(memory=True)
+    memory = ns_per_call(timed_plain, args.calls // 10)
+    instrument.disable()
+    print(f"per call: undecorated {baseline:.0f} ns, disabled {disabled:.0f} ns (+{disabled - baseline:.0f}), "
+          f"enabled {enabled:.0f} ns, with memory {memory:,.0f} ns")
+
+    incomes, expenses = make_ledgers(args.items, args.history)
+    off = median_ms(incomes, expenses, args.runs)
+    instrument.reset()
+    instrument.enable()
+    on = median_ms(incomes, expenses, args.runs)
+    instrument.disable()
+    print(f"analytics on {len(incomes) + len(expenses):,} rows: disabled {off:.2f} ms, enabled {on:.2f} ms "
+          f"({(on - off) / off:+.1%})")
+    print(instrument.format_report())
+
+    if disabled - baseline > args.budget_ns:
+        print(f"disabled overhead {disabled - baseline:.0f} ns over budget {args.budget_ns:g} ns")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: peak RSS of computing the cashflow summary from a large ledger.
+
+    load_data  materialize every row as a dict, then engine.summarize_records
+    streaming  engine.summarize_batches over utils.helpers.iter_batches
+
+Each loader runs in a fresh child process so its peak RSS (ru_maxrss) is
+measured in isolation.
+
+Run from the project root:
+    python -m benchmarks.bench_memory --rows 5000000
+"""
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from utils.helpers import append_rows, load_data, iter_batches
+from features.analytics import engine
+
+EXPENSE_FIELDS = ['date', 'type', 'category', 'amount_paisa', 'description', 'frequency']
+INCOME_FIELDS = ['date', 'source', 'amount_paisa', 'description']
+CHUNK = 100_000
+
+
+def write_ledgers(directory, rows):
+    rng = random.Random(0)
+    expense_file = os.path.join(directory, 'expenses.txt')
+    income_file = os.path.join(directory, 'income.txt')
+    for start in range(0, rows, CHUNK):
+        append_rows(expense_file, (
+            {
+                'date': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                'type': 'Fixed' if rng.random() < 0.3 else 'Variable',
+                'category': rng.choice(['Rent', 'Bills', 'Food', 'Shopping', 'Health']),
+                'amount_paisa': rng.randint(1_000, 500_000),
+                'description': 'synthetic',
+                'frequency': 'one-time'
+            }
+            for _ in range(min(CHUNK, rows - start))
+        ), EXPENSE_FIELDS)
+    append_rows(income_file, (
+        {'date': '2025-11-01', 'source': 'Salary', 'amount_paisa': 5_000_000, 'description': ''}
+        for _ in range(max(1, rows // 100))
+    ), INCOME_FIELDS)
+    return income_file, expense_file
+
+
+def child(mode, income_file, expense_file):
+    start = time.perf_counter()
+    if mode == 'load_data':
+        engine.summarize_records(load_data(income_file), load_data(expense_file))
+    else:
+        engine.summarize_batches(iter_batches(income_file), iter_batches(expense_file))
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(f"{peak_mb:.1f} {elapsed:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--child', choices=['load_data', 'streaming'])
+    parser.add_argument('--files', nargs=2)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, *args.files)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Writing {args.rows:,} expense rows...")
+        income_file, expense_file = write_ledgers(tmp, args.rows)
+        size_mb = os.path.getsize(expense_file) / 1024 / 1024
+        print(f"Ledger size: {size_mb:.1f} MB")
+        print(f"{'loader':>10} {'peak RSS (MB)':>14} {'time (s)':>9}")
+        for mode in ('load_data', 'streaming'):
+            result = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_memory', '--child', mode, '--files', income_file, expense_file],
+                capture_output=True, text=True, check=True
+            )
+            peak_mb, elapsed = result.stdout.split()
+            print(f"{mode:>10} {float(peak_mb):>14.1f} {float(elapsed):>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
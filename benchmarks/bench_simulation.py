@@ -0,0 +1,67 @@
+"""
+Benchmark: Monte Carlo spending simulation throughput.
+
+Builds a synthetic --history of Variable expenses over --categories categories,
+then times simulation.simulate for each path count, in this process and on a
+process pool of --workers, and prints paths per second. Also checks that a seed
+gives identical results in and out of the pool; exits with status 1 if not.
+
+Run from the project root:
+    python -m benchmarks.bench_simulation --paths 10000,100000,1000000 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from features.analytics import simulation
+
+TODAY = date(2026, 10, 16)
+
+
+def make_expenses(history, categories, seed=0):
+    rng = random.Random(seed)
+    expenses = []
+    for _ in range(history):
+        day = (TODAY - timedelta(days=rng.randint(0, simulation.HISTORY_DAYS - 1))).isoformat()
+        category = rng.randrange(categories)
+        expenses.append({'date': day, 'type': 'Variable', 'category': f'Category {category}',
+                         'amount_paisa': rng.randint(1_000, 20_000 * (category + 1)), 'description': '',
+                         'frequency': 'one-time'})
+    return expenses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--paths', default='10000,100000,1000000', help="Comma-separated path counts")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--history', type=int, default=5_000)
+    parser.add_argument('--categories', type=int, default=8)
+    parser.add_argument('--balance', type=int, default=20_000_000, help="Starting balance in paisa")
+    args = parser.parse_args()
+
+    expenses = make_expenses(args.history, args.categories)
+    print(f"{args.history:,} variable expenses in {args.categories} categories, "
+          f"{simulation.HISTORY_DAYS} days of history")
+    print(f"{'paths':>10} {'in-process':>14} {f'{args.workers} workers':>14}   (paths/s)   P(run out)")
+    mismatched = False
+    for paths in [int(p) for p in args.paths.split(',')]:
+        rates, results = [], []
+        for workers in (1, args.workers):
+            start = time.perf_counter()
+            # balance is fixed so only the simulation is timed, not cash_on_hand
+            result = simulation.simulate([], expenses, TODAY, paths=paths, seed=1, workers=workers, balance=args.balance)
+            rates.append(paths / (time.perf_counter() - start))
+            results.append(result)
+        mismatched = mismatched or results[0] != results[1]
+        print(f"{paths:>10,} {rates[0]:>14,.0f} {rates[1]:>14,.0f}   {results[0]['probability_run_out']:>20.4f}")
+    if mismatched:
+        print("\nFAIL: same seed gave different results in and out of the pool")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: CLI startup import cost, with a regression budget.
+
+Runs `python -X importtime -c "import main"` in fresh interpreters and reports
+the median cumulative import time of main plus the slowest modules it pulled
+in. Exits with status 1 if the median is over --budget-ms or if any module in
+HEAVY_MODULES was imported at startup (they must stay deferred until a chart,
+frame or prompt needs them).
+
+This is why imports of those modules sit inside the functions that use
+them, marked with a short note naming what they defer (e.g. "# numpy"):
+NumPy comes in through utils.pagination, utils.columnar and the analytics
+engine, questionary through prompt_toolkit, and matplotlib, pandas and
+plotly only for charts and frames. concurrent.futures is deferred the same
+way because it pulls in multiprocessing, which is slow to import and only
+needed by the jobs that start a pool. Keeping them out of `import main` is
+what the budget measures.
+
+Run from the project root:
+    python -m benchmarks.bench_startup --runs 7 --budget-ms 100
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ['matplotlib', 'pandas', 'plotly', 'numpy', 'questionary', 'sqlite3']
+
+
+def parse_importtime(stderr):
+    """-X importtime output -> list of (module, self_us, cumulative_us)."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def measure(target):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {target}"],
+        capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--target', default='main', help="Module to import (default: main)")
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--budget-ms', type=float, default=100.0)
+    parser.add_argument('--top', type=int, default=10, help="How many of the slowest modules to list")
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        imports = measure(args.target)
+        totals.append(next(cum for name, _, cum in imports if name == args.target) / 1000)
+    median_ms = statistics.median(totals)
+
+    print(f"import {args.target}: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}), budget {args.budget_ms:.0f} ms")
+    print(f"\n{'self (ms)':>10} {'cumulative (ms)':>16}  module")
+    for name, self_us, cumulative_us in sorted(imports, key=lambda i: i[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>10.1f} {cumulative_us / 1000:>16.1f}  {name}")
+
+    loaded = {name.split('.')[0] for name, _, _ in imports}
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    failed = False
+    if heavy:
+        print(f"\nFAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"\nFAIL: startup is over budget by {median_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == '__main__':
+    main()
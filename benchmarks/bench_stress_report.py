@@ -0,0 +1,76 @@
+"""
+Benchmark: nightly stress report over many tenants.
+
+Creates --tenants tenants (see bench_tenants), then times:
+  - summaries one tenant at a time in this process, the way a loop over
+    get_analytics_summary would do it (features.analytics.batch, 1 worker)
+  - the first stress report, which reads every ledger, on --workers processes
+  - a second report with nothing changed
+  - a third after --changed percent of tenants got a new entry
+and checks that the report's totals match a fresh full run. Exits with
+status 1 if they don't.
+
+Run from the project root:
+    python -m benchmarks.bench_stress_report --tenants 100000 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+from utils import config, storage, tenants
+from benchmarks.bench_tenants import make_tenants
+from features.analytics import batch, stress_report
+from features.input.income_input import INCOME_FIELDS
+
+
+def show(label, stats):
+    print(f"{label:<28} {stats['seconds']:>7.1f} s {stats['tenants_per_second']:>10,.0f} tenants/s   "
+          f"unchanged {stats.get('unchanged', 0):,} touched {stats.get('touched', 0):,} "
+          f"recomputed {stats.get('recomputed', stats['tenants']):,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tenants', type=int, default=100_000)
+    parser.add_argument('--rows', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--changed', type=float, default=1.0, help="Percent of tenants changed before the last run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.TENANT_ROOT = os.environ['CASHFLOW_TENANT_ROOT'] = tmp
+        make_tenants(args.tenants, args.rows)
+        print(f"{args.tenants:,} tenants x {args.rows} rows per ledger ({config.STORAGE_BACKEND})")
+
+        show("one by one", batch.run(workers=1))
+        show(f"full report, {args.workers} workers", stress_report.run(workers=args.workers))
+        show("nothing changed", stress_report.run(workers=args.workers))
+
+        rng = random.Random(2)
+        for i in rng.sample(range(args.tenants), int(args.tenants * args.changed / 100)):
+            tenant = tenants.Tenant(f"user-{i:07d}")
+            storage.append_rows(tenant.income_file, [{'date': '2026-10-16', 'source': 'Gift',
+                                                      'amount_paisa': rng.randint(1, 10_000), 'description': ''}],
+                                INCOME_FIELDS)
+            storage.release(tenant.income_file)
+        show(f"{args.changed:g}% changed", stress_report.run(workers=args.workers))
+
+        incremental = stress_report.load_report()
+        fresh_path = os.path.join(tmp, 'fresh.bin')
+        stress_report.run(fresh_path, workers=args.workers, full=True)
+        fresh = stress_report.load_report(fresh_path)
+        same = incremental['user_id'] == fresh['user_id'] and all(
+            np.array_equal(incremental[name], fresh[name]) for name in stress_report.TOTAL_COLUMNS
+        )
+        print(f"report file {os.path.getsize(stress_report.report_path()) / (1 << 20):.1f} MB, "
+              f"matches a full run: {same}")
+        if not same:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: many tenants on one deployment.
+
+Creates --tenants tenants with --rows income and expense rows each under a
+temporary tenant root. It then:
+  - times the batch summary job (features.analytics.batch) in this process and
+    on a pool of --workers, reporting tenants per second
+  - replays --reads random ledger reads with a Zipf-like skew through the
+    tenant ledger cache, capped at --cache-mb, and reports the hit rate and
+    the memory the cache ended up holding; exits with status 1 if that is
+    over the cap
+
+Run from the project root:
+    python -m benchmarks.bench_tenants --tenants 100000 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from utils import config, helpers, storage, tenants
+from features.analytics import batch
+from features.input.income_input import INCOME_FIELDS
+from features.expenses.expense_input import EXPENSE_FIELDS
+
+
+def make_tenants(count, rows, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        tenant = tenants.Tenant(f"user-{i:07d}").create()
+        incomes = [
+            {'date': f"2026-{rng.randint(1, 10):02d}-01", 'source': 'Salary',
+             'amount_paisa': rng.randint(100_000, 2_000_000), 'description': ''}
+            for _ in range(rows)
+        ]
+        expenses = [
+            {'date': f"2026-10-{rng.randint(1, 16):02d}", 'type': rng.choice(['Fixed', 'Variable']),
+             'category': rng.choice(['Rent', 'Food', 'Bills', 'Petrol']), 'amount_paisa': rng.randint(1_000, 2_000_000),
+             'description': '', 'frequency': 'one-time'}
+            for _ in range(rows)
+        ]
+        if config.STORAGE_BACKEND == 'text':
+            # Plain files are the same ledgers without a log record per row
+            write_text(tenant.income_file, incomes, INCOME_FIELDS)
+            write_text(tenant.expense_file, expenses, EXPENSE_FIELDS)
+        else:
+            storage.append_rows(tenant.income_file, incomes, INCOME_FIELDS)
+            storage.append_rows(tenant.expense_file, expenses, EXPENSE_FIELDS)
+            storage.release(tenant.income_file)
+
+
+def write_text(file_path, rows, fieldnames):
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write('|'.join(fieldnames) + '\n')
+        for row in helpers.assign_row_ids(rows):
+            f.write('|'.join(str(row[name]) for name in fieldnames) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tenants', type=int, default=100_000)
+    parser.add_argument('--rows', type=int, default=20, help="Income and expense rows per tenant")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--reads', type=int, default=50_000)
+    parser.add_argument('--cache-mb', type=float, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.TENANT_ROOT = os.environ['CASHFLOW_TENANT_ROOT'] = tmp
+        start = time.perf_counter()
+        make_tenants(args.tenants, args.rows)
+        print(f"created {args.tenants:,} tenants x {args.rows} rows per ledger "
+              f"({config.STORAGE_BACKEND}) in {time.perf_counter() - start:.1f} s")
+
+        for workers in (1, args.workers):
+            report = batch.run(workers)
+            print(f"batch summary, {workers} worker(s): {report['tenants']:,} tenants in {report['seconds']:.1f} s, "
+                  f"{report['tenants_per_second']:,.0f} tenants/s, {report['stress_levels']}")
+
+        cache = tenants.LedgerCache(int(args.cache_mb * (1 << 20)))
+        rng = random.Random(1)
+        start = time.perf_counter()
+        for _ in range(args.reads):
+            # Zipf-like: a few tenants are very active, most rarely read
+            user = min(int(rng.paretovariate(0.5)) - 1, args.tenants - 1)
+            tenant = tenants.Tenant(f"user-{user:07d}")
+            cache.get(tenant.income_file)
+            cache.get(tenant.expense_file)
+        seconds = time.perf_counter() - start
+        stats = cache.stats()
+        print(f"cached reads: {2 * args.reads / seconds:,.0f} ledgers/s, hit rate "
+              f"{stats['hits'] / (stats['hits'] + stats['misses']):.1%}, {stats['ledgers']:,} ledgers in "
+              f"{stats['bytes'] / (1 << 20):.1f} of {args.cache_mb:g} MB, {stats['evictions']:,} evictions")
+        if stats['bytes'] > stats['max_bytes']:
+            print("MISMATCH: the cache holds more than its byte budget")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: cost of updating and deleting one income entry as the ledger grows.
+
+Compares the write-ahead log (utils.wal) with the full-file rewrite that
+update_income / delete_income did before it (CASHFLOW_WAL=0). Writes are timed
+on their own ("write") and together with the load_for_update that precedes
+them in the interactive flow ("edit"). The last columns show what the log costs
+readers: load_data with --samples pending records against a freshly compacted
+ledger, and the compaction itself.
+
+Run from the project root:
+    python -m benchmarks.bench_wal --rows 100000 --samples 50
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from utils import config, helpers, storage, wal
+
+INCOME_FIELDS = ['date', 'source', 'amount_paisa', 'description']
+CHECKPOINTS = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def make_row(i):
+    return {
+        'date': f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+        'source': 'Salary',
+        'amount_paisa': 10_000 + i % 50_000,
+        'description': f'row {i}'
+    }
+
+
+def time_edits(file_path, samples, use_log):
+    """Per-edit (write, load + write) seconds for `samples` updates, then as many deletes."""
+    config.WAL_ENABLED = use_log
+    results = []
+    for edit in ('update', 'delete'):
+        write_time = total_time = 0.0
+        for i in range(samples):
+            start = time.perf_counter()
+            rows, version = storage.load_for_update(file_path)
+            loaded = time.perf_counter()
+            index = (i * 7919) % len(rows)
+            if not use_log:
+                # What update_income / delete_income did: edit the list, save it all
+                if edit == 'update':
+                    rows[index] = dict(rows[index], amount_paisa=i + 1)
+                else:
+                    del rows[index]
+                storage.save_data(file_path, rows, expected_version=version)
+            elif edit == 'update':
+                storage.update_rows(file_path, {index: dict(rows[index], amount_paisa=i + 1)}, expected_version=version)
+            else:
+                storage.delete_rows(file_path, [index], expected_version=version)
+            end = time.perf_counter()
+            write_time += end - loaded
+            total_time += end - start
+        results.append((write_time / samples, total_time / samples))
+    return results
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--samples', type=int, default=50)
+    args = parser.parse_args()
+
+    # Keep compaction out of the timed edits
+    config.WAL_COMPACT_BYTES = float('inf')
+    print(f"{'rows':>10} {'edit':>7} {'rewrite write':>14} {'log write':>10} {'rewrite edit':>13} {'log edit':>9}"
+          f" {'load+log':>9} {'load':>7} {'compact':>8}   (ms)")
+    for checkpoint in [c for c in CHECKPOINTS if c <= args.rows]:
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, 'income.txt')
+            helpers.append_rows(file_path, (make_row(i) for i in range(checkpoint)), INCOME_FIELDS)
+            rewrite = time_edits(file_path, args.samples, use_log=False)
+            logged = time_edits(file_path, args.samples, use_log=True)
+            load_pending = timed(wal.load_data, file_path)
+            compact = timed(wal.compact, file_path)
+            load_clean = timed(wal.load_data, file_path)
+
+        for edit, (old_write, old_edit), (new_write, new_edit) in zip(('update', 'delete'), rewrite, logged):
+            print(f"{checkpoint:>10,} {edit:>7} {old_write * 1000:>14.3f} {new_write * 1000:>10.3f}"
+                  f" {old_edit * 1000:>13.3f} {new_edit * 1000:>9.3f}", end='')
+            if edit == 'update':
+                print(f" {load_pending * 1000:>9.1f} {load_clean * 1000:>7.1f} {compact * 1000:>8.1f}")
+            else:
+                print()
+
+
+if __name__ == '__main__':
+    main()
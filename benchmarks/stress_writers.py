@@ -0,0 +1,222 @@
+"""
+Stress test: concurrent writers from several processes, counting lost writes.
+
+Every worker process runs --threads threads, each doing --ops operations on
+the income ledger of one scratch tenant. Each operation writes exactly one
+uniquely tagged row and adds it to the tenant's running totals, both under
+running_totals.updating() like every writer in the app. Most are appends. A
+--rmw-ratio share are read-modify-writes instead: load the whole ledger, add
+the row, save it back, retrying on LedgerConflictError. Afterwards every tag
+must be in the ledger exactly once and every line must parse; anything
+missing is a lost write. The running totals must also give the same summary
+as a full rescan (get_analytics_summary); a difference is a lost total.
+
+--unsafe swaps in the old write path (in-place text rewrite, no lock, no
+version check, totals read and saved back with nothing held in between) to
+show what it loses; a torn file can make its read-modify-writes fail
+outright, which is counted too.
+
+Run from the project root:
+    python -m benchmarks.stress_writers --processes 6 --threads 3 --ops 100
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+FIELDS = ['date', 'source', 'amount_paisa', 'description']
+TENANT_ID = 'stress'
+
+
+def unsafe_save(file_path, data):
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, delimiter='|')
+        writer.writeheader()
+        writer.writerows(data)
+
+
+def unsafe_append(file_path, row):
+    is_new = not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+    with open(file_path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, delimiter='|')
+        if is_new:
+            writer.writeheader()
+        writer.writerow(row)
+
+
+def write_with_totals(tenant, row, write, unsafe):
+    """Runs write() and adds row to the tenant's running totals."""
+    from features.analytics import running_totals
+
+    paths = (tenant.income_file, tenant.expense_file, tenant.totals_file)
+    if unsafe:
+        try:
+            totals = running_totals.get_running_totals(*paths)
+        except ValueError:  # rebuilt from a torn line; the row still goes in
+            totals = None
+        write()
+        if totals is not None:
+            totals.add_income(row)
+            totals.save()
+        return
+    with running_totals.updating(*paths) as totals:
+        write()
+        totals.add_income(row)
+
+
+def worker_thread(tag_prefix, ops, rmw_ratio, unsafe, counts):
+    from utils import helpers, storage, tenants
+
+    tenant = tenants.Tenant(TENANT_ID)
+    file_path = tenant.income_file
+
+    def read_modify_write(row):
+        while True:
+            if unsafe:
+                try:
+                    rows = helpers.load_data(file_path)
+                    rows.append(row)
+                    unsafe_save(file_path, rows)
+                except ValueError:  # read a torn line
+                    counts['failed'] += 1
+                return
+            rows, version = storage.load_for_update(file_path)
+            rows.append(row)
+            try:
+                storage.save_data(file_path, rows, expected_version=version)
+                return
+            except helpers.LedgerConflictError:
+                counts['conflicts'] += 1
+
+    def append(row):
+        if unsafe:
+            unsafe_append(file_path, row)
+        else:
+            storage.append_row(file_path, row, FIELDS)
+
+    rmw_every = round(1 / rmw_ratio) if rmw_ratio > 0 else 0
+    for i in range(ops):
+        row = {'date': '2026-10-01', 'source': 'Salary', 'amount_paisa': 100, 'description': f"{tag_prefix}-{i}"}
+        if rmw_every and i % rmw_every == 0:
+            write_with_totals(tenant, row, lambda: read_modify_write(row), unsafe)
+            counts['rmw'] += 1
+        else:
+            write_with_totals(tenant, row, lambda: append(row), unsafe)
+            counts['appends'] += 1
+
+
+def worker_process(process_no, threads, ops, rmw_ratio, unsafe, results):
+    counts = [{'appends': 0, 'rmw': 0, 'conflicts': 0, 'failed': 0} for _ in range(threads)]
+    workers = [
+        threading.Thread(target=worker_thread, args=(f"p{process_no}t{t}", ops, rmw_ratio, unsafe, counts[t]))
+        for t in range(threads)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    results.put({key: sum(c[key] for c in counts) for key in counts[0]})
+
+
+def scan_text(file_path):
+    """Tags from a text ledger, line by line, so one torn line doesn't hide the rest."""
+    if not os.path.exists(file_path):
+        return
+    with open(file_path, encoding='utf-8') as f:
+        next(f, None)
+        for line in f:
+            values = line.rstrip('\n').split('|')
+            yield values[-1] if len(values) == len(FIELDS) else None
+
+
+def check_ledger(file_path, expected_tags, unsafe):
+    from utils import storage
+
+    if unsafe:
+        tags = scan_text(file_path)
+    else:
+        tags = (row['description'] for row in storage.iter_rows(file_path))
+    found, corrupt = {}, 0
+    for tag in tags:
+        if tag not in expected_tags:
+            corrupt += 1
+        else:
+            found[tag] = found.get(tag, 0) + 1
+    duplicates = sum(count - 1 for count in found.values())
+    return len(found), len(expected_tags) - len(found), corrupt + duplicates
+
+
+def check_totals(tenant):
+    """(summary from the running totals, summary from a full rescan)."""
+    from features.analytics import running_totals
+    from features.analytics.cashflow_analysis import get_analytics_summary
+
+    totals = running_totals.get_running_totals(tenant.income_file, tenant.expense_file, tenant.totals_file)
+    return totals.summary(), get_analytics_summary(tenant=tenant)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--processes', type=int, default=6)
+    parser.add_argument('--threads', type=int, default=3)
+    parser.add_argument('--ops', type=int, default=100, help="Operations per thread")
+    parser.add_argument('--rmw-ratio', type=float, default=0.1)
+    parser.add_argument('--unsafe', action='store_true', help="Use the old unlocked in-place write path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Set before utils.config is imported, here and in the workers
+        os.environ['CASHFLOW_TENANT_ROOT'] = tmp
+        from utils import tenants
+        tenant = tenants.Tenant(TENANT_ID).create()
+        file_path = tenant.income_file
+        results = multiprocessing.Queue()
+        start = time.perf_counter()
+        processes = [
+            multiprocessing.Process(
+                target=worker_process,
+                args=(p, args.threads, args.ops, args.rmw_ratio, args.unsafe, results)
+            )
+            for p in range(args.processes)
+        ]
+        for p in processes:
+            p.start()
+        totals = [results.get() for _ in processes]
+        for p in processes:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        expected_tags = {
+            f"p{p}t{t}-{i}" for p in range(args.processes) for t in range(args.threads) for i in range(args.ops)
+        }
+        found, lost, corrupt = check_ledger(file_path, expected_tags, args.unsafe)
+        try:
+            from_totals, rescanned = check_totals(tenant)
+        except ValueError:  # a torn line
+            from_totals, rescanned = None, {}
+
+    appends = sum(t['appends'] for t in totals)
+    rmw = sum(t['rmw'] for t in totals)
+    conflicts = sum(t['conflicts'] for t in totals)
+    failed = sum(t['failed'] for t in totals)
+    print(f"{'unsafe' if args.unsafe else 'locked'} writers: {args.processes} processes x {args.threads} threads, "
+          f"{appends + rmw:,} writes in {elapsed:.2f}s ({(appends + rmw) / elapsed:,.0f} writes/s)")
+    print(f"  appends {appends:,}, read-modify-writes {rmw:,} (retried after a conflict {conflicts:,} times, "
+          f"failed {failed:,})")
+    print(f"  rows found {found:,} of {len(expected_tags):,}: lost {lost:,}, corrupt or duplicated {corrupt:,}")
+    totals_match = from_totals == rescanned
+    if from_totals is None:
+        print("  running totals: ledger unreadable, not compared")
+    else:
+        print(f"  running totals: income {from_totals['total_income']:,} paisa, full rescan "
+              f"{rescanned['total_income']:,} paisa ({'match' if totals_match else 'MISMATCH'})")
+    if lost or corrupt or not totals_match:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
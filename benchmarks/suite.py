@@ -0,0 +1,214 @@
+"""
+Benchmark suite: the ledger hot paths on synthetic data, as stable JSON.
+
+Generates --income-rows / --expense-rows rows with benchmarks.synthetic, saves
+them as a scratch tenant's ledgers through utils.storage (so the configured
+CASHFLOW_STORAGE backend is what gets measured), then times each case
+--repeat times:
+  save_data.*      rewriting a whole ledger
+  load_data.*      reading a whole ledger
+  summary          get_analytics_summary
+  list.*[option]   the storage query behind each list_income / list_expenses filter
+  page.*           one 50-row page (utils.pagination), first and from the middle
+  charts.*         the pie and burn-rate chart builders (features.visualizations.charts)
+
+The result is JSON with sorted keys: the parameters, the environment, and per
+case the first, median and fastest time in ms and the rows it returned. With
+--baseline it is compared against an earlier result: a case whose median is
+more than --tolerance slower (and at least --min-delta-ms slower) is a
+regression, and the exit status is 1.
+
+Run from the project root:
+    python -m benchmarks.suite --out baseline.json              # on the main branch
+    python -m benchmarks.suite --baseline baseline.json         # on your branch
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+from utils import config, pagination, storage, tenants
+from benchmarks import synthetic
+from features.analytics.cashflow_analysis import get_analytics_summary
+from features.input.income_input import INCOME_FIELDS, income_filters
+from features.expenses.expense_input import EXPENSE_FIELDS, expense_filters
+
+SCHEMA = 1
+INCOME_OPTIONS = [None, 'last_7_days', 'last_month', 'source:Salary']
+EXPENSE_OPTIONS = [None, 'last_7_days', 'last_month', 'type:Variable', 'category:Food']
+# Results taken with different values of these can't be compared
+PARAMS = ['income_rows', 'expense_rows', 'months', 'seed', 'backend']
+
+
+def _rows(result):
+    return len(result) if isinstance(result, list) else 0
+
+
+def measure(func, repeat):
+    """Runs func repeat times: {first_ms, median_ms, min_ms, rows}."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        'first_ms': round(times[0], 3),
+        'median_ms': round(statistics.median(times), 3),
+        'min_ms': round(min(times), 3),
+        'rows': _rows(result),
+    }
+
+
+def run_cases(tenant, incomes, expenses, repeat, today):
+    cases = {
+        'save_data.income': lambda: storage.save_data(tenant.income_file, incomes),
+        'save_data.expenses': lambda: storage.save_data(tenant.expense_file, expenses),
+    }
+    results = {name: measure(func, repeat) for name, func in cases.items()}
+    # save_data returns a version, not rows
+    results['save_data.income']['rows'] = len(incomes)
+    results['save_data.expenses']['rows'] = len(expenses)
+
+    results['load_data.income'] = measure(lambda: storage.load_data(tenant.income_file), repeat)
+    results['load_data.expenses'] = measure(lambda: storage.load_data(tenant.expense_file), repeat)
+    results['summary'] = measure(lambda: get_analytics_summary(tenant=tenant), repeat)
+    for option in INCOME_OPTIONS:
+        filters = income_filters(option, today)
+        results[f"list.income[{option or 'all'}]"] = measure(
+            lambda: storage.query_rows(tenant.income_file, **filters), repeat)
+    for option in EXPENSE_OPTIONS:
+        filters = expense_filters(option, today)
+        results[f"list.expenses[{option or 'all'}]"] = measure(
+            lambda: storage.query_rows(tenant.expense_file, **filters), repeat)
+    for name, file_path in (('income', tenant.income_file), ('expenses', tenant.expense_file)):
+        middle = max(1, len(incomes if name == 'income' else expenses) // pagination.PAGE_SIZE // 2)
+        results[f"page.{name}[first]"] = measure(lambda: pagination.page_rows(file_path)['rows'], repeat)
+        results[f"page.{name}[middle]"] = measure(lambda: pagination.page_rows(file_path, page=middle)['rows'], repeat)
+
+    import matplotlib
+    matplotlib.use('Agg')  # no display; must come before pyplot is imported
+    import matplotlib.pyplot as plt
+    from features.visualizations import charts
+    expense_data = storage.load_data(tenant.expense_file)
+    for name, build in (('charts.pie', charts.expense_pie_chart), ('charts.daily_burn', charts.daily_burn_chart)):
+        def draw():
+            figure = build(expense_data)
+            plt.close(figure)
+        results[name] = measure(draw, repeat)
+    return results
+
+
+def run(income_rows, expense_rows, months=12, seed=0, repeat=5):
+    """Runs every case on fresh synthetic ledgers and returns the result document."""
+    # Dated up to today, so the date filters select the same rows whichever day this runs
+    today = date.today()
+    incomes = synthetic.make_incomes(income_rows, seed, today, months)
+    expenses = synthetic.make_expenses(expense_rows, seed, today, months)
+    root = config.TENANT_ROOT
+    with tempfile.TemporaryDirectory() as tmp:
+        config.TENANT_ROOT = tmp
+        try:
+            tenant = tenants.Tenant('bench').create()
+            storage.append_rows(tenant.income_file, incomes, INCOME_FIELDS)
+            storage.append_rows(tenant.expense_file, expenses, EXPENSE_FIELDS)
+            results = run_cases(tenant, incomes, expenses, repeat, today)
+            storage.release(tenant.income_file)
+        finally:
+            config.TENANT_ROOT = root
+    return {
+        'schema': SCHEMA,
+        'params': {
+            'income_rows': income_rows, 'expense_rows': expense_rows, 'months': months,
+            'seed': seed, 'repeat': repeat, 'backend': config.STORAGE_BACKEND,
+        },
+        'environment': {
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'cpus': os.cpu_count(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance, min_delta_ms):
+    """Rows of (case, baseline ms, current ms, change, verdict) and whether anything regressed."""
+    rows = []
+    regressed = False
+    for name in sorted(set(current['results']) | set(baseline['results'])):
+        old = baseline['results'].get(name)
+        new = current['results'].get(name)
+        if old is None or new is None:
+            rows.append((name, old and old['median_ms'], new and new['median_ms'], None,
+                         'new' if old is None else 'missing'))
+            continue
+        before, after = old['median_ms'], new['median_ms']
+        change = (after - before) / before if before else 0.0
+        if after > before * (1 + tolerance) and after - before >= min_delta_ms:
+            verdict = 'REGRESSION'
+            regressed = True
+        elif before > after * (1 + tolerance) and before - after >= min_delta_ms:
+            verdict = 'faster'
+        else:
+            verdict = 'ok'
+        rows.append((name, before, after, change, verdict))
+    return rows, regressed
+
+
+def format_comparison(rows):
+    lines = [f"{'case':<34} {'baseline ms':>12} {'current ms':>11} {'change':>8}  verdict"]
+    for name, before, after, change, verdict in rows:
+        before = f"{before:>12.2f}" if before is not None else f"{'-':>12}"
+        after = f"{after:>11.2f}" if after is not None else f"{'-':>11}"
+        change = f"{change:>+8.1%}" if change is not None else f"{'-':>8}"
+        lines.append(f"{name:<34} {before} {after} {change}  {verdict}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--income-rows', type=int, default=5_000)
+    parser.add_argument('--expense-rows', type=int, default=50_000)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', help="Write the JSON result here (default stdout)")
+    parser.add_argument('--baseline', help="Earlier result to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown of a median, 0.25 = 25%%")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        params = {'income_rows': args.income_rows, 'expense_rows': args.expense_rows, 'months': args.months,
+                  'seed': args.seed, 'backend': config.STORAGE_BACKEND}
+        mismatched = [name for name in PARAMS if baseline['params'].get(name) != params[name]]
+        if baseline.get('schema') != SCHEMA or mismatched:
+            print(f"baseline {args.baseline} was taken with different {', '.join(mismatched) or 'schema'}; "
+                  f"rerun it with the same options", file=sys.stderr)
+            return 2
+
+    current = run(args.income_rows, args.expense_rows, args.months, args.seed, args.repeat)
+    text = json.dumps(current, indent=2, sort_keys=True) + '\n'
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+    if baseline is None:
+        return 0
+    rows, regressed = compare(current, baseline, args.tolerance, args.min_delta_ms)
+    print(format_comparison(rows), file=sys.stderr)
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Synthetic ledgers for benchmarks: realistic income and expense rows at any size.
+
+Rows use the app's own vocabularies (INCOME_SOURCES, FIXED_EXPENSE_CATEGORIES,
+VARIABLE_EXPENSE_CATEGORIES, EXPENSE_FREQUENCIES) and are written in the
+ledger format of database/income.txt and database/expenses.txt. Dates are
+spread over --months months ending --end (default today), amounts are
+lognormal around a typical value per source / category, and how often each
+source or category comes up follows --skew (0 = uniform, higher = the first
+names in each list dominate) unless --weights names it. The same seed and
+end date always give the same ledgers. Files are always plain text; the
+benchmark suite (benchmarks.suite) saves the same rows through utils.storage
+for whichever backend is configured.
+
+Run from the project root:
+    python -m benchmarks.synthetic --income-rows 10000 --expense-rows 100000 --out-dir /tmp/ledgers
+"""
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+
+from features.input.income_input import INCOME_FIELDS, INCOME_SOURCES
+from features.expenses.expense_input import (
+    EXPENSE_FIELDS, EXPENSE_FREQUENCIES, FIXED_EXPENSE_CATEGORIES, VARIABLE_EXPENSE_CATEGORIES,
+)
+
+# Typical amount in Rupees per source / category; rows vary around it
+TYPICAL_RUPEES = {
+    'Salary': 45_000, 'Freelance': 12_000, 'Part-time': 6_000, 'Gift': 2_000, 'Scholarship': 10_000,
+    'Rent': 15_000, 'Bills': 2_500, 'Groceries': 3_000, 'Petrol': 1_500, 'School Fees': 8_000,
+    'Food': 350, 'Shopping': 1_200, 'Entertainment': 600, 'Health': 900, 'Other': 500,
+}
+FREQUENCY_WEIGHTS = {'monthly': 6, 'weekly': 2, 'one-time': 2}
+DESCRIPTIONS = ['', '', '', 'cash', 'card', 'upi', 'shared']
+
+
+def distribution(names, skew=0.0, weights=None):
+    """Probabilities for names: Zipf-like by position with exponent skew, overridden by weights."""
+    weights = weights or {}
+    raw = np.array([weights.get(name, 1 / (i + 1) ** skew) for i, name in enumerate(names)], dtype=float)
+    return raw / raw.sum()
+
+
+def _dates(rng, rows, end, months):
+    """ISO dates, uniform over the months * 30 days ending at end."""
+    days = max(1, months * 30)
+    calendar = np.array([(end - timedelta(days=offset)).isoformat() for offset in range(days)])
+    return calendar[rng.integers(0, days, rows)]
+
+
+def _amounts(rng, labels, names):
+    typical = np.array([TYPICAL_RUPEES.get(name, 500) for name in names], dtype=float)[labels]
+    return np.maximum(100, np.round(typical * 100 * rng.lognormal(0.0, 0.5, len(labels)))).astype(np.int64)
+
+
+def _row_ids(rng, rows):
+    """Row ids in the format of helpers.new_row_id, but drawn from rng so they repeat with the seed."""
+    return [f"{value:016x}" for value in rng.integers(0, 1 << 64, rows, dtype=np.uint64, endpoint=False).tolist()]
+
+
+def make_incomes(rows, seed=0, end=None, months=12, skew=1.0, weights=None):
+    """Income rows (dicts with INCOME_FIELDS, amount_paisa as int), oldest first."""
+    rng = np.random.default_rng([seed, 1])
+    end = end or date.today()
+    labels = rng.choice(len(INCOME_SOURCES), rows, p=distribution(INCOME_SOURCES, skew, weights))
+    dates = _dates(rng, rows, end, months)
+    amounts = _amounts(rng, labels, INCOME_SOURCES)
+    notes = rng.integers(0, len(DESCRIPTIONS), rows)
+    row_ids = _row_ids(rng, rows)
+    order = np.argsort(dates, kind='stable')
+    return [
+        {'date': str(dates[i]), 'source': INCOME_SOURCES[labels[i]],
+         'amount_paisa': int(amounts[i]), 'description': DESCRIPTIONS[notes[i]], 'row_id': row_ids[i]}
+        for i in order
+    ]
+
+
+def make_expenses(rows, seed=0, end=None, months=12, fixed_share=0.2, skew=1.0, weights=None):
+    """Expense rows (dicts with EXPENSE_FIELDS, amount_paisa as int), oldest first."""
+    rng = np.random.default_rng([seed, 2])
+    end = end or date.today()
+    is_fixed = rng.random(rows) < fixed_share
+    fixed = rng.choice(len(FIXED_EXPENSE_CATEGORIES), rows,
+                       p=distribution(FIXED_EXPENSE_CATEGORIES, skew, weights))
+    variable = rng.choice(len(VARIABLE_EXPENSE_CATEGORIES), rows,
+                          p=distribution(VARIABLE_EXPENSE_CATEGORIES, skew, weights))
+    frequencies = rng.choice(len(EXPENSE_FREQUENCIES), rows,
+                             p=distribution(EXPENSE_FREQUENCIES, weights=FREQUENCY_WEIGHTS))
+    dates = _dates(rng, rows, end, months)
+    fixed_amounts = _amounts(rng, fixed, FIXED_EXPENSE_CATEGORIES)
+    variable_amounts = _amounts(rng, variable, VARIABLE_EXPENSE_CATEGORIES)
+    notes = rng.integers(0, len(DESCRIPTIONS), rows)
+    row_ids = _row_ids(rng, rows)
+    order = np.argsort(dates, kind='stable')
+    expenses = []
+    for i in order:
+        if is_fixed[i]:
+            expenses.append({'date': str(dates[i]), 'type': 'Fixed', 'category': FIXED_EXPENSE_CATEGORIES[fixed[i]],
+                             'amount_paisa': int(fixed_amounts[i]), 'description': DESCRIPTIONS[notes[i]],
+                             'frequency': EXPENSE_FREQUENCIES[frequencies[i]], 'row_id': row_ids[i]})
+        else:
+            # Variable expenses are always one-time, as add_variable_expense saves them
+            expenses.append({'date': str(dates[i]), 'type': 'Variable',
+                             'category': VARIABLE_EXPENSE_CATEGORIES[variable[i]],
+                             'amount_paisa': int(variable_amounts[i]), 'description': DESCRIPTIONS[notes[i]],
+                             'frequency': 'one-time', 'row_id': row_ids[i]})
+    return expenses
+
+
+def write_ledger(file_path, rows, fieldnames):
+    """Writes rows in the plain ledger format (header line, '|'-separated values)."""
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write('|'.join(fieldnames) + '\n')
+        f.writelines('|'.join(str(row[name]) for name in fieldnames) + '\n' for row in rows)
+
+
+def parse_weights(text):
+    """'Food=5,Rent=2' -> {'Food': 5.0, 'Rent': 2.0}."""
+    weights = {}
+    for item in filter(None, (text or '').split(',')):
+        name, _, value = item.partition('=')
+        weights[name.strip()] = float(value)
+    return weights
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--income-rows', type=int, default=1_000)
+    parser.add_argument('--expense-rows', type=int, default=10_000)
+    parser.add_argument('--months', type=int, default=12, help="History length")
+    parser.add_argument('--end', type=date.fromisoformat, help="Last date, YYYY-MM-DD (default today)")
+    parser.add_argument('--fixed-share', type=float, default=0.2, help="Share of expenses that are Fixed")
+    parser.add_argument('--skew', type=float, default=1.0, help="0 = every source / category equally often")
+    parser.add_argument('--weights', type=parse_weights, help="Relative weights by name, e.g. Food=5,Rent=2")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out-dir', default='database', help="Writes income.txt and expenses.txt here")
+    parser.add_argument('--force', action='store_true', help="Overwrite ledgers that already have rows")
+    args = parser.parse_args(argv)
+
+    paths = [os.path.join(args.out_dir, 'income.txt'), os.path.join(args.out_dir, 'expenses.txt')]
+    for path in paths:
+        if not args.force and os.path.exists(path) and os.path.getsize(path) > 0:
+            print(f"{path} already has data; use --force to overwrite it", file=sys.stderr)
+            return 1
+    os.makedirs(args.out_dir, exist_ok=True)
+    end = args.end or date.today()
+    write_ledger(paths[0], make_incomes(args.income_rows, args.seed, end, args.months, args.skew, args.weights),
+                 INCOME_FIELDS)
+    write_ledger(paths[1], make_expenses(args.expense_rows, args.seed, end, args.months, args.fixed_share,
+                                         args.skew, args.weights), EXPENSE_FIELDS)
+    print(f"wrote {args.income_rows:,} incomes to {paths[0]} and {args.expense_rows:,} expenses to {paths[1]}"
+          f" ({end - timedelta(days=max(1, args.months * 30) - 1)} .. {end})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Cashflow summaries for every tenant, computed in parallel.
+
+Discovers the tenants under config.TENANT_ROOT (see utils.tenants), splits
+them into chunks of --chunk-size and runs get_analytics_summary on each chunk
+in a process pool of --workers. Summaries are written as NDJSON, one object
+per tenant (user_id plus the summary keys, money in paisa), in discovery
+order. Throughput and the count per stress level go to stderr as JSON.
+
+Run from the project root:
+    python -m features.analytics.batch --workers 8 --out summaries.ndjson
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from utils import config, storage, tenants
+from features.analytics.cashflow_analysis import get_analytics_summary
+
+CHUNK_SIZE = 500
+
+
+def summarize_chunk(task):
+    """Worker: (tenant root, user ids) -> [(user id, summary), ...]."""
+    root, user_ids = task
+    # Set here too in case the pool spawns instead of forking
+    config.TENANT_ROOT = root
+    results = []
+    for user_id in user_ids:
+        tenant = tenants.Tenant(user_id)
+        results.append((user_id, get_analytics_summary(tenant=tenant)))
+        # Both ledgers share the tenant's database; don't keep 100k connections open
+        storage.release(tenant.income_file)
+    return results
+
+
+def chunks(items, size):
+    """Lists of up to `size` items, lazily."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_chunks(worker, tasks, workers):
+    """Yields worker(task) for each task in order: in this process if workers is 1, else on a process pool."""
+    if workers == 1:
+        yield from map(worker, tasks)
+        return
+    from concurrent.futures import ProcessPoolExecutor  # multiprocessing
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(worker, tasks)
+
+
+def run(workers=None, chunk_size=CHUNK_SIZE, out=None):
+    """
+    Summarizes every tenant, writing NDJSON lines to `out` (a text file) if
+    given. workers=None uses one process per CPU, 1 runs in this process.
+    Returns a report: tenants, seconds, tenants_per_second, stress_levels.
+    """
+    start = time.perf_counter()
+    tasks = ((config.TENANT_ROOT, chunk) for chunk in chunks(tenants.iter_user_ids(), chunk_size))
+    count = 0
+    stress_levels = {}
+    for results in run_chunks(summarize_chunk, tasks, workers):
+        for user_id, summary in results:
+            count += 1
+            stress_levels[summary['stress_level']] = stress_levels.get(summary['stress_level'], 0) + 1
+            if out is not None:
+                out.write(json.dumps({'user_id': user_id, **summary}) + '\n')
+    seconds = time.perf_counter() - start
+    return {
+        'tenants': count,
+        'seconds': round(seconds, 3),
+        'tenants_per_second': round(count / seconds, 1) if seconds else None,
+        'stress_levels': stress_levels,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes (1 = no pool)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Tenants per worker task")
+    parser.add_argument('--root', help=f"Tenant directory (default {config.TENANT_ROOT})")
+    parser.add_argument('--out', help="NDJSON output file (default stdout)")
+    args = parser.parse_args(argv)
+    if args.root:
+        config.TENANT_ROOT = args.root
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as out:
+            report = run(args.workers, args.chunk_size, out)
+    else:
+        report = run(args.workers, args.chunk_size, sys.stdout)
+    print(json.dumps(report), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
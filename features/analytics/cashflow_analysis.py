@@ -1,6 +1,8 @@
-from utils.helpers import load_data
 from datetime import datetime
-import calendar
+
+from utils import instrument, partitions, storage
+from utils.storage import load_data, iter_batches, load_columns
+from features.analytics import engine
 from rich.console import Console
 from rich.text import Text
 
@@ -8,69 +10,123 @@ INCOME_FILE = 'database/income.txt'
 EXPENSE_FILE = 'database/expenses.txt'
 console = Console()
 
+@instrument.timed('analytics.safe_balance', measure=lambda result, income, expense: (len(income) + len(expense), 0))
 def calculate_safe_balance(income_data, expense_data):
-    total_income = sum(float(inc['amount']) for inc in income_data)
-    total_fixed = sum(float(exp['amount']) for exp in expense_data if exp['type'].lower() == 'fixed')
+    """Total income, total fixed expenses and safe balance, all in paisa."""
+    expense_paisa, is_fixed, _ = engine.parse_expenses(expense_data)
+    total_income = int(engine.parse_incomes(income_data).sum())
+    total_fixed = int(expense_paisa[is_fixed].sum())
     safe_balance = total_income - total_fixed
     return total_income, total_fixed, safe_balance
 
+@instrument.timed('analytics.daily_burn', measure=lambda result, expense: (len(expense), 0))
 def calculate_daily_burn(expense_data):
-    total_variable = sum(float(exp['amount']) for exp in expense_data if exp['type'].lower() == 'variable')
-    today = datetime.now()
-    days_in_month = calendar.monthrange(today.year, today.month)[1]
-    remaining_days = days_in_month - today.day + 1
+    """Daily burn in paisa (rounded) and the remaining days in the month."""
+    expense_paisa, _, is_variable = engine.parse_expenses(expense_data)
+    total_variable = int(expense_paisa[is_variable].sum())
+    remaining_days = engine.remaining_days_in_month()
     if remaining_days <= 0:
         return total_variable, remaining_days
-    return total_variable / remaining_days, remaining_days
+    return round(total_variable / remaining_days), remaining_days
 
-def determine_stress_level(remaining_days):
-    if remaining_days >= 10:
-        return "Low"
-    elif remaining_days >= 5:
-        return "Medium"
+def ledger_files(tenant=None):
+    """(income, expense) ledger paths: a utils.tenants.Tenant's, or the default household's."""
+    if tenant is None:
+        return INCOME_FILE, EXPENSE_FILE
+    return tenant.income_file, tenant.expense_file
+
+@instrument.timed('analytics.month_daily_burn')
+def month_daily_burn(today=None, tenant=None):
+    """
+    Daily burn in paisa for the current month only, and the remaining days.
+    Partitioned ledgers answer from the manifest without opening a partition;
+    other backends read just this month's Variable rows.
+    """
+    today = today or datetime.now()
+    _, expense_file = ledger_files(tenant)
+    month = today.strftime('%Y-%m')
+    if storage.use_partitions():
+        entry = partitions.month_totals(expense_file, month, month).get(month, {'by_type': {}})
+        total_variable = sum(v for k, v in entry['by_type'].items() if k.lower() == 'variable')
     else:
-        return "High"
+        rows = storage.iter_rows(expense_file, date_from=f"{month}-01", date_to=f"{month}-31", type='Variable')
+        total_variable = sum(int(row['amount_paisa']) for row in rows)
+    remaining_days = engine.remaining_days_in_month(today)
+    if remaining_days <= 0:
+        return total_variable, remaining_days
+    return round(total_variable / remaining_days), remaining_days
 
-def get_analytics_summary(session_incomes=None, session_expenses=None):
-    """Generate cashflow summary. Uses session data if provided, else reads files."""
-    
-    income_data = session_incomes if session_incomes is not None else load_data(INCOME_FILE)
-    expense_data = session_expenses if session_expenses is not None else load_data(EXPENSE_FILE)
+def determine_stress_level(remaining_days):
+    return engine.classify_stress(remaining_days)
 
-    total_income, total_fixed, safe_balance = calculate_safe_balance(income_data, expense_data)
-    daily_burn, remaining_days_in_month = calculate_daily_burn(expense_data)
+@instrument.timed('analytics.summary')
+def get_analytics_summary(session_incomes=None, session_expenses=None, tenant=None):
+    """
+    Generate cashflow summary. Uses session data if provided, else reads files:
+    the tenant's ledgers if given (see utils.tenants), the default ones otherwise.
+    Money values are returned as integer paisa. Only the default household's
+    summary is printed.
+    """
+    income_file, expense_file = ledger_files(tenant)
 
-    if daily_burn > 0:
-        remaining_days_balance = safe_balance / daily_burn
-    else:
-        remaining_days_balance = remaining_days_in_month
+    income_ledger = expense_ledger = None
+    if session_incomes is None and session_expenses is None:
+        # Prefer up-to-date binary ledgers; they skip CSV parsing entirely
+        income_ledger = load_columns(income_file)
+        expense_ledger = load_columns(expense_file)
 
-    remaining_days_balance = min(remaining_days_balance, remaining_days_in_month)
-    stress_level = determine_stress_level(remaining_days_balance)
+    if income_ledger is not None and expense_ledger is not None:
+        summary = engine.summarize_columns(income_ledger, expense_ledger)
+    elif session_incomes is None and session_expenses is None and storage.use_sqlite():
+        # SQLite answers the totals with aggregate queries instead of reading every row
+        from utils import sqlite_store
+        by_type = {}
+        for expense_type, total in sqlite_store.period_totals(
+                sqlite_store.table_for(expense_file), group_by='type', db_path=storage.sqlite_file(expense_file)).items():
+            by_type[expense_type.lower()] = by_type.get(expense_type.lower(), 0) + total
+        total_income = sqlite_store.period_totals(sqlite_store.table_for(income_file), db_path=storage.sqlite_file(income_file))
+        summary = engine.summarize_totals(total_income, by_type.get('fixed', 0), by_type.get('variable', 0))
+    elif session_incomes is None and session_expenses is None and storage.use_partitions():
+        # Month partitions keep their totals in the manifest; no data file is opened
+        total_income = sum(e['total_paisa'] for e in partitions.month_totals(income_file).values())
+        by_type = {}
+        for entry in partitions.month_totals(expense_file).values():
+            for expense_type, total in entry['by_type'].items():
+                by_type[expense_type.lower()] = by_type.get(expense_type.lower(), 0) + total
+        summary = engine.summarize_totals(total_income, by_type.get('fixed', 0), by_type.get('variable', 0))
+    elif session_incomes is None and session_expenses is None and tenant is not None:
+        # Tenant ledgers are small and read again by every batch or report run, so they go through the LRU
+        from utils import tenants
+        summary = engine.summarize_records(*tenants.load_ledgers(tenant))
+    elif session_incomes is None and session_expenses is None:
+        # Stream the text ledgers in batches so memory stays flat on huge files
+        summary = engine.summarize_batches(iter_batches(income_file), iter_batches(expense_file))
+    else:
+        income_data = session_incomes if session_incomes is not None else load_data(income_file)
+        expense_data = session_expenses if session_expenses is not None else load_data(expense_file)
+        summary = engine.summarize_records(income_data, expense_data)
 
-    variable_expenses_total = sum(float(exp['amount']) for exp in expense_data if exp['type'].lower() == 'variable')
+    total_income = summary['total_income']
+    total_fixed = summary['total_fixed']
+    variable_expenses_total = summary['variable_expenses']
+    safe_balance = summary['safe_balance']
+    daily_burn = summary['daily_burn']
+    remaining_days_balance = summary['remaining_days_balance']
+    stress_level = summary['stress_level']
 
     # Optional: print summary to console (keep for terminal)
-    if session_incomes is None and session_expenses is None:
+    if session_incomes is None and session_expenses is None and tenant is None:
         summary_text = Text()
         summary_text.append(f"Cashflow Analysis Summary\n", style="bold underline")
-        summary_text.append(f"Total Income: ₹{total_income:,.2f}\n", style="green")
-        summary_text.append(f"Fixed Expenses: ₹{total_fixed:,.2f}\n", style="red")
-        summary_text.append(f"Variable Expenses (monthly): ₹{variable_expenses_total:,.2f}\n", style="yellow")
-        summary_text.append(f"Safe Balance: ₹{safe_balance:,.2f}\n", style="bold green")
-        summary_text.append(f"Daily Burn (Variable Expenses): ₹{daily_burn:,.2f}\n", style="yellow")
+        summary_text.append(f"Total Income: ₹{total_income / 100:,.2f}\n", style="green")
+        summary_text.append(f"Fixed Expenses: ₹{total_fixed / 100:,.2f}\n", style="red")
+        summary_text.append(f"Variable Expenses (monthly): ₹{variable_expenses_total / 100:,.2f}\n", style="yellow")
+        summary_text.append(f"Safe Balance: ₹{safe_balance / 100:,.2f}\n", style="bold green")
+        summary_text.append(f"Daily Burn (Variable Expenses): ₹{daily_burn / 100:,.2f}\n", style="yellow")
         summary_text.append(f"Remaining Days Balance Can Last: {remaining_days_balance:.1f} days\n", style="bold blue")
         summary_text.append(f"Stress Level: {stress_level}\n", style="bold magenta")
         if remaining_days_balance < 7:
             summary_text.append(f"\n[bold red]Warning: Your safe balance may run out in {remaining_days_balance:.1f} days![/bold red]\n")
         console.print(summary_text)
 
-    return {
-        'total_income': total_income,
-        'total_fixed': total_fixed,
-        'variable_expenses': variable_expenses_total,
-        'safe_balance': safe_balance,
-        'daily_burn': daily_burn,
-        'remaining_days_balance': remaining_days_balance,
-        'stress_level': stress_level
-    }
+    return summary
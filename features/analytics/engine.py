@@ -0,0 +1,161 @@
+"""
+NumPy-backed analytics engine.
+
+Ledgers are parsed once into flat arrays (amounts in paisa plus boolean type
+masks) and every metric in the cashflow summary is computed from those arrays
+with reductions. cashflow_analysis.py keeps the dict-list API as a thin
+adapter over these functions.
+"""
+import calendar
+from datetime import datetime
+
+import numpy as np
+
+from utils import instrument
+
+STRESS_LOW_DAYS = 10
+STRESS_MEDIUM_DAYS = 5
+
+
+def parse_paisa(amounts):
+    """Parses a sequence of paisa amounts (strings or ints) into an int64 array."""
+    return np.fromiter(map(int, amounts), dtype=np.int64, count=len(amounts))
+
+
+def type_mask(types, value):
+    """Case-insensitive equality mask over a list of type labels."""
+    # Lower-case each distinct label once instead of once per row
+    matching = {label for label in set(types) if label.lower() == value}
+    return np.fromiter(map(matching.__contains__, types), dtype=bool, count=len(types))
+
+
+def parse_incomes(income_data):
+    """Income amounts in paisa for a list of income dicts."""
+    return parse_paisa([inc['amount_paisa'] for inc in income_data])
+
+
+def parse_expenses(expense_data):
+    """Returns (amounts in paisa, fixed mask, variable mask) for a list of expense dicts."""
+    amounts = parse_paisa([exp['amount_paisa'] for exp in expense_data])
+    types = [exp['type'] for exp in expense_data]
+    return amounts, type_mask(types, 'fixed'), type_mask(types, 'variable')
+
+
+def remaining_days_in_month(today=None):
+    today = today or datetime.now()
+    days_in_month = calendar.monthrange(today.year, today.month)[1]
+    return days_in_month - today.day + 1
+
+
+def classify_stress(remaining_days):
+    """Maps remaining days (scalar or array) to 'Low' / 'Medium' / 'High'."""
+    days = np.asarray(remaining_days)
+    levels = np.select([days >= STRESS_LOW_DAYS, days >= STRESS_MEDIUM_DAYS], ['Low', 'Medium'], 'High')
+    return levels.item() if levels.ndim == 0 else levels
+
+
+def summarize(income_paisa, expense_paisa, is_fixed, is_variable, today=None):
+    """Computes the full cashflow summary from parsed arrays with exact integer sums."""
+    return summarize_totals(
+        int(income_paisa.sum()),
+        int(expense_paisa[is_fixed].sum()),
+        int(expense_paisa[is_variable].sum()),
+        today
+    )
+
+
+def summarize_totals(income_paisa, fixed_paisa, variable_paisa, today=None):
+    """
+    Derives the cashflow summary from the three paisa totals.
+    Money values in the result are integer paisa; remaining_days_balance is in days.
+    """
+    safe_balance = income_paisa - fixed_paisa
+
+    remaining_days = remaining_days_in_month(today)
+    if remaining_days <= 0:
+        daily_burn = variable_paisa
+    else:
+        daily_burn = round(variable_paisa / remaining_days)
+
+    if variable_paisa > 0:
+        # safe_balance / (variable / remaining_days), without the rounded daily_burn
+        remaining_days_balance = safe_balance * max(remaining_days, 1) / variable_paisa
+    else:
+        remaining_days_balance = remaining_days
+    remaining_days_balance = min(remaining_days_balance, remaining_days)
+
+    return {
+        'total_income': income_paisa,
+        'total_fixed': fixed_paisa,
+        'variable_expenses': variable_paisa,
+        'safe_balance': safe_balance,
+        'daily_burn': daily_burn,
+        'remaining_days_balance': remaining_days_balance,
+        'stress_level': classify_stress(remaining_days_balance)
+    }
+
+
+def summarize_totals_many(income_paisa, fixed_paisa, variable_paisa, today=None):
+    """
+    summarize_totals over int64 arrays of totals, one element per ledger.
+    Returns a dict with the same keys, each an array.
+    """
+    safe_balance = income_paisa - fixed_paisa
+
+    remaining_days = remaining_days_in_month(today)
+    if remaining_days <= 0:
+        daily_burn = variable_paisa.copy()
+    else:
+        # np.round rounds half to even, like round() in summarize_totals
+        daily_burn = np.round(variable_paisa / remaining_days).astype(np.int64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        remaining_days_balance = np.where(
+            variable_paisa > 0, safe_balance * max(remaining_days, 1) / variable_paisa, remaining_days
+        )
+    remaining_days_balance = np.minimum(remaining_days_balance, remaining_days)
+
+    return {
+        'total_income': income_paisa,
+        'total_fixed': fixed_paisa,
+        'variable_expenses': variable_paisa,
+        'safe_balance': safe_balance,
+        'daily_burn': daily_burn,
+        'remaining_days_balance': remaining_days_balance,
+        'stress_level': classify_stress(remaining_days_balance)
+    }
+
+
+def summarize_records(income_data, expense_data, today=None):
+    """One-pass summary for dict lists as returned by load_data."""
+    expense_paisa, is_fixed, is_variable = parse_expenses(expense_data)
+    return summarize(parse_incomes(income_data), expense_paisa, is_fixed, is_variable, today)
+
+
+def summarize_batches(income_batches, expense_batches, today=None):
+    """
+    Summary over streamed batches of rows (see utils.helpers.iter_batches).
+    Only one batch is held in memory at a time; the per-batch sums are exact
+    integers, so adding them up gives the same result as a single pass.
+    """
+    income_paisa = fixed_paisa = variable_paisa = 0
+    for batch in income_batches:
+        instrument.count('analytics.summary', rows=len(batch))
+        income_paisa += int(parse_incomes(batch).sum())
+    for batch in expense_batches:
+        instrument.count('analytics.summary', rows=len(batch))
+        amounts, is_fixed, is_variable = parse_expenses(batch)
+        fixed_paisa += int(amounts[is_fixed].sum())
+        variable_paisa += int(amounts[is_variable].sum())
+    return summarize_totals(income_paisa, fixed_paisa, variable_paisa, today)
+
+
+def summarize_columns(income_ledger, expense_ledger, today=None):
+    """Summary straight from memory-mapped ColumnarLedger objects."""
+    return summarize(
+        income_ledger.columns['amount_paisa'],
+        expense_ledger.columns['amount_paisa'],
+        expense_ledger.mask('type', 'fixed'),
+        expense_ledger.mask('type', 'variable'),
+        today
+    )
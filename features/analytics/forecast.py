@@ -0,0 +1,199 @@
+"""
+Day-by-day cashflow projection, 12-24 months ahead.
+
+Expenses recur by their `frequency`: 'monthly' on the same day of the month
+(clamped to the last day of shorter months), 'weekly' every 7 days, 'one-time'
+never. Income rows have no frequency column, so a row's own 'frequency' is used
+if it has one and INCOME_FREQUENCIES by source otherwise. Repeated entries of
+one recurring item (same kind, label, amount and frequency) are a single series
+anchored at the latest entry, so entering the rent every month doesn't double
+it. Variable spending is projected as the average daily spend over the last
+BURN_WINDOW_DAYS.
+
+build_schedule() reduces the ledgers to flat arrays once; project() expands them
+over the horizon with vectorized date arithmetic (no loop per day or per item),
+so it is cheap enough to rerun on every Streamlit interaction.
+"""
+import numpy as np
+
+from utils import instrument
+from features.analytics import engine
+
+ONE_TIME, WEEKLY, MONTHLY = 0, 1, 2
+FREQUENCY_CODES = {'one-time': ONE_TIME, 'weekly': WEEKLY, 'monthly': MONTHLY}
+INCOME_FREQUENCIES = {'Salary': 'monthly', 'Part-time': 'monthly', 'Scholarship': 'monthly'}
+BURN_WINDOW_DAYS = 90
+
+
+@instrument.timed('forecast.schedule', measure=lambda result, income, expense, start: (len(income) + len(expense), 0))
+def build_schedule(income_data, expense_data, start):
+    """
+    Reduces ledger rows to what project() needs, as of the day `start`:
+        opening_balance  income minus expenses dated up to and including start
+        daily_burn       average daily Variable spend over the burn window
+        anchors, amounts, frequencies
+                         one entry per recurring series and per future-dated
+                         one-off; amounts are signed paisa (expenses negative)
+    """
+    start = np.datetime64(start, 'D')
+    today = str(start)
+    burn_from = str(start - BURN_WINDOW_DAYS + 1)
+    opening_balance = 0
+    variable_spent = 0
+    earliest_variable = today
+    series = {}  # (kind, label, amount, frequency) -> latest date
+    future = []  # (date, signed amount, frequency code, series key)
+
+    entries = [
+        (row, 1, ('income', row['source'], row.get('frequency') or INCOME_FREQUENCIES.get(row['source'], 'one-time')))
+        for row in income_data
+    ] + [
+        (row, -1, (row['type'].lower(), row['category'], row.get('frequency') or 'one-time'))
+        for row in expense_data
+    ]
+    for row, sign, (kind, label, frequency) in entries:
+        amount = int(row['amount_paisa']) * sign
+        date = row['date']
+        code = FREQUENCY_CODES.get(frequency.lower(), ONE_TIME)
+        key = (kind, label, amount, code) if code != ONE_TIME else None
+        if key is not None and date > series.get(key, ''):
+            series[key] = date
+        if date <= today:
+            opening_balance += amount
+            if kind == 'variable' and date >= burn_from:
+                variable_spent -= amount
+                earliest_variable = min(earliest_variable, date)
+        else:
+            future.append((date, amount, code, key))
+
+    anchors = [date for date in series.values()]
+    amounts = [key[2] for key in series]
+    frequencies = [key[3] for key in series]
+    for date, amount, code, key in future:
+        # Future entries of a series are covered by its occurrences from the
+        # anchor on; any earlier ones still happen once
+        if key is None or date < series[key]:
+            anchors.append(date)
+            amounts.append(amount)
+            frequencies.append(ONE_TIME)
+
+    burn_days = int((start - np.datetime64(earliest_variable, 'D')).astype(int)) + 1
+    return {
+        'start': start,
+        'opening_balance': opening_balance,
+        'daily_burn': round(variable_spent / burn_days) if variable_spent else 0,
+        'anchors': np.array(anchors, dtype='datetime64[D]'),
+        'amounts': np.array(amounts, dtype=np.int64),
+        'frequencies': np.array(frequencies, dtype=np.int8),
+    }
+
+
+def _scatter(flows, days, amounts):
+    """Adds signed amounts into flows[0] (income) / flows[1] (expenses) at day indexes."""
+    np.add.at(flows, ((amounts < 0).astype(np.intp), days), np.abs(amounts))
+
+
+@instrument.timed('forecast.project')
+def project(schedule, months=12):
+    """
+    Expands a schedule over the rest of this month plus `months` full months.
+    Returns a dict with:
+        dates                 datetime64[D] array, the day after start onwards
+        income, expenses      paisa flowing in / out on each day (int64)
+        balance               running balance at the end of each day (int64)
+        opening_balance, daily_burn
+        first_negative        first YYYY-MM-DD the balance is below zero, or None
+        months                one dict per month: month, income, expenses,
+                              closing_balance, lowest_balance, stress_level
+    """
+    start = schedule['start']
+    first = start + 1
+    end = (start.astype('datetime64[M]') + months + 1).astype('datetime64[D]') - 1
+    days = int((end - start).astype(int))
+    anchors, amounts, frequencies = schedule['anchors'], schedule['amounts'], schedule['frequencies']
+    flows = np.zeros((2, days), dtype=np.int64)
+
+    once = (frequencies == ONE_TIME) & (anchors >= first) & (anchors <= end)
+    _scatter(flows, (anchors[once] - first).astype(np.intp), amounts[once])
+
+    # Weekly: seed the first occurrence after start, then carry it forward with
+    # a cumulative sum over a (weeks, 7) view
+    weekly = frequencies == WEEKLY
+    offsets = (first - anchors[weekly]).astype(np.int64)
+    skip_weeks = np.maximum(0, -(-offsets // 7))
+    first_index = (anchors[weekly] + skip_weeks * 7 - first).astype(np.intp)
+    in_range = first_index < days
+    weeks = np.zeros((2, days + (-days) % 7), dtype=np.int64)
+    _scatter(weeks, first_index[in_range], amounts[weekly][in_range])
+    flows += weeks.reshape(2, -1, 7).cumsum(axis=1).reshape(2, -1)[:, :days]
+
+    # Monthly: one candidate date per series per month, day of month clamped
+    monthly = frequencies == MONTHLY
+    month_starts = (start.astype('datetime64[M]') + np.arange(months + 1)).astype('datetime64[D]')
+    month_lengths = ((month_starts.astype('datetime64[M]') + 1).astype('datetime64[D]') - month_starts).astype(np.int64)
+    monthly_anchors = anchors[monthly]
+    day_of_month = (monthly_anchors - monthly_anchors.astype('datetime64[M]').astype('datetime64[D]')).astype(np.int64)
+    dates = month_starts[None, :] + np.minimum(day_of_month[:, None], month_lengths[None, :] - 1)
+    valid = (dates >= monthly_anchors[:, None]) & (dates >= first) & (dates <= end)
+    _scatter(
+        flows, (dates[valid] - first).astype(np.intp),
+        np.broadcast_to(amounts[monthly][:, None], dates.shape)[valid]
+    )
+
+    flows[1] += schedule['daily_burn']
+    income, expenses = flows
+    balance = schedule['opening_balance'] + np.cumsum(income - expenses)
+    day_dates = first + np.arange(days)
+
+    negative = np.flatnonzero(balance < 0)
+    if schedule['opening_balance'] < 0:
+        first_negative = str(start)
+    elif negative.size:
+        first_negative = str(day_dates[negative[0]])
+    else:
+        first_negative = None
+
+    return {
+        'dates': day_dates,
+        'income': income,
+        'expenses': expenses,
+        'balance': balance,
+        'opening_balance': schedule['opening_balance'],
+        'daily_burn': schedule['daily_burn'],
+        'first_negative': first_negative,
+        'months': monthly_summary(day_dates, income, expenses, balance),
+    }
+
+
+def monthly_summary(dates, income, expenses, balance):
+    """
+    Per-month totals and stress. Stress uses the same day thresholds as the
+    summary: how many days of that month's average spending the month's lowest
+    balance covers.
+    """
+    month_index = dates.astype('datetime64[M]')
+    starts = np.flatnonzero(np.r_[True, month_index[1:] != month_index[:-1]])
+    ends = np.r_[starts[1:], len(dates)] - 1
+    month_income = np.add.reduceat(income, starts)
+    month_expenses = np.add.reduceat(expenses, starts)
+    lowest = np.minimum.reduceat(balance, starts)
+    lengths = ends - starts + 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cover = np.where(month_expenses > 0, lowest * lengths / np.maximum(month_expenses, 1), lengths)
+    levels = engine.classify_stress(cover)
+    return [
+        {
+            'month': str(month_index[s]),
+            'income': int(month_income[i]),
+            'expenses': int(month_expenses[i]),
+            'closing_balance': int(balance[e]),
+            'lowest_balance': int(lowest[i]),
+            'stress_level': str(levels[i]),
+        }
+        for i, (s, e) in enumerate(zip(starts, ends))
+    ]
+
+
+def forecast(income_data, expense_data, start, months=12):
+    """build_schedule + project in one call."""
+    return project(build_schedule(income_data, expense_data, start), months)
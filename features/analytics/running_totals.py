@@ -0,0 +1,217 @@
+"""
+Incremental running totals for the cashflow summary.
+
+RunningTotals keeps total income, fixed and variable expense totals plus
+per-category, per-type and per-day expense buckets and, for each month, the
+per-category buckets features.budgets checks limits against (all in paisa).
+Writers apply each add/update/delete as an O(1) delta, and the state is
+persisted to database/totals.json together with the size and mtime of both
+ledgers so a cold start can trust it without rescanning. If either ledger was
+changed by something that did not update the totals, they are rebuilt from
+the files.
+
+Writers go through updating(), which holds database/totals.json.lock (one lock
+for both ledgers, since they share the totals) from reading the totals until
+they are saved, so two writers never both start from the same totals.
+"""
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+from utils import instrument
+from utils.helpers import ledger_lock
+from utils.storage import iter_rows, ledger_stamp
+
+# Same paths as features.analytics.cashflow_analysis; not imported from there
+# so the CLI can import this module and apply deltas without loading the
+# analytics stack. summary() imports the engine, and so NumPy, when called.
+INCOME_FILE = 'database/income.txt'
+EXPENSE_FILE = 'database/expenses.txt'
+TOTALS_FILE = 'database/totals.json'
+
+_cache = {}
+
+
+class RunningTotals:
+    def __init__(self, income_file=INCOME_FILE, expense_file=EXPENSE_FILE, totals_file=TOTALS_FILE):
+        self.income_file = income_file
+        self.expense_file = expense_file
+        self.totals_file = totals_file
+        self.total_income = 0
+        self.total_fixed = 0
+        self.total_variable = 0
+        self.by_category = {}
+        self.by_type = {}
+        self.by_day = {}
+        self.by_month_category = {}  # 'YYYY-MM' -> {category: paisa}
+        self.stamps = {}
+
+    # --- Deltas ---
+    def add_income(self, entry, sign=1):
+        self.total_income += sign * int(entry['amount_paisa'])
+
+    def remove_income(self, entry):
+        self.add_income(entry, sign=-1)
+
+    def update_income(self, old_entry, new_entry):
+        self.remove_income(old_entry)
+        self.add_income(new_entry)
+
+    def add_expense(self, entry, sign=1):
+        amount = sign * int(entry['amount_paisa'])
+        expense_type = entry['type'].lower()
+        if expense_type == 'fixed':
+            self.total_fixed += amount
+        elif expense_type == 'variable':
+            self.total_variable += amount
+        _bump(self.by_category, entry['category'], amount)
+        _bump(self.by_type, entry['type'], amount)
+        _bump(self.by_day, entry['date'], amount)
+        month = entry['date'][:7]
+        spent = self.by_month_category.setdefault(month, {})
+        _bump(spent, entry['category'], amount)
+        if not spent:
+            del self.by_month_category[month]
+
+    def remove_expense(self, entry):
+        self.add_expense(entry, sign=-1)
+
+    def update_expense(self, old_entry, new_entry):
+        self.remove_expense(old_entry)
+        self.add_expense(new_entry)
+
+    # --- Reads ---
+    def month_spend(self, month):
+        """{category: paisa} spent in a month ('YYYY-MM')."""
+        return self.by_month_category.get(month, {})
+
+    def summary(self, today=None):
+        """Same dictionary as get_analytics_summary, computed from the running totals."""
+        from features.analytics import engine
+        return engine.summarize_totals(self.total_income, self.total_fixed, self.total_variable, today)
+
+    # --- Persistence ---
+    def current_stamps(self):
+        return {path: ledger_stamp(path) for path in (self.income_file, self.expense_file)}
+
+    def is_current(self):
+        """True if neither ledger has changed since the totals were last saved."""
+        return self.stamps == self.current_stamps()
+
+    def rebuild(self):
+        """
+        Recomputes every total with a full scan of both ledgers, and stamps
+        them with the ledgers as scanned (rescanning if one changed meanwhile).
+        """
+        while True:
+            stamps = self.current_stamps()
+            self.total_income = self.total_fixed = self.total_variable = 0
+            self.by_category, self.by_type, self.by_day, self.by_month_category = {}, {}, {}, {}
+            for entry in iter_rows(self.income_file):
+                self.add_income(entry)
+            for entry in iter_rows(self.expense_file):
+                self.add_expense(entry)
+            if self.current_stamps() == stamps:
+                self.stamps = stamps
+                return
+
+    def save(self):
+        """Persists the totals, stamped with the ledgers' current size and mtime."""
+        self.stamps = self.current_stamps()
+        self._dump()
+
+    def _dump(self):
+        state = {
+            'stamps': self.stamps,
+            'total_income': self.total_income,
+            'total_fixed': self.total_fixed,
+            'total_variable': self.total_variable,
+            'by_category': self.by_category,
+            'by_type': self.by_type,
+            'by_day': self.by_day,
+            'by_month_category': self.by_month_category,
+        }
+        # A temp file of its own, so a reader rebuilding the totals never shares one with a writer
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(self.totals_file) + '.', suffix='.tmp', dir=os.path.dirname(self.totals_file) or '.'
+        )
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.totals_file)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def load(self):
+        """Loads persisted state; returns False if there is none."""
+        if not os.path.exists(self.totals_file):
+            return False
+        try:
+            with open(self.totals_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if 'by_month_category' not in state:
+            # Saved before the month buckets existed; rebuild once
+            return False
+        # JSON turns the stamp tuples into lists
+        self.stamps = {path: tuple(stamp) if stamp else None for path, stamp in state['stamps'].items()}
+        self.total_income = state['total_income']
+        self.total_fixed = state['total_fixed']
+        self.total_variable = state['total_variable']
+        self.by_category = state['by_category']
+        self.by_type = state['by_type']
+        self.by_day = state['by_day']
+        self.by_month_category = state['by_month_category']
+        return True
+
+
+@instrument.timed('running_totals.load')
+def get_running_totals(income_file=INCOME_FILE, expense_file=EXPENSE_FILE, totals_file=TOTALS_FILE):
+    """
+    Returns running totals that match the ledgers on disk.
+    Uses the in-process copy or database/totals.json when they are current,
+    and only falls back to a full rescan when a ledger changed behind their back.
+    To write a ledger, use updating() instead.
+    """
+    totals = _cache.get(totals_file)
+    if totals is not None and totals.is_current():
+        return totals
+
+    totals = RunningTotals(income_file, expense_file, totals_file)
+    if not (totals.load() and totals.is_current()):
+        with ledger_lock(totals_file):
+            # A writer may have saved current totals while this waited for the lock
+            if not (totals.load() and totals.is_current()):
+                totals.rebuild()
+                totals._dump()
+    _cache[totals_file] = totals
+    return totals
+
+
+@contextmanager
+def updating(income_file=INCOME_FILE, expense_file=EXPENSE_FILE, totals_file=TOTALS_FILE):
+    """
+    For a write to either ledger: holds the totals lock and yields running
+    totals that match the ledgers as they are under it. Write the ledger and
+    apply the delta inside the block; the totals are saved when it ends. If
+    it raises, nothing is saved and the in-process copy is dropped, so the
+    next read checks the stamps against the files again.
+    """
+    with ledger_lock(totals_file):
+        totals = get_running_totals(income_file, expense_file, totals_file)
+        try:
+            yield totals
+        except BaseException:
+            _cache.pop(totals_file, None)
+            raise
+        totals.save()
+
+
+def _bump(buckets, key, amount):
+    buckets[key] = buckets.get(key, 0) + amount
+    if buckets[key] == 0:
+        del buckets[key]
+
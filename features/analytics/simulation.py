@@ -0,0 +1,129 @@
+"""
+Monte Carlo runway simulation for the rest of the month.
+
+calculate_daily_burn spreads the variable total evenly over the remaining days.
+This instead fits each Variable category's daily spend over the last
+HISTORY_DAYS: the chance that anything is spent on a day, and a lognormal for
+how much on the days something is. It then simulates many spending paths for
+the rest of the month with NumPy. Every path starts from the cash on hand
+(income minus expenses dated up to today); its runway is the number of whole
+days before the balance goes negative, capped at the days left in the month.
+
+Paths run in chunks of CHUNK_PATHS, each with its own child of one
+SeedSequence, so a seed gives the same result whether the chunks run in this
+process or across a process pool of any size.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from utils import instrument
+from features.analytics import engine
+
+HISTORY_DAYS = 180
+CHUNK_PATHS = 10_000
+POOL_MIN_PATHS = 50_000  # below this, starting worker processes costs more than it saves
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def fit_categories(expense_data, today):
+    """
+    Per-category spend model from the Variable expenses of the last HISTORY_DAYS:
+    categories, spend_chance (share of days with any spend), mu / sigma of the
+    log daily spend on those days, and the number of days observed.
+    """
+    today = np.datetime64(today, 'D')
+    window = (str(today - HISTORY_DAYS + 1), str(today))
+    rows = [
+        (row['date'], row['category'], int(row['amount_paisa']))
+        for row in expense_data
+        if row['type'].lower() == 'variable' and window[0] <= row['date'] <= window[1] and int(row['amount_paisa']) > 0
+    ]
+    if not rows:
+        return {'categories': [], 'spend_chance': np.zeros(0), 'mu': np.zeros(0), 'sigma': np.zeros(0), 'days': 0}
+
+    dates, categories, amounts = zip(*rows)
+    days = np.array(dates, dtype='datetime64[D]')
+    first = days.min()
+    observed = int((today - first).astype(int)) + 1
+    labels, codes = np.unique(np.array(categories), return_inverse=True)
+    daily = np.zeros((len(labels), observed))
+    np.add.at(daily, (codes, (days - first).astype(np.intp)), amounts)
+
+    spent = daily > 0
+    spend_days = spent.sum(axis=1)
+    logs = np.log(np.where(spent, daily, 1.0))
+    mu = (logs * spent).sum(axis=1) / spend_days
+    sigma = np.sqrt((((logs - mu[:, None]) ** 2) * spent).sum(axis=1) / spend_days)
+    return {
+        'categories': [str(label) for label in labels],
+        'spend_chance': spend_days / observed,
+        'mu': mu,
+        'sigma': sigma,
+        'days': observed,
+    }
+
+
+def simulate_chunk(task):
+    """
+    Worker: runs one chunk of paths. task is (fit, balance, days, paths, seed);
+    returns (runway days, end-of-month balance) per path.
+    """
+    fit, balance, days, paths, seed = task
+    rng = np.random.default_rng(seed)
+    spend = np.zeros((paths, days))
+    for chance, mu, sigma in zip(fit['spend_chance'], fit['mu'], fit['sigma']):
+        spends = rng.random((paths, days)) < chance
+        spend += np.where(spends, rng.lognormal(mu, sigma, (paths, days)), 0.0)
+    remaining = balance - np.cumsum(spend, axis=1)
+    broke = remaining < 0
+    runway = np.where(broke.any(axis=1), broke.argmax(axis=1), days)
+    return runway.astype(np.int16), remaining[:, -1]
+
+
+def cash_on_hand(income_data, expense_data, today):
+    """Income minus expenses dated up to and including today, in paisa."""
+    today = str(np.datetime64(today, 'D'))
+    income = sum(int(row['amount_paisa']) for row in income_data if row['date'] <= today)
+    spent = sum(int(row['amount_paisa']) for row in expense_data if row['date'] <= today)
+    return income - spent
+
+
+@instrument.timed('simulation.simulate')
+def simulate(income_data, expense_data, today=None, paths=10_000, seed=0, workers=None, balance=None):
+    """
+    Simulates `paths` spending paths to the end of the month. Large runs (at
+    least POOL_MIN_PATHS) go to a process pool of `workers` processes (default:
+    CPU count; 1 = never). Returns a dict with the probability of running out,
+    runway percentiles in days, end-of-month balance percentiles in paisa, and
+    the stress level of the median runway.
+    """
+    today = today or datetime.now()
+    days = engine.remaining_days_in_month(today)
+    fit = fit_categories(expense_data, today)
+    if balance is None:
+        balance = cash_on_hand(income_data, expense_data, today)
+
+    sizes = [min(CHUNK_PATHS, paths - start) for start in range(0, paths, CHUNK_PATHS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(fit, balance, days, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+    if workers == 1 or paths < POOL_MIN_PATHS:
+        results = list(map(simulate_chunk, tasks))
+    else:
+        from concurrent.futures import ProcessPoolExecutor  # multiprocessing
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(simulate_chunk, tasks))
+    runway = np.concatenate([chunk_runway for chunk_runway, _ in results])
+    end_balance = np.concatenate([chunk_end for _, chunk_end in results])
+
+    return {
+        'paths': paths,
+        'seed': seed,
+        'days_left': days,
+        'balance': balance,
+        'categories': fit['categories'],
+        'probability_run_out': float((runway < days).mean()),
+        'runway_days': dict(zip(PERCENTILES, np.percentile(runway, PERCENTILES).tolist())),
+        'end_balance': dict(zip(PERCENTILES, np.round(np.percentile(end_balance, PERCENTILES)).astype(int).tolist())),
+        'stress_level': engine.classify_stress(float(np.median(runway))),
+    }
@@ -0,0 +1,202 @@
+"""
+Nightly stress report: every tenant ranked by how long their balance lasts.
+
+Discovers the tenants under config.TENANT_ROOT (see utils.tenants) and hands
+them to a process pool in chunks. Workers only read a tenant's ledgers when
+they changed since the last report:
+  - same ledger stamps (size, mtime) as last time  -> totals reused, nothing read
+  - stamps moved but the content digest is the same -> totals reused (touched)
+  - otherwise                                       -> totals recomputed
+The workers return three totals per tenant (income, fixed, variable). Every
+derived metric is then computed for all tenants at once with
+engine.summarize_totals_many, so a reused tenant is still scored for today.
+
+The result is one columnar file (utils.columnar.write_table), sorted most
+stressed first: user_id, stamp, digest, the summary keys, and stress_level as
+codes into the header's 'stress_levels'. The stamps and digests in it are the
+cache for the next run. load_report() reads it back.
+
+Run from the project root:
+    python -m features.analytics.stress_report --workers 8 --top 20
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from utils import columnar, config, storage, tenants
+from features.analytics import engine
+from features.analytics.batch import CHUNK_SIZE, chunks, run_chunks
+from features.analytics.cashflow_analysis import get_analytics_summary
+
+REPORT_NAME = 'stress_report.bin'
+STRESS_LEVELS = ['High', 'Medium', 'Low']
+UNCHANGED, TOUCHED, RECOMPUTED = 'unchanged', 'touched', 'recomputed'
+TOTAL_COLUMNS = ['total_income', 'total_fixed', 'variable_expenses']
+
+
+def report_path():
+    return os.path.join(config.TENANT_ROOT, REPORT_NAME)
+
+
+def _key(values, size):
+    return hashlib.blake2b(repr(values).encode('utf-8'), digest_size=size).digest()
+
+
+def scan_chunk(task):
+    """
+    Worker: (tenant root, [(user id, stamp, digest, totals or None), ...]) with
+    what the last report knew, -> [(user id, stamp, digest, totals, status), ...].
+    """
+    root, entries = task
+    # Set here too in case the pool spawns instead of forking
+    config.TENANT_ROOT = root
+    results = []
+    for user_id, old_stamp, old_digest, old_totals in entries:
+        tenant = tenants.Tenant(user_id)
+        paths = (tenant.income_file, tenant.expense_file)
+        # Stamp and digest are taken before the ledgers are read, so a write in
+        # between leaves them older than the totals and forces a recompute next time
+        stamp = _key([storage.ledger_stamp(path) for path in paths], 8)
+        if old_totals is not None and stamp == old_stamp:
+            results.append((user_id, stamp, old_digest, old_totals, UNCHANGED))
+            continue
+        digest = _key([storage.ledger_digest(path) for path in paths], 16)
+        if old_totals is not None and digest == old_digest:
+            results.append((user_id, stamp, digest, old_totals, TOUCHED))
+            continue
+        summary = get_analytics_summary(tenant=tenant)
+        storage.release(tenant.income_file)
+        results.append((user_id, stamp, digest, tuple(summary[name] for name in TOTAL_COLUMNS), RECOMPUTED))
+    return results
+
+
+def load_report(path=None):
+    """
+    The last report as a dict of columns (user_id and stress_level decoded to
+    lists of str) plus 'header', or None if there is none.
+    """
+    path = path or report_path()
+    try:
+        header, columns = columnar.read_table(path)
+    except (OSError, ValueError):
+        return None
+    report = {name: array for name, array in columns.items() if name not in ('user_id_offsets', 'user_id_blob')}
+    report['user_id'] = columnar.decode_strings(columns['user_id_offsets'], columns['user_id_blob'])
+    report['stress_level'] = [header['stress_levels'][code] for code in columns['stress_level']]
+    report['header'] = header
+    return report
+
+
+def _previous(path):
+    """user id -> (stamp, digest, totals) from the last report for this tenant root."""
+    report = load_report(path)
+    if report is None or report['header'].get('root') != os.path.abspath(config.TENANT_ROOT):
+        return {}
+    totals = zip(*(report[name].tolist() for name in TOTAL_COLUMNS))
+    return {
+        user_id: (bytes(stamp), bytes(digest), tuple(total))
+        for user_id, stamp, digest, total in zip(report['user_id'], report['stamp'], report['digest'], totals)
+    }
+
+
+def run(path=None, workers=None, chunk_size=CHUNK_SIZE, full=False, today=None):
+    """
+    Builds the report at `path` (default: stress_report.bin in the tenant root).
+    full=True ignores the previous report and reads every ledger. Returns run
+    statistics: tenants, unchanged / touched / recomputed counts, seconds,
+    tenants_per_second and stress_levels.
+    """
+    start = time.perf_counter()
+    path = path or report_path()
+    today = today or datetime.now()
+    previous = {} if full else _previous(path)
+    missing = (None, None, None)
+    tasks = (
+        (config.TENANT_ROOT, [(user_id, *previous.get(user_id, missing)) for user_id in chunk])
+        for chunk in chunks(tenants.iter_user_ids(), chunk_size)
+    )
+
+    user_ids, stamps, digests, totals = [], [], [], []
+    counts = {UNCHANGED: 0, TOUCHED: 0, RECOMPUTED: 0}
+    for results in run_chunks(scan_chunk, tasks, workers):
+        for user_id, stamp, digest, total, status in results:
+            user_ids.append(user_id)
+            stamps.append(stamp)
+            digests.append(digest)
+            totals.append(total)
+            counts[status] += 1
+
+    totals = np.array(totals, dtype=np.int64).reshape(-1, len(TOTAL_COLUMNS))
+    summary = engine.summarize_totals_many(*totals.T, today=today)
+    # Most stressed first; ties in user id order
+    order = np.lexsort((np.array(user_ids, dtype=str), summary['remaining_days_balance']))
+    levels = np.asarray(summary.pop('stress_level'))
+
+    offsets, blob = columnar.encode_strings(user_ids[i] for i in order)
+    arrays = {
+        'user_id_offsets': offsets,
+        'user_id_blob': blob,
+        'stamp': np.array(stamps, dtype='V8')[order],
+        'digest': np.array(digests, dtype='V16')[order],
+    }
+    for name, values in summary.items():
+        arrays[name] = np.ascontiguousarray(values[order])
+    codes = np.zeros(len(levels), dtype=np.uint8)
+    for code, level in enumerate(STRESS_LEVELS):
+        codes[levels == level] = code
+    arrays['stress_level'] = codes[order]
+    columnar.write_table(
+        path, arrays,
+        rows=len(user_ids),
+        root=os.path.abspath(config.TENANT_ROOT),
+        date=today.strftime('%Y-%m-%d'),
+        stress_levels=STRESS_LEVELS,
+    )
+
+    seconds = time.perf_counter() - start
+    return {
+        'tenants': len(user_ids),
+        **counts,
+        'seconds': round(seconds, 3),
+        'tenants_per_second': round(len(user_ids) / seconds, 1) if seconds else None,
+        'stress_levels': {level: int((levels == level).sum()) for level in STRESS_LEVELS},
+        'report': path,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes (1 = no pool)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Tenants per worker task")
+    parser.add_argument('--root', help=f"Tenant directory (default {config.TENANT_ROOT})")
+    parser.add_argument('--out', help=f"Report file (default {REPORT_NAME} in the tenant directory)")
+    parser.add_argument('--full', action='store_true', help="Ignore the last report and read every ledger")
+    parser.add_argument('--top', type=int, default=0, help="Print the N most stressed tenants as NDJSON")
+    args = parser.parse_args(argv)
+    if args.root:
+        config.TENANT_ROOT = args.root
+
+    stats = run(args.out, args.workers, args.chunk_size, args.full)
+    print(json.dumps(stats), file=sys.stderr)
+    if args.top:
+        report = load_report(stats['report'])
+        for i in range(min(args.top, len(report['user_id']))):
+            print(json.dumps({
+                'rank': i + 1,
+                'user_id': report['user_id'][i],
+                'remaining_days_balance': round(float(report['remaining_days_balance'][i]), 2),
+                'stress_level': report['stress_level'][i],
+                'safe_balance': int(report['safe_balance'][i]),
+                'daily_burn': int(report['daily_burn'][i]),
+            }))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,407 @@
+"""
+Local HTTP API over the ledgers (asyncio, standard library only).
+
+    GET    /summary                      cashflow summary (same keys as get_analytics_summary)
+    GET    /income?from=&to=&source=&limit=
+    GET    /expenses?from=&to=&type=&category=&limit=
+    POST   /income, /expenses            one JSON object or a list (same fields as `main.py add --stdin`)
+    DELETE /income/<row_id>, /expenses/<row_id>
+
+Money is integer paisa. Listings are newest first and every row carries its
+row_id, which is what DELETE takes; POST answers with the ids it assigned.
+An id stays with its row, so deletes made one after another never hit a row
+that moved.
+
+Both ledgers are held in memory as an immutable Snapshot, with a date-sorted
+index so filtered listings only touch the rows in range. Handlers read
+whatever snapshot is current without locking. Writes are queued to a single
+writer task, which drains everything queued so far, applies it to disk in one
+append and one delete by id per ledger, plus one running-totals save, all
+under the totals lock, then publishes a new snapshot. Changes made by other
+processes are picked up by reloading: between commits when a ledger's version
+moves, and after a commit that found the ledger changed under it. A delete
+whose row another process removed in the meantime gets a 409.
+
+Run from the project root:
+    python -m features.api.server --port 8765
+"""
+import argparse
+import asyncio
+import json
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from urllib.parse import parse_qs, urlsplit
+
+from utils import storage
+from utils.helpers import LedgerConflictError, assign_row_ids, ledger_lock
+from features.analytics import engine
+from features.analytics import running_totals
+from features.cli.commands import LEDGERS, build_entry
+
+MAX_BATCH = 10_000
+REFRESH_SECONDS = 1.0
+MAX_BODY_BYTES = 16 * 1024 * 1024
+ROUTES = {'income': 'income', 'expenses': 'expense'}  # URL segment -> ledger kind
+
+# rows: {kind: tuple of row dicts in ledger order}; dates/order: {kind: tuple}
+# with each row's date and position in rows, sorted by date, for range listings.
+Snapshot = namedtuple('Snapshot', ['version', 'rows', 'dates', 'order', 'totals'])
+
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class LedgerService:
+    def __init__(self):
+        self.snapshot = None
+        self.versions = {}
+        self.queue = asyncio.Queue()
+
+    # --- State ---
+    def _load(self):
+        """Reads both ledgers with their versions, and the running totals (runs in a worker thread)."""
+        rows, versions = {}, {}
+        for kind, (file_path, _) in LEDGERS.items():
+            ledger_rows, versions[kind] = storage.load_for_update(file_path)
+            # The text backend returns amounts as strings
+            rows[kind] = tuple(dict(row, amount_paisa=int(row['amount_paisa'])) for row in ledger_rows)
+        return rows, versions, running_totals.get_running_totals()
+
+    async def load(self):
+        rows, self.versions, totals = await asyncio.to_thread(self._load)
+        dates, order = {}, {}
+        for kind, ledger_rows in rows.items():
+            order[kind] = sorted(range(len(ledger_rows)), key=lambda i: ledger_rows[i]['date'])
+            dates[kind] = [ledger_rows[i]['date'] for i in order[kind]]
+        self._publish(rows, dates, order, totals)
+
+    def _publish(self, rows, dates, order, totals):
+        version = self.snapshot.version + 1 if self.snapshot else 1
+        self.snapshot = Snapshot(
+            version,
+            {kind: tuple(ledger_rows) for kind, ledger_rows in rows.items()},
+            {kind: tuple(kind_dates) for kind, kind_dates in dates.items()},
+            {kind: tuple(kind_order) for kind, kind_order in order.items()},
+            (totals.total_income, totals.total_fixed, totals.total_variable)
+        )
+
+    def changed_on_disk(self):
+        return any(storage.ledger_version(LEDGERS[kind][0]) != version for kind, version in self.versions.items())
+
+    # --- Writes ---
+    async def submit(self, kind, action, payload):
+        """Queues one write for the next group commit and waits for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((kind, action, payload, future))
+        return await future
+
+    async def writer(self):
+        while True:
+            try:
+                batch = [await asyncio.wait_for(self.queue.get(), timeout=REFRESH_SECONDS)]
+            except TimeoutError:
+                try:
+                    if await asyncio.to_thread(self.changed_on_disk):
+                        await self.load()
+                except Exception:
+                    pass  # the snapshot stays as it was; tried again on the next tick or commit
+                continue
+            while len(batch) < MAX_BATCH and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await self.commit(batch)
+            except Exception as e:
+                # Fail this batch's requests (they answer 500), not the writer
+                for _, _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def commit(self, batch):
+        if await asyncio.to_thread(self.changed_on_disk):
+            await self.load()
+        rows = {kind: list(ledger_rows) for kind, ledger_rows in self.snapshot.rows.items()}
+        added = {kind: [] for kind in LEDGERS}
+        deleted = {kind: {} for kind in LEDGERS}  # row_id -> row, for rows already in the ledger
+        removed = {kind: set() for kind in LEDGERS}  # those ids plus rows added and deleted in this batch
+        new_ids = {kind: set() for kind in LEDGERS}
+        live = {}  # kind -> {row_id: row}, built for the ledgers the batch deletes from
+        results = []
+        for kind, action, payload, future in batch:
+            if action == 'add':
+                # Ids are given out here, so the response can carry them
+                assign_row_ids(payload)
+                rows[kind].extend(payload)
+                added[kind].extend(payload)
+                new_ids[kind].update(row['row_id'] for row in payload)
+                if kind in live:
+                    live[kind].update((row['row_id'], row) for row in payload)
+                results.append((kind, future, {'added': len(payload), 'row_ids': [row['row_id'] for row in payload]}))
+                continue
+            if kind not in live:
+                live[kind] = {row.get('row_id'): row for row in rows[kind]}
+            row = live[kind].pop(payload, None)
+            if row is None:
+                results.append((kind, future, HTTPError(404, f"No {kind} row with id {payload}.")))
+                continue
+            removed[kind].add(payload)
+            if payload not in new_ids[kind]:
+                deleted[kind][payload] = row
+            results.append((kind, future, {'deleted': row}))
+        for kind in LEDGERS:
+            if removed[kind]:
+                # A row added and deleted in the same batch is never written
+                rows[kind] = [row for row in rows[kind] if row.get('row_id') not in removed[kind]]
+                added[kind] = [row for row in added[kind] if row['row_id'] not in removed[kind]]
+
+        failed = {}
+        totals = None
+        stale = False
+        for kind in LEDGERS:
+            if added[kind] or deleted[kind]:
+                try:
+                    self.versions[kind], totals, moved = await asyncio.to_thread(self._write, kind, added, deleted)
+                    stale = stale or moved
+                except (LedgerConflictError, KeyError) as e:
+                    failed[kind] = HTTPError(409, f"The {kind} ledger was changed by another writer ({e}). "
+                                                  "Nothing was saved; retry the request.")
+                except Exception as e:
+                    failed[kind] = e
+
+        if failed or stale:
+            # Whatever did get written is on disk; start over from there
+            await self.load()
+        elif totals is not None:
+            self._publish(rows, *self._reindex(rows, added, deleted), totals)
+        for kind, future, result in results:
+            result = failed.get(kind, result)
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(dict(result, version=self.snapshot.version))
+
+    def _reindex(self, rows, added, deleted):
+        dates = dict(self.snapshot.dates)
+        order = dict(self.snapshot.order)
+        for kind in LEDGERS:
+            if deleted[kind]:
+                # Deletes shift the positions in rows, so re-sort that ledger
+                order[kind] = sorted(range(len(rows[kind])), key=lambda i: rows[kind][i]['date'])
+                dates[kind] = [rows[kind][i]['date'] for i in order[kind]]
+            elif added[kind]:
+                dates[kind], order[kind] = list(dates[kind]), list(order[kind])
+                first_new = len(rows[kind]) - len(added[kind])
+                for index, row in enumerate(added[kind], start=first_new):
+                    position = bisect_right(dates[kind], row['date'])
+                    dates[kind].insert(position, row['date'])
+                    order[kind].insert(position, index)
+        return dates, order
+
+    def _write(self, kind, added, deleted):
+        """
+        Writes a ledger's deletes, then its adds, and applies them to the
+        running totals, all under the totals lock (runs in a worker thread).
+        Every writer holds that lock too, so the version read first tells
+        whether anything but a compaction touched the ledger since the
+        snapshot. Returns the new version, the saved totals and whether the
+        snapshot has to be reloaded. Raises KeyError, with nothing written,
+        if a row to delete is gone.
+        """
+        file_path, fieldnames = LEDGERS[kind]
+        with running_totals.updating() as totals:
+            moved = storage.ledger_version(file_path) != self.versions[kind]
+            if deleted[kind]:
+                # Held across the id lookup and the delete, so a background compaction can't slip in between
+                with ledger_lock(file_path):
+                    version = storage.delete_by_id(file_path, list(deleted[kind]))
+            if added[kind]:
+                version = storage.append_rows(file_path, added[kind], fieldnames)
+            # Totals only change once the ledger is written
+            add, remove = (totals.add_income, totals.remove_income) if kind == 'income' else (totals.add_expense, totals.remove_expense)
+            for entry in added[kind]:
+                add(entry)
+            for entry in deleted[kind].values():
+                remove(entry)
+        return version, totals, moved
+
+    # --- Reads ---
+    def summary(self):
+        return engine.summarize_totals(*self.snapshot.totals)
+
+    def listing(self, kind, query):
+        snapshot = self.snapshot
+        rows, dates, order = snapshot.rows[kind], snapshot.dates[kind], snapshot.order[kind]
+        date_from = _param(query, 'from')
+        date_to = _param(query, 'to')
+        matches = [(name, value.lower()) for name in ('type', 'category', 'source')
+                   if (value := _param(query, name)) is not None]
+        limit = _param(query, 'limit')
+        if limit is not None and not limit.isdigit():
+            raise HTTPError(400, "limit must be a non-negative integer")
+        limit = int(limit) if limit is not None else len(rows)
+
+        low = bisect_left(dates, date_from) if date_from is not None else 0
+        high = bisect_right(dates, date_to) if date_to is not None else len(dates)
+        selected = []
+        # Walk the date range newest first and stop once the page is full
+        for position in range(high - 1, low - 1, -1):
+            if len(selected) >= limit:
+                break
+            row = rows[order[position]]
+            if all(str(row.get(name, '')).lower() == value for name, value in matches):
+                selected.append(row)
+        return selected
+
+
+def _param(query, name):
+    values = query.get(name)
+    return values[0] if values else None
+
+
+async def handle_request(service, method, target, body):
+    url = urlsplit(target)
+    parts = [part for part in url.path.split('/') if part]
+    query = parse_qs(url.query)
+
+    if parts == ['summary']:
+        if method != 'GET':
+            raise HTTPError(405, "Use GET.")
+        return 200, service.summary()
+
+    if not parts or parts[0] not in ROUTES or len(parts) > 2:
+        raise HTTPError(404, f"No route for {url.path}.")
+    kind = ROUTES[parts[0]]
+
+    if len(parts) == 2:
+        if method != 'DELETE':
+            raise HTTPError(405, "Use DELETE.")
+        return 200, await service.submit(kind, 'delete', parts[1])
+
+    if method == 'GET':
+        return 200, service.listing(kind, query)
+    if method == 'POST':
+        try:
+            records = json.loads(body or b'null')
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON.")
+        if isinstance(records, dict):
+            records = [records]
+        if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+            raise HTTPError(400, "Body must be a JSON object or a non-empty list of objects.")
+        entries = []
+        for position, record in enumerate(records):
+            try:
+                entries.append(build_entry(dict(record, kind=kind))[1])
+            except ValueError as e:
+                raise HTTPError(400, f"Item {position}: {e}")
+        return 201, await service.submit(kind, 'add', entries)
+    raise HTTPError(405, "Use GET or POST.")
+
+
+def parse_head(head):
+    """
+    (method, target, version, headers, content length) from a request's head.
+    Raises ValueError with the reason if it is malformed.
+    """
+    request_line, *header_lines = head.decode('latin-1').split('\r\n')
+    parts = request_line.split(' ', 2)
+    if len(parts) != 3 or not parts[0] or not parts[1]:
+        raise ValueError(f"Malformed request line {request_line!r}.")
+    method, target, version = parts
+    headers = {}
+    for line in header_lines:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    length = headers.get('content-length', '0')
+    if not length.isdigit():
+        raise ValueError(f"Invalid Content-Length {length!r}.")
+    return method, target, version, headers, int(length)
+
+
+async def send(writer, status, document, keep_alive):
+    payload = json.dumps(document).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+
+
+async def serve_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            except asyncio.LimitOverrunError:
+                # The rest of the head is still unread, so the connection can't be reused
+                await send(writer, 413, {'error': "Request head too large."}, False)
+                return
+            try:
+                method, target, version, headers, length = parse_head(head)
+            except ValueError as e:
+                # Without a request line or a length the body can't be skipped, so close after answering
+                status, document, keep_alive = 400, {'error': str(e)}, False
+            else:
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                if length > MAX_BODY_BYTES:
+                    status, document = 413, {'error': "Request body too large."}
+                    keep_alive = False
+                else:
+                    try:
+                        body = await reader.readexactly(length) if length else b''
+                    except asyncio.IncompleteReadError:
+                        status, document, keep_alive = 400, {'error': "Request body shorter than its Content-Length."}, False
+                    else:
+                        try:
+                            status, document = await handle_request(service, method, target, body)
+                        except HTTPError as e:
+                            status, document = e.status, {'error': str(e)}
+                        except Exception as e:
+                            status, document = 500, {'error': str(e)}
+
+            await send(writer, status, document, keep_alive)
+            if not keep_alive:
+                return
+    except ConnectionError:
+        pass  # the client went away mid-response
+    finally:
+        writer.close()
+
+
+async def run_server(host='127.0.0.1', port=8765, ready=None):
+    for file_path, _ in LEDGERS.values():
+        await asyncio.to_thread(storage.recover, file_path)
+        await asyncio.to_thread(storage.migrate_row_ids, file_path)
+    service = LedgerService()
+    await service.load()
+    writer_task = asyncio.create_task(service.writer())
+    server = await asyncio.start_server(lambda r, w: serve_connection(service, r, w), host, port)
+    if ready is not None:
+        ready(server)
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            writer_task.cancel()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the ledgers over a local HTTP API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(run_server(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,237 @@
+"""
+Monthly spending limits per expense category.
+
+Limits are kept in database/budgets.json as {category: limit in paisa}. What
+has been spent per category in each month comes from the running totals
+(features.analytics.running_totals), which every add, update and delete
+already keeps current with an O(1) delta. Checking every budget for a month
+is therefore one pass over the categories that have a limit, however long the
+ledger is, which is what lets the CLI menu and the Streamlit forms warn right
+after each new expense. A budget is 'warning' once spending reaches
+WARN_PERCENT of its limit and 'over' once it passes the limit.
+
+evaluate_history() is the batch mode: every budget against every month of an
+expense ledger, in one vectorized NumPy pass.
+"""
+import json
+import os
+from datetime import datetime
+
+from rich.console import Console
+
+BUDGETS_FILE = 'database/budgets.json'
+WARN_PERCENT = 80
+STATUSES = ['ok', 'warning', 'over']
+console = Console()
+
+
+def load_budgets(budgets_file=BUDGETS_FILE):
+    """{category: monthly limit in paisa}; empty if no budgets were set."""
+    if not os.path.exists(budgets_file):
+        return {}
+    try:
+        with open(budgets_file, 'r', encoding='utf-8') as f:
+            return {category: int(limit) for category, limit in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_budgets(limits, budgets_file=BUDGETS_FILE):
+    directory = os.path.dirname(budgets_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = budgets_file + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(limits, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, budgets_file)
+
+
+def set_budget(category, limit_paisa, budgets_file=BUDGETS_FILE):
+    """Sets a category's monthly limit; a limit of None or 0 removes it. Returns the new limits."""
+    limits = load_budgets(budgets_file)
+    # Categories match case-insensitively, so replace any spelling of this one
+    limits = {name: limit for name, limit in limits.items() if name.lower() != category.lower()}
+    if limit_paisa:
+        limits[category] = int(limit_paisa)
+    save_budgets(limits, budgets_file)
+    return limits
+
+
+def status_of(spent_paisa, limit_paisa, warn_percent=WARN_PERCENT):
+    if spent_paisa > limit_paisa:
+        return 'over'
+    if spent_paisa * 100 >= limit_paisa * warn_percent:
+        return 'warning'
+    return 'ok'
+
+
+def evaluate(limits, spent, warn_percent=WARN_PERCENT):
+    """
+    Checks each limit against spent ({category: paisa} for one month).
+    Returns one dict per budget, in the order of limits: category,
+    limit_paisa, spent_paisa, remaining_paisa (negative once over),
+    percent and status.
+    """
+    # Categories match case-insensitively, like the ledger filters
+    spent_by_name = {}
+    for category, paisa in spent.items():
+        spent_by_name[category.lower()] = spent_by_name.get(category.lower(), 0) + paisa
+    results = []
+    for category, limit in limits.items():
+        paisa = spent_by_name.get(category.lower(), 0)
+        results.append({
+            'category': category,
+            'limit_paisa': limit,
+            'spent_paisa': paisa,
+            'remaining_paisa': limit - paisa,
+            'percent': round(paisa * 100 / limit, 1) if limit else 0.0,
+            'status': status_of(paisa, limit, warn_percent),
+        })
+    return results
+
+
+def month_status(month=None, totals=None, budgets_file=BUDGETS_FILE):
+    """evaluate() for one month ('YYYY-MM', default this month) from the running totals."""
+    if totals is None:
+        from features.analytics.running_totals import get_running_totals
+        totals = get_running_totals()
+    month = month or datetime.now().strftime('%Y-%m')
+    return evaluate(load_budgets(budgets_file), totals.month_spend(month))
+
+
+def alerts(results):
+    """The budgets that are at 'warning' or 'over'."""
+    return [result for result in results if result['status'] != 'ok']
+
+
+def describe(result):
+    """One line for a budget result, e.g. 'Food: ₹4,200.00 of ₹5,000.00 (84.0%)'."""
+    text = (f"{result['category']}: ₹{result['spent_paisa'] / 100:,.2f} of "
+            f"₹{result['limit_paisa'] / 100:,.2f} ({result['percent']:.1f}%)")
+    if result['status'] == 'over':
+        text += f", ₹{-result['remaining_paisa'] / 100:,.2f} over budget"
+    return text
+
+
+def print_alerts(month, totals=None, budgets_file=BUDGETS_FILE):
+    """Prints a warning for every budget at 'warning' or 'over' in a month (after an expense is saved)."""
+    for result in alerts(month_status(month, totals, budgets_file)):
+        style = "bold red" if result['status'] == 'over' else "bold yellow"
+        label = "Over budget" if result['status'] == 'over' else "Budget warning"
+        console.print(f"⚠️ {label} for {month}: {describe(result)}", style=style)
+
+
+def _factorize(values):
+    """(distinct values in first-seen order, int64 code of each value)."""
+    import numpy as np
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int64, count=len(values))
+    return list(index), codes
+
+
+def evaluate_history(expense_data, limits, warn_percent=WARN_PERCENT):
+    """
+    Checks every budget against every month of an expense ledger in one pass.
+    expense_data is a list of expense dicts or a utils.columnar.ColumnarLedger.
+    Returns {'months': ['YYYY-MM', ...] ascending, 'categories': the limits'
+    categories, 'limit_paisa': int64 array, 'spent_paisa' and 'status':
+    months x categories arrays (status as indexes into STATUSES)}.
+    """
+    import numpy as np
+    categories = list(limits)
+    index_of = {category.lower(): i for i, category in enumerate(categories)}
+
+    if hasattr(expense_data, 'columns'):
+        epoch = datetime(1970, 1, 1).toordinal()
+        amounts = expense_data.columns['amount_paisa']
+        months = (expense_data.columns['date'] - epoch).astype('datetime64[D]').astype('datetime64[M]')
+        month_keys, month_rows = np.unique(months, return_inverse=True)
+        names = expense_data.dictionaries.get('category', [])
+        codes = expense_data.columns.get('category', np.zeros(len(expense_data), dtype=np.uint8))
+    else:
+        amounts = np.fromiter((int(row['amount_paisa']) for row in expense_data), dtype=np.int64,
+                              count=len(expense_data))
+        # Only the distinct dates are sorted into months, not every row's
+        days, day_codes = _factorize([row['date'] for row in expense_data])
+        month_keys, month_of_day = np.unique(np.array(days, dtype='U7'), return_inverse=True)
+        month_rows = month_of_day[day_codes] if len(days) else day_codes
+        names, codes = _factorize([row['category'] for row in expense_data])
+    # Budget column of each row (-1: no budget for its category), via its category code
+    column_of_code = np.array([index_of.get(str(name).lower(), -1) for name in names], dtype=np.int64)
+    columns = column_of_code[codes] if len(names) else np.full(len(codes), -1, dtype=np.int64)
+
+    has_budget = columns >= 0
+    cells = month_rows[has_budget] * len(categories) + columns[has_budget]
+    # Float sums of int64 paisa are exact up to 2**53 paisa per cell
+    spent = np.bincount(cells, weights=amounts[has_budget], minlength=len(month_keys) * len(categories))
+    spent = np.rint(spent).astype(np.int64).reshape(len(month_keys), len(categories))
+
+    limit_paisa = np.array([limits[category] for category in categories], dtype=np.int64)
+    status = np.select([spent > limit_paisa, spent * 100 >= limit_paisa * warn_percent], [2, 1], 0)
+    return {
+        'months': [str(month)[:7] for month in month_keys],
+        'categories': categories,
+        'limit_paisa': limit_paisa,
+        'spent_paisa': spent,
+        'status': status,
+    }
+
+
+def history_records(history):
+    """evaluate_history's result as one dict per month with the budgets that were not 'ok'."""
+    records = []
+    for m, month in enumerate(history['months']):
+        flagged = {
+            category: {'spent_paisa': int(history['spent_paisa'][m, c]),
+                       'limit_paisa': int(history['limit_paisa'][c]),
+                       'status': STATUSES[history['status'][m, c]]}
+            for c, category in enumerate(history['categories']) if history['status'][m, c]
+        }
+        records.append({'month': month, 'budgets': flagged})
+    return records
+
+
+def manage_budgets(categories):
+    """Interactive menu: this month's budgets, and setting or removing a limit."""
+    import questionary  # prompt_toolkit
+    from rich.table import Table
+    from utils.helpers import validate_amount
+
+    month = datetime.now().strftime('%Y-%m')
+    results = month_status(month)
+    if results:
+        table = Table(title=f"Budgets for {month}")
+        table.add_column("Category", style="magenta")
+        table.add_column("Spent (₹)", justify="right")
+        table.add_column("Limit (₹)", justify="right")
+        table.add_column("Used", justify="right")
+        colors = {'ok': 'green', 'warning': 'yellow', 'over': 'red'}
+        for result in results:
+            color = colors[result['status']]
+            table.add_row(result['category'], f"{result['spent_paisa'] / 100:,.2f}",
+                          f"{result['limit_paisa'] / 100:,.2f}", f"[{color}]{result['percent']:.1f}%[/{color}]")
+        console.print(table)
+    else:
+        console.print("[bold yellow]No budgets set yet.[/bold yellow]")
+
+    if not questionary.confirm("Set or remove a budget?", default=not results).ask():
+        return
+    category = questionary.select("Select expense category:", choices=categories).ask()
+    if category is None:
+        return
+    while True:
+        limit_str = questionary.text("Monthly limit in Rupees (0 removes the budget):").ask()
+        if limit_str is None:
+            return
+        if limit_str.strip() in ('0', '0.0', '0.00'):
+            limit = 0
+            break
+        limit = validate_amount(limit_str)
+        if limit is not None:
+            break
+        console.print("Invalid amount. Enter a positive number, or 0.", style="bold red")
+    set_budget(category, limit)
+    if limit:
+        console.print(f"[bold green]Budget for {category} set to ₹{limit / 100:,.2f} a month.[/bold green]")
+    else:
+        console.print(f"[bold blue]Budget for {category} removed.[/bold blue]")
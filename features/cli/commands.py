@@ -0,0 +1,326 @@
+"""
+Non-interactive subcommands for scripts, cron jobs and other services.
+
+    python main.py summary
+    python main.py list expenses --from 2026-10-01 --type variable
+    python main.py list expenses --limit 100 --page 3
+    python main.py list expenses --limit 100 --cursor 2026-09-14:5123
+    python main.py add income --amount 1250.50 --source Salary
+    python main.py add --stdin < operations.ndjson
+    python main.py import statement.csv --date-format %d/%m/%Y
+    python main.py forecast --months 24
+    python main.py simulate --paths 100000 --seed 7
+    python main.py budget set Food 6000
+    python main.py budget status --month 2026-09
+    python main.py budget history
+
+Output is JSON (one document) or NDJSON (one JSON object per line); money is
+always integer paisa. `add --stdin` reads one JSON object per line, e.g.
+
+    {"kind": "income", "amount": "1250.50", "source": "Salary", "date": "2026-10-01"}
+    {"kind": "expense", "type": "Variable", "category": "Food", "amount_paisa": 45000}
+
+validates every line, then writes all accepted rows with one append per ledger
+and one running-totals save. Rejected lines are reported and the exit status is 1.
+The report lists, under budget_alerts, every budget (features.budgets) that the
+added expenses left at 'warning' or 'over' for their month.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from utils.helpers import validate_amount, validate_date
+from utils import storage
+from features.input.income_input import INCOME_FILE, INCOME_FIELDS
+from features.expenses.expense_input import EXPENSE_FILE, EXPENSE_FIELDS, EXPENSE_FREQUENCIES
+from features.analytics import running_totals
+from features.budgets import budgets
+from features.importer import bank_import
+
+LEDGERS = {
+    'income': (INCOME_FILE, INCOME_FIELDS),
+    'expense': (EXPENSE_FILE, EXPENSE_FIELDS),
+}
+EXPENSE_TYPES = ['Fixed', 'Variable']
+
+
+def build_entry(record):
+    """
+    Turns one add operation (a dict) into (kind, ledger row).
+    Raises ValueError with the reason if the operation is invalid.
+    """
+    kind = str(record.get('kind', '')).lower().rstrip('s')
+    if kind not in LEDGERS:
+        raise ValueError("kind must be 'income' or 'expense'")
+
+    if 'amount_paisa' in record:
+        amount = record['amount_paisa']
+        if not isinstance(amount, int) or isinstance(amount, bool) or amount <= 0:
+            raise ValueError("amount_paisa must be a positive integer")
+    else:
+        amount = validate_amount(str(record.get('amount', '')))
+        if amount is None:
+            raise ValueError("invalid amount")
+
+    date = validate_date(str(record.get('date') or datetime.now().strftime('%Y-%m-%d')))
+    if date is None:
+        raise ValueError("invalid date, use YYYY-MM-DD")
+
+    description = str(record.get('description') or '')
+    if kind == 'income':
+        return kind, {
+            'date': date.strftime('%Y-%m-%d'),
+            'source': str(record.get('source') or 'Other'),
+            'amount_paisa': amount,
+            'description': description
+        }
+
+    expense_type = str(record.get('type', '')).capitalize()
+    if expense_type not in EXPENSE_TYPES:
+        raise ValueError("type must be 'Fixed' or 'Variable'")
+    frequency = str(record.get('frequency') or 'one-time')
+    if frequency not in EXPENSE_FREQUENCIES:
+        raise ValueError(f"frequency must be one of {', '.join(EXPENSE_FREQUENCIES)}")
+    return kind, {
+        'date': date.strftime('%Y-%m-%d'),
+        'type': expense_type,
+        'category': str(record.get('category') or 'Other'),
+        'amount_paisa': amount,
+        'description': description,
+        'frequency': frequency
+    }
+
+
+def apply_entries(entries):
+    """Writes (kind, row) pairs with one append per ledger and one totals save."""
+    rows = {kind: [] for kind in LEDGERS}
+    for kind, row in entries:
+        rows[kind].append(row)
+
+    with running_totals.updating() as totals:
+        for kind, (file_path, fieldnames) in LEDGERS.items():
+            if rows[kind]:
+                storage.append_rows(file_path, rows[kind], fieldnames)
+        for row in rows['income']:
+            totals.add_income(row)
+        for row in rows['expense']:
+            totals.add_expense(row)
+    return len(rows['income']), len(rows['expense'])
+
+
+def write_json(document):
+    sys.stdout.write(json.dumps(document) + '\n')
+
+
+def cmd_summary(args):
+    write_json(running_totals.get_running_totals().summary())
+    return 0
+
+
+def cmd_list(args):
+    file_path = LEDGERS[args.ledger.rstrip('s')][0]
+    filters = {
+        'date_from': args.date_from,
+        'date_to': args.date_to,
+        'type': args.type,
+        'category': args.category,
+        'source': args.source,
+    }
+    filters = {name: value for name, value in filters.items() if value is not None}
+    if args.limit is not None or args.page is not None or args.cursor is not None:
+        # One page, newest first; the next page's cursor goes to stderr so stdout stays rows only
+        if args.page is not None and args.cursor is not None:
+            raise SystemExit("list: give --page or --cursor, not both")
+        from utils import pagination  # numpy
+        try:
+            result = pagination.page_rows(file_path, args.limit or pagination.PAGE_SIZE, args.cursor, args.page,
+                                          **filters)
+        except ValueError as e:
+            raise SystemExit(f"list: {e}")
+        if args.format == 'json':
+            write_json(result)
+        else:
+            sys.stdout.writelines(json.dumps(row) + '\n' for row in result['rows'])
+            print(json.dumps({'total': result['total'], 'next_cursor': result['next_cursor']}), file=sys.stderr)
+        return 0
+    if args.format == 'json':
+        write_json(storage.query_rows(file_path, **filters))
+    else:
+        # Streamed in ledger order, so memory stays flat on large ledgers
+        write = sys.stdout.write
+        for row in storage.iter_rows(file_path, **filters):
+            write(json.dumps(row) + '\n')
+    return 0
+
+
+def cmd_add(args):
+    entries, rejected = [], []
+    if args.stdin:
+        for line_no, line in enumerate(sys.stdin, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+                entries.append(build_entry(record))
+            except ValueError as e:  # json.JSONDecodeError is a ValueError
+                rejected.append({'line': line_no, 'reason': str(e)})
+    else:
+        if args.kind is None:
+            raise SystemExit("add: give a kind (income or expense) or --stdin")
+        record = {name: value for name, value in vars(args).items() if value is not None}
+        try:
+            entries.append(build_entry(record))
+        except ValueError as e:
+            rejected.append({'line': None, 'reason': str(e)})
+
+    incomes, expenses = apply_entries(entries) if entries else (0, 0)
+    alerts = []
+    if expenses:
+        # Each month is checked from the running totals just saved, in O(budgets)
+        totals = running_totals.get_running_totals()
+        for month in sorted({row['date'][:7] for kind, row in entries if kind == 'expense'}):
+            alerts.extend(dict(result, month=month) for result in budgets.alerts(budgets.month_status(month, totals)))
+    write_json({'incomes': incomes, 'expenses': expenses, 'rejected': rejected, 'budget_alerts': alerts})
+    return 1 if rejected else 0
+
+
+def cmd_forecast(args):
+    from features.analytics import forecast
+    start = validate_date(args.start) if args.start else datetime.now()
+    if start is None:
+        raise SystemExit("forecast: --start must be YYYY-MM-DD")
+    if args.months < 1:
+        raise SystemExit("forecast: --months must be at least 1")
+    projection = forecast.forecast(
+        storage.load_data(INCOME_FILE), storage.load_data(EXPENSE_FILE), start.strftime('%Y-%m-%d'), args.months
+    )
+    document = {name: projection[name] for name in ('opening_balance', 'daily_burn', 'first_negative', 'months')}
+    if args.daily:
+        document['daily'] = [
+            {'date': str(day), 'income': int(income), 'expenses': int(expenses), 'balance': int(balance)}
+            for day, income, expenses, balance in zip(
+                projection['dates'], projection['income'], projection['expenses'], projection['balance']
+            )
+        ]
+    write_json(document)
+    return 0
+
+
+def cmd_simulate(args):
+    from features.analytics import simulation
+    today = validate_date(args.date) if args.date else datetime.now()
+    if today is None:
+        raise SystemExit("simulate: --date must be YYYY-MM-DD")
+    if args.paths < 1:
+        raise SystemExit("simulate: --paths must be at least 1")
+    result = simulation.simulate(
+        storage.load_data(INCOME_FILE), storage.load_data(EXPENSE_FILE), today,
+        paths=args.paths, seed=args.seed, workers=args.workers
+    )
+    write_json(result)
+    return 0
+
+
+def cmd_import(args):
+    report = bank_import.run_from_args(args)
+    write_json(report)
+    return 1 if report['rejected'] else 0
+
+
+def cmd_budget(args):
+    if args.action == 'set':
+        limit = 0 if args.amount.strip() in ('0', '0.0', '0.00') else validate_amount(args.amount)
+        if limit is None:
+            raise SystemExit("budget set: amount must be a positive number of Rupees, or 0 to remove the budget")
+        write_json(budgets.set_budget(args.category, limit))
+    elif args.action == 'status':
+        month = args.month or datetime.now().strftime('%Y-%m')
+        if validate_date(f"{month}-01") is None:
+            raise SystemExit("budget status: --month must be YYYY-MM")
+        write_json({'month': month, 'budgets': budgets.month_status(month)})
+    else:
+        limits = budgets.load_budgets()
+        ledger = storage.load_columns(EXPENSE_FILE)
+        history = budgets.evaluate_history(ledger if ledger is not None else storage.load_data(EXPENSE_FILE), limits)
+        write_json({'limits': limits, 'months': budgets.history_records(history)})
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='main.py', description="Cashflow Stress Scanner (no arguments: interactive menu).",
+        epilog="Put --profile, --profile-memory or --profile-dump DIR before the command "
+               "to print stage timings to stderr at exit (see utils.instrument).",
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    summary = commands.add_parser('summary', help="Cashflow summary as JSON (amounts in paisa)")
+    summary.set_defaults(func=cmd_summary)
+
+    listing = commands.add_parser('list', help="Ledger rows as NDJSON in ledger order (default) or a JSON array, newest "
+                                                  "first; --limit / --page / --cursor for one page")
+    listing.add_argument('ledger', choices=['income', 'expenses'])
+    listing.add_argument('--from', dest='date_from', help="YYYY-MM-DD, inclusive")
+    listing.add_argument('--to', dest='date_to', help="YYYY-MM-DD, inclusive")
+    listing.add_argument('--type')
+    listing.add_argument('--category')
+    listing.add_argument('--source')
+    listing.add_argument('--format', choices=['ndjson', 'json'], default='ndjson')
+    listing.add_argument('--limit', type=int, help="Rows per page, newest first (default: utils.pagination.PAGE_SIZE)")
+    listing.add_argument('--page', type=int, help="1-based page number")
+    listing.add_argument('--cursor', help="next_cursor of the previous page")
+    listing.set_defaults(func=cmd_list)
+
+    add = commands.add_parser('add', help="Add one entry, or many from NDJSON on stdin")
+    add.add_argument('kind', nargs='?', choices=['income', 'expense'])
+    add.add_argument('--stdin', action='store_true', help="Read one JSON operation per line from stdin")
+    add.add_argument('--amount', help="Rupees, e.g. 1250.50")
+    add.add_argument('--date', help="YYYY-MM-DD (default today)")
+    add.add_argument('--source', help="Income source")
+    add.add_argument('--type', help="Expense type: Fixed or Variable")
+    add.add_argument('--category', help="Expense category")
+    add.add_argument('--frequency', help=f"Expense frequency: {', '.join(EXPENSE_FREQUENCIES)}")
+    add.add_argument('--description')
+    add.set_defaults(func=cmd_add)
+
+    projection = commands.add_parser('forecast', help="Day-by-day projection of recurring items as JSON, with stress per month")
+    projection.add_argument('--months', type=int, default=12, help="Full months to project after this one (default 12)")
+    projection.add_argument('--start', help="YYYY-MM-DD to project from (default today)")
+    projection.add_argument('--daily', action='store_true', help="Include the daily income, expenses and balance")
+    projection.set_defaults(func=cmd_forecast)
+
+    simulate = commands.add_parser('simulate', help="Monte Carlo chance of running out this month, with runway percentiles, as JSON")
+    simulate.add_argument('--paths', type=int, default=10_000, help="Spending paths to simulate (default 10000)")
+    simulate.add_argument('--seed', type=int, default=0, help="Random seed; same seed, same result (default 0)")
+    simulate.add_argument('--workers', type=int, help="Worker processes for large runs (default CPU count, 1 = no pool)")
+    simulate.add_argument('--date', help="YYYY-MM-DD to simulate from (default today)")
+    simulate.set_defaults(func=cmd_simulate)
+
+    budget = commands.add_parser('budget', help="Monthly limits per expense category: set one, or check them as JSON")
+    actions = budget.add_subparsers(dest='action', required=True)
+    status = actions.add_parser('status', help="Spending against every budget in one month")
+    status.add_argument('--month', help="YYYY-MM (default this month)")
+    setter = actions.add_parser('set', help="Set a category's monthly limit (0 removes it)")
+    setter.add_argument('category')
+    setter.add_argument('amount', help="Rupees, e.g. 6000")
+    actions.add_parser('history', help="Every month of the expense ledger, with the budgets it went near or over")
+    budget.set_defaults(func=cmd_budget)
+
+    importer = commands.add_parser('import', help="Bulk import a bank-statement CSV, report as JSON")
+    bank_import.build_parser(importer)
+    importer.set_defaults(func=cmd_import)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
@@ -1,17 +1,28 @@
-import questionary
 from datetime import datetime, timedelta
-from utils.helpers import load_data, save_data, validate_amount, validate_date
+from utils.helpers import LedgerConflictError, validate_amount, validate_date
+from utils.storage import append_row, delete_by_id, ledger_version, update_by_id
 from rich.console import Console
 from rich.table import Table
+from features.analytics import running_totals
+from features.budgets.budgets import print_alerts
+from features.input.search import find_entry
 
 EXPENSE_FILE = 'database/expenses.txt'
 FIXED_EXPENSE_CATEGORIES = ['Rent', 'Bills', 'Groceries', 'Petrol', 'School Fees', 'Other']
 VARIABLE_EXPENSE_CATEGORIES = ['Food', 'Shopping', 'Entertainment', 'Health', 'Other']
 EXPENSE_FREQUENCIES = ['monthly', 'weekly', 'one-time']
+EXPENSE_FIELDS = ['date', 'type', 'category', 'amount_paisa', 'description', 'frequency', 'row_id']
+# What update_expense / delete_expense can search by
+EXPENSE_SEARCH_FIELDS = {
+    'type': ['Fixed', 'Variable'],
+    'category': list(dict.fromkeys(FIXED_EXPENSE_CATEGORIES + VARIABLE_EXPENSE_CATEGORIES)),
+}
+CONFLICT_MESSAGE = "The expense ledger was changed by another writer in the meantime. Nothing was saved; please try again."
 console = Console()
 
 
 def add_fixed_expense():
+    import questionary  # prompt_toolkit
     print("--- Add New Fixed Expense ---")
 
     while True:
@@ -29,18 +40,20 @@ def add_fixed_expense():
         'date': datetime.now().strftime('%Y-%m-%d'),
         'type': 'Fixed',
         'category': category,
-        'amount': str(float(amount)),  # store as string for CSV
+        'amount_paisa': amount,  # integer paisa
         'description': description if description else '',
         'frequency': frequency
     }
 
-    expenses = load_data(EXPENSE_FILE)
-    expenses.append(expense_entry)
-    save_data(EXPENSE_FILE, expenses)
+    with running_totals.updating() as totals:
+        append_row(EXPENSE_FILE, expense_entry, EXPENSE_FIELDS)
+        totals.add_expense(expense_entry)
     console.print("[bold green]Fixed expense added successfully![/bold green]")
+    print_alerts(expense_entry['date'][:7], totals)
 
 
 def add_variable_expense():
+    import questionary
     print("--- Add New Variable Expense ---")
 
     while True:
@@ -67,66 +80,166 @@ def add_variable_expense():
         'date': date.strftime('%Y-%m-%d'),
         'type': 'Variable',
         'category': category,
-        'amount': str(float(amount)),  # store as string for CSV
+        'amount_paisa': amount,  # integer paisa
         'description': description if description else '',
         'frequency': 'one-time'
     }
 
-    expenses = load_data(EXPENSE_FILE)
-    expenses.append(expense_entry)
-    save_data(EXPENSE_FILE, expenses)
+    with running_totals.updating() as totals:
+        append_row(EXPENSE_FILE, expense_entry, EXPENSE_FIELDS)
+        totals.add_expense(expense_entry)
     console.print("[bold green]Variable expense added successfully![/bold green]")
+    print_alerts(expense_entry['date'][:7], totals)
 
 
-def list_expenses(filter_option=None):
-    expenses = load_data(EXPENSE_FILE)
-
-    if not expenses:
-        console.print("[bold yellow]No expense entries found.[/bold yellow]")
+def expense_filters(filter_option=None, today=None):
+    """Storage filters (see storage.query_rows) for a list_expenses filter option."""
+    today = today or datetime.now().date()
+    if filter_option == 'last_7_days':
+        return {'date_from': (today - timedelta(days=7)).isoformat()}
+    if filter_option == 'last_month':
+        return {'date_from': (today - timedelta(days=30)).isoformat()}
+    if filter_option and filter_option.startswith('type:'):
+        return {'type': filter_option.split(':')[1]}
+    if filter_option and filter_option.startswith('category:'):
+        return {'category': filter_option.split(':')[1]}
+    return {}
+
+
+def list_expenses(filter_option=None, page_size=None):
+    from utils.pagination import PAGE_SIZE, iter_pages  # numpy
+    page_size = page_size or PAGE_SIZE
+    # Filters are pushed down into the storage backend, and only the page on screen is rendered
+    filters = expense_filters(filter_option)
+    shown = 0
+    for page in iter_pages(EXPENSE_FILE, page_size, **filters):
+        if not page['total']:
+            if filters:
+                console.print("[bold yellow]No expense entries match the filter.[/bold yellow]")
+            else:
+                console.print("[bold yellow]No expense entries found.[/bold yellow]")
+            return
+
+        table = Table(title="Expense Entries", caption=f"{shown + 1:,}-{shown + len(page['rows']):,} of {page['total']:,}")
+        table.add_column("Date", style="cyan", no_wrap=True)
+        table.add_column("Type", style="blue")
+        table.add_column("Category", style="magenta")
+        table.add_column("Amount (₹)", style="red", justify="right")
+        table.add_column("Description", style="white")
+        table.add_column("Frequency", style="green")
+
+        for entry in page['rows']:
+            table.add_row(
+                entry['date'],
+                entry['type'],
+                entry['category'],
+                f"{entry['amount_paisa'] / 100:.2f}",
+                entry['description'],
+                entry['frequency']
+            )
+
+        console.print(table)
+        shown += len(page['rows'])
+        if page['next_cursor'] is None:
+            return
+        import questionary
+        if not questionary.confirm(f"Show the next {page_size}?", default=True).ask():
+            return
+
+
+def describe_expense(expense):
+    return (f"{expense['date']} | {expense['type']} | {expense['category']} | "
+            f"{int(expense['amount_paisa']) / 100:.2f} | {expense['description']} | {expense['frequency']}")
+
+
+def update_expense():
+    """Update an existing expense entry, found by searching the ledger."""
+    import questionary
+    # Taken before the search, so a write made while the user picks fails the save
+    version = ledger_version(EXPENSE_FILE)
+    expense = find_entry(EXPENSE_FILE, 'expense', 'update', EXPENSE_SEARCH_FIELDS, describe_expense)
+    if expense is None:
         return
+    old_expense = dict(expense)
 
-    # Convert amount to float and parse date
-    for entry in expenses:
-        entry['amount'] = float(entry['amount'])
-        entry['date_obj'] = datetime.strptime(entry['date'], '%Y-%m-%d')
+    console.print(f"\n[bold blue]Updating entry:[/bold blue] {describe_expense(expense)}")
 
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-
-    if filter_option == 'last_7_days':
-        filtered = [e for e in expenses if e['date_obj'] >= today - timedelta(days=7)]
-    elif filter_option == 'last_month':
-        filtered = [e for e in expenses if e['date_obj'] >= today - timedelta(days=30)]
-    elif filter_option and filter_option.startswith('type:'):
-        t = filter_option.split(':')[1]
-        filtered = [e for e in expenses if e['type'].lower() == t.lower()]
-    elif filter_option and filter_option.startswith('category:'):
-        c = filter_option.split(':')[1]
-        filtered = [e for e in expenses if e['category'].lower() == c.lower()]
-    else:
-        filtered = expenses
+    while True:
+        current_amount = f"{int(expense['amount_paisa']) / 100:.2f}"
+        new_amount_str = questionary.text(
+            f"Enter new amount (current: {current_amount}):",
+            default=current_amount
+        ).ask()
+        new_amount = validate_amount(new_amount_str)
+        if new_amount is not None:
+            expense['amount_paisa'] = new_amount
+            break
+        console.print("Invalid amount. Enter a positive number.", style="bold red")
+
+    # The type stays; it decides which categories (and whether a frequency) apply
+    is_fixed = expense['type'].lower() == 'fixed'
+    categories = FIXED_EXPENSE_CATEGORIES if is_fixed else VARIABLE_EXPENSE_CATEGORIES
+    expense['category'] = questionary.select(
+        f"Select new expense category (current: {expense['category']}):",
+        choices=categories,
+        default=expense['category'] if expense['category'] in categories else None
+    ).ask()
+
+    expense['description'] = questionary.text(
+        f"Enter new description (current: {expense['description']}):",
+        default=expense['description']
+    ).ask()
+
+    if is_fixed:
+        expense['frequency'] = questionary.select(
+            f"Select new frequency (current: {expense['frequency']}):",
+            choices=EXPENSE_FREQUENCIES,
+            default=expense['frequency'] if expense['frequency'] in EXPENSE_FREQUENCIES else None
+        ).ask()
 
-    if not filtered:
-        console.print("[bold yellow]No expense entries match the filter.[/bold yellow]")
+    while True:
+        new_date_str = questionary.text(
+            f"Enter new date (YYYY-MM-DD, current: {expense['date']}):",
+            default=expense['date']
+        ).ask()
+        new_date = validate_date(new_date_str)
+        if new_date is not None:
+            expense['date'] = new_date.strftime('%Y-%m-%d')
+            break
+        console.print("Invalid date format. Use YYYY-MM-DD.", style="bold red")
+
+    with running_totals.updating() as totals:
+        try:
+            update_by_id(EXPENSE_FILE, {expense['row_id']: expense}, expected_version=version)
+        except (LedgerConflictError, KeyError):
+            console.print(CONFLICT_MESSAGE, style="bold red")
+            return
+        totals.update_expense(old_expense, expense)
+    console.print("[bold green]Expense entry updated successfully![/bold green]")
+    print_alerts(expense['date'][:7], totals)
+
+
+def delete_expense():
+    """Delete an expense entry, found by searching the ledger."""
+    import questionary
+    version = ledger_version(EXPENSE_FILE)
+    expense = find_entry(EXPENSE_FILE, 'expense', 'delete', EXPENSE_SEARCH_FIELDS, describe_expense)
+    if expense is None:
         return
 
-    filtered.sort(key=lambda x: x['date_obj'], reverse=True)
-
-    table = Table(title="Expense Entries")
-    table.add_column("Date", style="cyan", no_wrap=True)
-    table.add_column("Type", style="blue")
-    table.add_column("Category", style="magenta")
-    table.add_column("Amount (₹)", style="red", justify="right")
-    table.add_column("Description", style="white")
-    table.add_column("Frequency", style="green")
-
-    for entry in filtered:
-        table.add_row(
-            entry['date'],
-            entry['type'],
-            entry['category'],
-            f"{entry['amount']:.2f}",  # safe formatting
-            entry['description'],
-            entry['frequency']
-        )
-
-    console.print(table)
+    confirm = questionary.confirm(
+        f"Are you sure you want to delete this expense entry: {describe_expense(expense)}?",
+        default=False
+    ).ask()
+
+    if confirm:
+        with running_totals.updating() as totals:
+            try:
+                delete_by_id(EXPENSE_FILE, [expense['row_id']], expected_version=version)
+            except (LedgerConflictError, KeyError):
+                console.print(CONFLICT_MESSAGE, style="bold red")
+                return
+            totals.remove_expense(expense)
+        console.print("[bold green]Expense entry deleted successfully![/bold green]")
+    else:
+        console.print("[bold blue]Deletion cancelled.[/bold blue]")
@@ -0,0 +1,288 @@
+"""
+Bulk import of bank-statement CSVs.
+
+The statement is read as raw lines (one record per line) in fixed-size
+chunks; each chunk is parsed, validated (validate_amount / validate_date) and
+categorized in a worker process. All accepted rows are then written to the ledgers in one append per
+ledger, and rejected rows go to a side file instead of aborting the import.
+
+Debits become expenses, credits become income. Either give one signed amount
+column (negative = debit) or separate debit/credit columns; with separate
+columns the unused one may be empty or zero-filled ("0.00"), and a row with
+both filled is rejected. Categories come from keyword rules matched against
+the description.
+
+Run from the project root:
+    python -m features.importer.bank_import statement.csv --date-format %d/%m/%Y
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+from decimal import InvalidOperation
+
+from utils.helpers import rupees_to_paisa, validate_amount, validate_date
+from utils.storage import append_rows
+from features.input.income_input import INCOME_FILE, INCOME_FIELDS
+from features.expenses.expense_input import EXPENSE_FILE, EXPENSE_FIELDS, FIXED_EXPENSE_CATEGORIES
+from features.analytics import running_totals
+
+CHUNK_LINES = 50_000
+
+# Lower-case description keyword -> category (expenses) or source (income)
+DEFAULT_EXPENSE_RULES = {
+    'rent': 'Rent',
+    'electric': 'Bills',
+    'water': 'Bills',
+    'internet': 'Bills',
+    'mobile': 'Bills',
+    'grocery': 'Groceries',
+    'mart': 'Groceries',
+    'petrol': 'Petrol',
+    'fuel': 'Petrol',
+    'school': 'School Fees',
+    'tuition': 'School Fees',
+    'restaurant': 'Food',
+    'cafe': 'Food',
+    'food': 'Food',
+    'shop': 'Shopping',
+    'cinema': 'Entertainment',
+    'netflix': 'Entertainment',
+    'pharmacy': 'Health',
+    'hospital': 'Health',
+}
+DEFAULT_INCOME_RULES = {
+    'salary': 'Salary',
+    'payroll': 'Salary',
+    'freelance': 'Freelance',
+    'upwork': 'Freelance',
+    'scholarship': 'Scholarship',
+    'gift': 'Gift',
+}
+
+
+def categorize(description, rules, default='Other'):
+    text = description.lower()
+    for keyword, category in rules.items():
+        if keyword in text:
+            return category
+    return default
+
+
+def parse_date(raw, date_format):
+    if date_format is None:
+        return validate_date(raw)
+    try:
+        parsed = datetime.strptime(raw, date_format)
+    except ValueError:
+        return None
+    return validate_date(parsed.strftime('%Y-%m-%d'))
+
+
+def is_blank_amount(raw):
+    """True for an empty or zero debit/credit cell (exports often zero-fill the unused column)."""
+    if not raw:
+        return True
+    try:
+        return rupees_to_paisa(raw) == 0
+    except (InvalidOperation, ValueError):
+        return False
+
+
+def parse_chunk(task):
+    """
+    Worker: parses one chunk of statement lines.
+    Returns (incomes, expenses, rejected) where rejected holds (line_no, reason, raw_line).
+    """
+    first_line_no, lines, options = task
+    header = options['header']
+    incomes, expenses, rejected = [], [], []
+
+    for offset, values in enumerate(csv.reader(lines, delimiter=options['delimiter'])):
+        line_no = first_line_no + offset
+        raw_line = lines[offset].rstrip('\r\n')
+        if not values:
+            continue
+        if len(values) != len(header):
+            rejected.append((line_no, f"expected {len(header)} columns, got {len(values)}", raw_line))
+            continue
+        record = dict(zip(header, values))
+
+        date = parse_date(record.get(options['date_col'], '').strip(), options['date_format'])
+        if date is None:
+            rejected.append((line_no, "invalid date", raw_line))
+            continue
+
+        if options['amount_col']:
+            raw_amount = record.get(options['amount_col'], '').strip().replace(',', '')
+            is_debit = raw_amount.startswith('-')
+            raw_amount = raw_amount.lstrip('+-')
+        else:
+            debit = record.get(options['debit_col'], '').strip().replace(',', '')
+            credit = record.get(options['credit_col'], '').strip().replace(',', '')
+            is_debit = not is_blank_amount(debit)
+            if is_debit and not is_blank_amount(credit):
+                rejected.append((line_no, "both debit and credit amounts", raw_line))
+                continue
+            raw_amount = debit if is_debit else credit
+        amount = validate_amount(raw_amount)
+        if amount is None:
+            rejected.append((line_no, "invalid amount", raw_line))
+            continue
+
+        description = record.get(options['description_col'], '').strip()
+        if is_debit:
+            category = categorize(description, options['expense_rules'])
+            is_fixed = category in FIXED_EXPENSE_CATEGORIES and category != 'Other'
+            expenses.append({
+                'date': date.strftime('%Y-%m-%d'),
+                'type': 'Fixed' if is_fixed else 'Variable',
+                'category': category,
+                'amount_paisa': amount,
+                'description': description,
+                'frequency': 'one-time'
+            })
+        else:
+            incomes.append({
+                'date': date.strftime('%Y-%m-%d'),
+                'source': categorize(description, options['income_rules']),
+                'amount_paisa': amount,
+                'description': description
+            })
+    return incomes, expenses, rejected
+
+
+def read_chunks(file_path, options, chunk_lines=CHUNK_LINES):
+    """Yields (first_line_no, lines, options) tasks; line numbers are 1-based file lines."""
+    with open(file_path, 'r', newline='', encoding='utf-8-sig') as f:
+        header_line = f.readline()
+        options['header'] = [h.strip() for h in next(csv.reader(io.StringIO(header_line), delimiter=options['delimiter']))]
+        line_no = 2
+        chunk = []
+        for line in f:
+            chunk.append(line)
+            if len(chunk) == chunk_lines:
+                yield line_no, chunk, options
+                line_no += len(chunk)
+                chunk = []
+        if chunk:
+            yield line_no, chunk, options
+
+
+def import_statement(file_path, date_col='Date', amount_col=None, debit_col='Debit', credit_col='Credit',
+                     description_col='Description', date_format=None, delimiter=',',
+                     expense_rules=None, income_rules=None, workers=None, rejected_path=None,
+                     chunk_lines=CHUNK_LINES):
+    """
+    Imports a statement and returns a report dict with row counts, rows/sec and
+    the rejected-rows file (if any rows were rejected).
+    """
+    start = time.perf_counter()
+    options = {
+        'date_col': date_col,
+        'amount_col': amount_col,
+        'debit_col': debit_col,
+        'credit_col': credit_col,
+        'description_col': description_col,
+        'date_format': date_format,
+        'delimiter': delimiter,
+        'expense_rules': expense_rules or DEFAULT_EXPENSE_RULES,
+        'income_rules': income_rules or DEFAULT_INCOME_RULES,
+    }
+
+    incomes, expenses, rejected = [], [], []
+    tasks = read_chunks(file_path, options, chunk_lines)
+    if workers == 1:
+        _collect(map(parse_chunk, tasks), incomes, expenses, rejected)
+    else:
+        from concurrent.futures import ProcessPoolExecutor  # multiprocessing
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            _collect(pool.map(parse_chunk, tasks), incomes, expenses, rejected)
+
+    # One write per ledger for the whole import
+    with running_totals.updating() as totals:
+        if incomes:
+            append_rows(INCOME_FILE, incomes, INCOME_FIELDS)
+        if expenses:
+            append_rows(EXPENSE_FILE, expenses, EXPENSE_FIELDS)
+        for entry in incomes:
+            totals.add_income(entry)
+        for entry in expenses:
+            totals.add_expense(entry)
+
+    if rejected:
+        rejected_path = rejected_path or os.path.splitext(file_path)[0] + '.rejected.csv'
+        with open(rejected_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['line', 'reason', 'raw'])
+            writer.writerows(rejected)
+    else:
+        rejected_path = None
+
+    elapsed = time.perf_counter() - start
+    processed = len(incomes) + len(expenses) + len(rejected)
+    return {
+        'incomes': len(incomes),
+        'expenses': len(expenses),
+        'rejected': len(rejected),
+        'rejected_file': rejected_path,
+        'seconds': elapsed,
+        'rows_per_sec': processed / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _collect(results, incomes, expenses, rejected):
+    for chunk_incomes, chunk_expenses, chunk_rejected in results:
+        incomes.extend(chunk_incomes)
+        expenses.extend(chunk_expenses)
+        rejected.extend(chunk_rejected)
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Bulk import a bank-statement CSV.")
+    parser.add_argument('file', help="Statement CSV with a header row")
+    parser.add_argument('--date-col', default='Date')
+    parser.add_argument('--amount-col', help="Signed amount column (negative = debit); overrides --debit-col/--credit-col")
+    parser.add_argument('--debit-col', default='Debit')
+    parser.add_argument('--credit-col', default='Credit')
+    parser.add_argument('--description-col', default='Description')
+    parser.add_argument('--date-format', help="strptime format of the date column (default YYYY-MM-DD)")
+    parser.add_argument('--delimiter', default=',')
+    parser.add_argument('--rules', help="JSON file with {'expenses': {keyword: category}, 'income': {keyword: source}}")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count, 1 = no pool)")
+    parser.add_argument('--rejected', help="Where to write rejected rows (default: <file>.rejected.csv)")
+    return parser
+
+
+def run_from_args(args):
+    expense_rules = income_rules = None
+    if args.rules:
+        with open(args.rules, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        expense_rules = rules.get('expenses')
+        income_rules = rules.get('income')
+    return import_statement(
+        args.file,
+        date_col=args.date_col,
+        amount_col=args.amount_col,
+        debit_col=args.debit_col,
+        credit_col=args.credit_col,
+        description_col=args.description_col,
+        date_format=args.date_format,
+        delimiter=args.delimiter,
+        expense_rules=expense_rules,
+        income_rules=income_rules,
+        workers=args.workers,
+        rejected_path=args.rejected,
+    )
+
+
+if __name__ == '__main__':
+    report = run_from_args(build_parser().parse_args())
+    print(f"Imported {report['incomes']} income and {report['expenses']} expense rows "
+          f"in {report['seconds']:.2f}s ({report['rows_per_sec']:,.0f} rows/sec).")
+    if report['rejected']:
+        print(f"Rejected {report['rejected']} rows -> {report['rejected_file']}")
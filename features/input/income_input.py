@@ -1,16 +1,21 @@
-import questionary
 from datetime import datetime, timedelta
-from utils.helpers import load_data, save_data, validate_amount, validate_date
+from utils.helpers import LedgerConflictError, validate_amount, validate_date
+from utils.storage import ledger_version, update_by_id, delete_by_id, append_row
 from rich.console import Console
 from rich.table import Table
+from features.analytics import running_totals
+from features.input.search import find_entry
 
 INCOME_FILE = 'database/income.txt'
+INCOME_FIELDS = ['date', 'source', 'amount_paisa', 'description', 'row_id']
 INCOME_SOURCES = ['Salary', 'Freelance', 'Part-time', 'Gift', 'Scholarship', 'Other']
+CONFLICT_MESSAGE = "The income ledger was changed by another writer in the meantime. Nothing was saved; please try again."
 console = Console()
 
 
 def add_income():
     """Add a new income entry."""
+    import questionary  # prompt_toolkit
     console.print("--- Add New Income ---", style="bold cyan")
 
     # Get amount
@@ -41,105 +46,93 @@ def add_income():
     income_entry = {
         'date': date.strftime('%Y-%m-%d'),
         'source': source,
-        'amount': float(amount),  # store as float internally
+        'amount_paisa': amount,  # integer paisa
         'description': description if description else ''
     }
 
-    incomes = load_data(INCOME_FILE)
-    incomes.append(income_entry)
-
-    # Convert amounts to string for CSV storage
-    for entry in incomes:
-        entry['amount'] = str(entry['amount'])
-
-    save_data(INCOME_FILE, incomes)
+    with running_totals.updating() as totals:
+        append_row(INCOME_FILE, income_entry, INCOME_FIELDS)
+        totals.add_income(income_entry)
     console.print("[bold green]Income added successfully![/bold green]")
 
 
-def list_income(filter_option=None):
-    """List income entries with optional filters."""
-    incomes = load_data(INCOME_FILE)
-    if not incomes:
-        console.print("[bold yellow]No income entries found.[/bold yellow]")
-        return
-
-    # Convert amounts to float and parse dates
-    for entry in incomes:
-        entry['amount'] = float(entry['amount'])
-        entry['date_obj'] = datetime.strptime(entry['date'], '%Y-%m-%d')
-
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-
-    # Filtering
+def income_filters(filter_option=None, today=None):
+    """Storage filters (see storage.query_rows) for a list_income filter option."""
+    today = today or datetime.now().date()
     if filter_option == 'last_7_days':
-        filtered = [i for i in incomes if i['date_obj'] >= today - timedelta(days=7)]
-    elif filter_option == 'last_month':
-        filtered = [i for i in incomes if i['date_obj'] >= today - timedelta(days=30)]
-    elif filter_option and filter_option.startswith('source:'):
-        src = filter_option.split(':')[1]
-        filtered = [i for i in incomes if i['source'].lower() == src.lower()]
-    else:
-        filtered = incomes
-
-    if not filtered:
-        console.print("[bold yellow]No income entries match the filter.[/bold yellow]")
-        return
-
-    # Sort newest first
-    filtered.sort(key=lambda x: x['date_obj'], reverse=True)
-
-    # Display
-    table = Table(title="Income Entries")
-    table.add_column("Date", style="cyan", no_wrap=True)
-    table.add_column("Source", style="magenta")
-    table.add_column("Amount (₹)", style="green", justify="right")
-    table.add_column("Description", style="white")
-
-    for entry in filtered:
-        table.add_row(
-            entry['date'],
-            entry['source'],
-            f"{entry['amount']:.2f}",
-            entry['description']
-        )
-
-    console.print(table)
+        return {'date_from': (today - timedelta(days=7)).isoformat()}
+    if filter_option == 'last_month':
+        return {'date_from': (today - timedelta(days=30)).isoformat()}
+    if filter_option and filter_option.startswith('source:'):
+        return {'source': filter_option.split(':')[1]}
+    return {}
+
+
+def list_income(filter_option=None, page_size=None):
+    """List income entries with optional filters, newest first, one page at a time."""
+    from utils.pagination import PAGE_SIZE, iter_pages  # numpy
+    page_size = page_size or PAGE_SIZE
+    # Filters are pushed down into the storage backend, and only the page on screen is rendered
+    filters = income_filters(filter_option)
+    shown = 0
+    for page in iter_pages(INCOME_FILE, page_size, **filters):
+        if not page['total']:
+            if filters:
+                console.print("[bold yellow]No income entries match the filter.[/bold yellow]")
+            else:
+                console.print("[bold yellow]No income entries found.[/bold yellow]")
+            return
+
+        # Display
+        table = Table(title="Income Entries", caption=f"{shown + 1:,}-{shown + len(page['rows']):,} of {page['total']:,}")
+        table.add_column("Date", style="cyan", no_wrap=True)
+        table.add_column("Source", style="magenta")
+        table.add_column("Amount (₹)", style="green", justify="right")
+        table.add_column("Description", style="white")
+
+        for entry in page['rows']:
+            table.add_row(
+                entry['date'],
+                entry['source'],
+                f"{entry['amount_paisa'] / 100:.2f}",
+                entry['description']
+            )
+
+        console.print(table)
+        shown += len(page['rows'])
+        if page['next_cursor'] is None:
+            return
+        import questionary
+        if not questionary.confirm(f"Show the next {page_size}?", default=True).ask():
+            return
+
+
+def describe_income(income):
+    return f"{income['date']} | {income['source']} | {int(income['amount_paisa']) / 100:.2f} | {income['description']}"
 
 
 def update_income():
-    """Update an existing income entry."""
-    incomes = load_data(INCOME_FILE)
-    if not incomes:
-        console.print("[bold yellow]No income entries to update.[/bold yellow]")
-        return
-
-    # Convert amounts to float for display
-    for entry in incomes:
-        entry['amount'] = float(entry['amount'])
-
-    choices = [
-        f"{i+1}. {inc['date']} | {inc['source']} | {inc['amount']:.2f} | {inc['description']}"
-        for i, inc in enumerate(incomes)
-    ]
-
-    selected_choice = questionary.select("Select an income entry to update:", choices=choices).ask()
-    if selected_choice is None:
+    """Update an existing income entry, found by searching the ledger."""
+    import questionary
+    # Taken before the search, so a write made while the user picks fails the save
+    version = ledger_version(INCOME_FILE)
+    income = find_entry(INCOME_FILE, 'income', 'update', {'source': INCOME_SOURCES}, describe_income)
+    if income is None:
         return
+    old_income = dict(income)
 
-    index = int(selected_choice.split('.')[0]) - 1
-    income = incomes[index]
-
-    console.print(f"\n[bold blue]Updating entry:[/bold blue] {selected_choice}")
+    console.print(f"\n[bold blue]Updating entry:[/bold blue] {describe_income(income)}")
 
     # Update amount
     while True:
+        current_amount = f"{int(income['amount_paisa']) / 100:.2f}"
         new_amount_str = questionary.text(
-            f"Enter new amount (current: {income['amount']:.2f}):",
-            default=str(income['amount'])
+            f"Enter new amount (current: {current_amount}):",
+            default=current_amount
         ).ask()
         new_amount = validate_amount(new_amount_str)
         if new_amount is not None:
-            income['amount'] = float(new_amount)
+            income['amount_paisa'] = new_amount
             break
         console.print("Invalid amount. Enter a positive number.", style="bold red")
 
@@ -147,7 +140,7 @@ def update_income():
     new_source = questionary.select(
         f"Select new income source (current: {income['source']}):",
         choices=INCOME_SOURCES,
-        default=income['source']
+        default=income['source'] if income['source'] in INCOME_SOURCES else None
     ).ask()
     income['source'] = new_source
 
@@ -169,47 +162,37 @@ def update_income():
             break
         console.print("Invalid date format. Use YYYY-MM-DD.", style="bold red")
 
-    # Convert amounts to string before saving
-    for entry in incomes:
-        entry['amount'] = str(entry['amount'])
-
-    save_data(INCOME_FILE, incomes)
+    with running_totals.updating() as totals:
+        try:
+            update_by_id(INCOME_FILE, {income['row_id']: income}, expected_version=version)
+        except (LedgerConflictError, KeyError):
+            console.print(CONFLICT_MESSAGE, style="bold red")
+            return
+        totals.update_income(old_income, income)
     console.print("[bold green]Income entry updated successfully![/bold green]")
 
 
 def delete_income():
-    """Delete an income entry."""
-    incomes = load_data(INCOME_FILE)
-    if not incomes:
-        console.print("[bold yellow]No income entries to delete.[/bold yellow]")
-        return
-
-    for entry in incomes:
-        entry['amount'] = float(entry['amount'])
-
-    choices = [
-        f"{i+1}. {inc['date']} | {inc['source']} | {inc['amount']:.2f} | {inc['description']}"
-        for i, inc in enumerate(incomes)
-    ]
-
-    selected_choice = questionary.select("Select an income entry to delete:", choices=choices).ask()
-    if selected_choice is None:
+    """Delete an income entry, found by searching the ledger."""
+    import questionary
+    version = ledger_version(INCOME_FILE)
+    income = find_entry(INCOME_FILE, 'income', 'delete', {'source': INCOME_SOURCES}, describe_income)
+    if income is None:
         return
 
-    index = int(selected_choice.split('.')[0]) - 1
-    income = incomes[index]
-
     confirm = questionary.confirm(
-        f"Are you sure you want to delete this income entry: {selected_choice}?",
+        f"Are you sure you want to delete this income entry: {describe_income(income)}?",
         default=False
     ).ask()
 
     if confirm:
-        del incomes[index]
-        # Convert amounts to string before saving
-        for entry in incomes:
-            entry['amount'] = str(entry['amount'])
-        save_data(INCOME_FILE, incomes)
+        with running_totals.updating() as totals:
+            try:
+                delete_by_id(INCOME_FILE, [income['row_id']], expected_version=version)
+            except (LedgerConflictError, KeyError):
+                console.print(CONFLICT_MESSAGE, style="bold red")
+                return
+            totals.remove_income(income)
         console.print("[bold green]Income entry deleted successfully![/bold green]")
     else:
         console.print("[bold blue]Deletion cancelled.[/bold blue]")
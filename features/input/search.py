@@ -0,0 +1,82 @@
+"""
+Search-then-select prompts for picking one ledger entry to update or delete.
+
+Instead of offering the whole ledger as one questionary list, the user first
+narrows it down by date, by a field such as source or category, by amount, or
+asks for the most recent entries. The search is a utils.pagination query, so
+only the matching page is read and formatted. The chosen row carries its
+row_id, which storage.update_by_id / delete_by_id take.
+"""
+from datetime import datetime
+
+from rich.console import Console
+
+from utils.helpers import validate_amount, validate_date
+
+MAX_MATCHES = 20
+console = Console()
+
+
+def _ask_filters(noun, fields):
+    """Asks what to search by. Returns storage filters, or None if the user backed out."""
+    import questionary
+    choices = ['Most recent', 'Date', *(field.capitalize() for field in fields), 'Amount']
+    by = questionary.select(f"Find the {noun} entry by:", choices=choices).ask()
+    if by is None:
+        return None
+    if by == 'Most recent':
+        return {}
+    if by == 'Date':
+        while True:
+            date_str = questionary.text(
+                "Enter the date (YYYY-MM-DD):", default=datetime.now().strftime('%Y-%m-%d')
+            ).ask()
+            if date_str is None:
+                return None
+            date = validate_date(date_str)
+            if date is not None:
+                day = date.strftime('%Y-%m-%d')
+                return {'date_from': day, 'date_to': day}
+            console.print("Invalid date format. Use YYYY-MM-DD.", style="bold red")
+    if by == 'Amount':
+        while True:
+            amount_str = questionary.text("Enter the amount in Rupees:").ask()
+            if amount_str is None:
+                return None
+            amount = validate_amount(amount_str)
+            if amount is not None:
+                return {'amount_paisa': amount}
+            console.print("Invalid amount. Enter a positive number.", style="bold red")
+    field = by.lower()
+    value = questionary.select(f"Select the {field}:", choices=fields[field]).ask()
+    return None if value is None else {field: value}
+
+
+def find_entry(file_path, noun, action, fields, describe):
+    """
+    Lets the user search a ledger and pick one of at most MAX_MATCHES
+    matches, newest first. fields maps each text field the ledger can be
+    searched by to its choices (e.g. {'source': INCOME_SOURCES}); describe
+    formats a row as a choice. Returns the chosen row (with its row_id), or
+    None if the ledger is empty, nothing matched or the user backed out.
+    """
+    import questionary
+    from utils.pagination import page_rows  # numpy
+    if not page_rows(file_path, 1)['total']:
+        console.print(f"[bold yellow]No {noun} entries to {action}.[/bold yellow]")
+        return None
+    filters = _ask_filters(noun, fields)
+    if filters is None:
+        return None
+
+    result = page_rows(file_path, MAX_MATCHES, **filters)
+    if not result['rows']:
+        console.print(f"[bold yellow]No {noun} entries match.[/bold yellow]")
+        return None
+    if result['total'] > len(result['rows']):
+        console.print(f"Showing the newest {len(result['rows'])} of {result['total']:,} matches; "
+                      "narrow the search to find an older one.")
+    rows = {row['row_id']: row for row in result['rows']}
+    choices = [questionary.Choice(describe(row), value=row_id) for row_id, row in rows.items()]
+    selected = questionary.select(f"Select the {noun} entry to {action}:", choices=choices).ask()
+    return rows.get(selected)
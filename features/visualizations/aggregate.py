@@ -0,0 +1,129 @@
+"""
+Chart data reduction.
+
+Charts never get one point per ledger row. Dated amounts are first rolled up
+to day, week or month buckets (whichever is the finest that fits the visible
+range into TARGET_POINTS), then thinned with Largest-Triangle-Three-Buckets
+if there are still too many points. Pie charts fold the long tail of
+categories into a single "Other" slice.
+
+Dates are numpy datetime64[D] arrays and amounts int64 paisa throughout.
+"""
+import numpy as np
+
+TARGET_POINTS = 500
+MAX_SLICES = 8
+MIN_SLICE_SHARE = 0.02
+OTHER_LABEL = 'Other'
+GRANULARITY_LABELS = {'day': 'Daily', 'week': 'Weekly', 'month': 'Monthly'}
+
+
+def to_dates(values):
+    """YYYY-MM-DD strings (or anything numpy can parse) -> datetime64[D] array."""
+    return np.asarray(values, dtype='datetime64[D]')
+
+
+def bucket_starts(dates, granularity):
+    """First day of each date's bucket; weeks start on Monday."""
+    if granularity == 'day':
+        return dates
+    if granularity == 'week':
+        # 1970-01-01 was a Thursday, so shift by 3 to make Monday day 0
+        weekday = (dates.astype(np.int64) + 3) % 7
+        return dates - weekday.astype('timedelta64[D]')
+    if granularity == 'month':
+        return dates.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError(f"Unknown granularity {granularity!r}.")
+
+
+def pick_granularity(date_from, date_to, target_points=TARGET_POINTS):
+    """Finest of day/week/month that gives at most target_points buckets over the range."""
+    days = int((date_to - date_from).astype(np.int64)) + 1
+    if days <= target_points:
+        return 'day'
+    if days / 7 <= target_points:
+        return 'week'
+    return 'month'
+
+
+def rollup(dates, amounts, granularity):
+    """Sums amounts per bucket. Returns (bucket start dates, totals), sorted by date."""
+    keys = bucket_starts(dates, granularity)
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    # reduceat keeps the sums in exact int64 paisa
+    return keys[starts], np.add.reduceat(np.asarray(amounts, dtype=np.int64)[order], starts)
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Returns the indices of the (at most threshold) points to keep, first and last included.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket is the third corner of the triangle
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        keep[i + 1] = previous
+    return keep
+
+
+def chart_series(dates, amounts, date_from=None, date_to=None, target_points=TARGET_POINTS):
+    """
+    Reduces dated amounts to at most target_points points for a line chart.
+    Returns (dates, totals in paisa, granularity used).
+    """
+    dates = to_dates(dates)
+    amounts = np.asarray(amounts, dtype=np.int64)
+    if date_from is not None or date_to is not None:
+        visible = np.ones(len(dates), dtype=bool)
+        if date_from is not None:
+            visible &= dates >= np.datetime64(date_from, 'D')
+        if date_to is not None:
+            visible &= dates <= np.datetime64(date_to, 'D')
+        dates, amounts = dates[visible], amounts[visible]
+    if len(dates) == 0:
+        return dates, amounts, 'day'
+
+    granularity = pick_granularity(dates.min(), dates.max(), target_points)
+    buckets, totals = rollup(dates, amounts, granularity)
+    keep = lttb(buckets.astype(np.int64), totals, target_points)
+    return buckets[keep], totals[keep], granularity
+
+
+def fold_categories(labels, totals, max_slices=MAX_SLICES, min_share=MIN_SLICE_SHARE):
+    """
+    Keeps the largest categories (at most max_slices - 1, each at least min_share
+    of the total) and sums the rest into OTHER_LABEL. Returns (labels, totals), largest first.
+    """
+    labels = np.asarray(labels, dtype=object)
+    totals = np.asarray(totals, dtype=np.int64)
+    order = np.argsort(-totals, kind='stable')
+    labels, totals = labels[order], totals[order]
+    grand_total = totals.sum()
+    if len(labels) <= max_slices or grand_total == 0:
+        return labels.tolist(), totals.tolist()
+
+    kept = (np.arange(len(labels)) < max_slices - 1) & (totals >= min_share * grand_total)
+    # An existing 'Other' category joins the folded slice
+    kept &= labels != OTHER_LABEL
+    other_total = int(totals[~kept].sum())
+    return labels[kept].tolist() + [OTHER_LABEL], totals[kept].tolist() + [other_total]
@@ -1,7 +1,7 @@
-import matplotlib.pyplot as plt
 from collections import defaultdict
 from utils.helpers import load_data
 from features.analytics.cashflow_analysis import EXPENSE_FILE, INCOME_FILE, get_analytics_summary
+from features.visualizations.aggregate import GRANULARITY_LABELS, chart_series, fold_categories
 from datetime import datetime, timedelta
 # from rich.console import Console # Not needed for Streamlit output directly
 
@@ -20,22 +20,25 @@ def expense_pie_chart(expense_data):
 
     labels = []
     sizes = []
-    for category, total_paisa in category_totals.items():
+    # Small categories are folded into one 'Other' slice
+    for category, total_paisa in zip(*fold_categories(list(category_totals), list(category_totals.values()))):
         labels.append(f"{category} ({(total_paisa / 100):.2f})")
         sizes.append(total_paisa)
 
     if not sizes:
         return None
 
+    import matplotlib.pyplot as plt  # matplotlib
     fig1, ax1 = plt.subplots()
     ax1.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
     ax1.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
     plt.title("Expense Distribution by Category")
     return fig1
 
-def daily_burn_chart(expense_data):
+def daily_burn_chart(expense_data, date_from=None, date_to=None):
     """
-    Generates a line chart of daily variable expenses (daily burn rate) and returns the matplotlib figure.
+    Generates a line chart of variable expenses (daily burn rate) and returns the matplotlib figure.
+    Long ranges are rolled up to weeks or months and downsampled, see aggregate.chart_series.
     """
     if not expense_data:
         return None
@@ -48,13 +51,17 @@ def daily_burn_chart(expense_data):
     if not daily_variable_expenses:
         return None
 
-    # Sort dates and prepare data for plotting
-    dates = sorted(daily_variable_expenses.keys())
-    amounts = [daily_variable_expenses[date] / 100 for date in dates]
+    dates, totals, granularity = chart_series(
+        list(daily_variable_expenses), list(daily_variable_expenses.values()), date_from, date_to
+    )
+    if len(dates) == 0:
+        return None
+    amounts = totals / 100
 
+    import matplotlib.pyplot as plt
     fig = plt.figure(figsize=(10, 6))
-    plt.plot(dates, amounts, marker='o', linestyle='-')
-    plt.title("Daily Variable Expenses (Burn Rate)")
+    plt.plot(dates, amounts, marker='o' if len(dates) <= 60 else None, linestyle='-')
+    plt.title(f"{GRANULARITY_LABELS[granularity]} Variable Expenses (Burn Rate)")
     plt.xlabel("Date")
     plt.ylabel("Amount (Currency)")
     plt.xticks(rotation=45)
@@ -1,11 +1,19 @@
-import questionary
+import sys
+
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
 
-from features.input.income_input import add_income, list_income
-from features.expenses.expense_input import add_fixed_expense, add_variable_expense, list_expenses
-from features.analytics.cashflow_analysis import get_analytics_summary
+from features.input.income_input import INCOME_FILE, add_income, delete_income, list_income, update_income
+from features.expenses.expense_input import (
+    EXPENSE_FILE, FIXED_EXPENSE_CATEGORIES, VARIABLE_EXPENSE_CATEGORIES, add_fixed_expense, add_variable_expense,
+    delete_expense, list_expenses, update_expense,
+)
+from features.budgets.budgets import manage_budgets
+from features.analytics.running_totals import get_running_totals
+from utils.helpers import migrate_amounts_to_paisa
+from utils import instrument
+from utils.storage import migrate_row_ids, recover
 
 console = Console()
 
@@ -21,6 +29,7 @@ def display_welcome_message():
 
 def main_menu():
     """Displays the main menu and handles user choices."""
+    import questionary  # prompt_toolkit
     while True:
         choice = questionary.select(
             "What would you like to do?",
@@ -30,7 +39,12 @@ def main_menu():
                 "Add Variable Expense",
                 "List Income",
                 "List Expenses",
+                "Update Income",
+                "Delete Income",
+                "Update Expense",
+                "Delete Expense",
                 "View Cashflow Analysis",
+                "Budgets",
                 "Exit"
             ]
         ).ask()
@@ -45,15 +59,23 @@ def main_menu():
             list_income()
         elif choice == "List Expenses":
             list_expenses()
+        elif choice == "Update Income":
+            update_income()
+        elif choice == "Delete Income":
+            delete_income()
+        elif choice == "Update Expense":
+            update_expense()
+        elif choice == "Delete Expense":
+            delete_expense()
         elif choice == "View Cashflow Analysis":
-            summary = get_analytics_summary()
+            summary = get_running_totals().summary()
             if summary:
                 console.print(Panel("[bold blue]Cashflow Analysis Summary[/bold blue]", expand=False))
-                console.print(f"  [green]Total Income:[/green] ₹{summary.get('total_income', 0):,.2f}")
-                console.print(f"  [red]Fixed Expenses:[/red] ₹{summary.get('total_fixed', 0):,.2f}")
-                console.print(f"  [yellow]Variable Expenses:[/yellow] ₹{summary.get('daily_burn', 0) * summary.get('remaining_days_balance', 1):,.2f}")
-                console.print(f"  [bold green]Safe Balance:[/bold green] ₹{summary.get('safe_balance', 0):,.2f}")
-                console.print(f"  [yellow]Daily Burn Rate:[/yellow] ₹{summary.get('daily_burn', 0):,.2f}")
+                console.print(f"  [green]Total Income:[/green] ₹{summary.get('total_income', 0) / 100:,.2f}")
+                console.print(f"  [red]Fixed Expenses:[/red] ₹{summary.get('total_fixed', 0) / 100:,.2f}")
+                console.print(f"  [yellow]Variable Expenses:[/yellow] ₹{summary.get('variable_expenses', 0) / 100:,.2f}")
+                console.print(f"  [bold green]Safe Balance:[/bold green] ₹{summary.get('safe_balance', 0) / 100:,.2f}")
+                console.print(f"  [yellow]Daily Burn Rate:[/yellow] ₹{summary.get('daily_burn', 0) / 100:,.2f}")
                 console.print(f"  [magenta]Remaining Days Balance Can Last:[/magenta] {summary.get('remaining_days_balance', 0):.1f} days")
                 
                 # Stress Level
@@ -68,11 +90,27 @@ def main_menu():
             else:
                 console.print("[yellow]No cashflow data available to analyze.[/yellow]")
 
+        elif choice == "Budgets":
+            manage_budgets(list(dict.fromkeys(FIXED_EXPENSE_CATEGORIES + VARIABLE_EXPENSE_CATEGORIES)))
+
         elif choice == "Exit":
             console.print("[bold green]Thank you for using Cashflow Stress Scanner. Goodbye![/bold green]")
             break
 
 
 if __name__ == "__main__":
+    # --profile / --profile-memory / --profile-dump DIR go before the command
+    argv = instrument.from_argv(sys.argv[1:])
+    # Older ledgers stored Rupee floats; convert them to integer paisa once
+    for file_path in (INCOME_FILE, EXPENSE_FILE):
+        migrate_amounts_to_paisa(file_path)
+        # Finish whatever a crash left in the write-ahead log
+        recover(file_path)
+        # Rows saved before rows had ids get one, for the ID-keyed update and delete
+        migrate_row_ids(file_path)
+    if argv:
+        # Scripted use: python main.py summary|list|add|import ...
+        from features.cli import commands
+        sys.exit(commands.main(argv))
     display_welcome_message()
     main_menu()
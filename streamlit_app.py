@@ -1,42 +1,155 @@
 import streamlit as st
 from datetime import datetime
-import pandas as pd
-import time
-import plotly.express as px
-import plotly.graph_objects as go
-import json
 from pathlib import Path
 
-from utils.helpers import load_data, save_data, validate_amount
-from features.input.income_input import INCOME_FILE, INCOME_SOURCES
-from features.expenses.expense_input import EXPENSE_FILE, FIXED_EXPENSE_CATEGORIES, VARIABLE_EXPENSE_CATEGORIES, EXPENSE_FREQUENCIES
-from features.analytics.cashflow_analysis import get_analytics_summary
+from utils import instrument
+from utils.helpers import validate_amount, migrate_amounts_to_paisa
+from utils.storage import load_data, append_row, load_columns, ledger_fingerprint, migrate_row_ids, recover
+from features.input.income_input import INCOME_FILE, INCOME_FIELDS, INCOME_SOURCES
+from features.expenses.expense_input import EXPENSE_FILE, EXPENSE_FIELDS, FIXED_EXPENSE_CATEGORIES, VARIABLE_EXPENSE_CATEGORIES, EXPENSE_FREQUENCIES
+from features.analytics import running_totals
+from features.budgets import budgets
+from features.visualizations.aggregate import GRANULARITY_LABELS, chart_series, fold_categories
 
 # --- Initialize database files if missing ---
 for file_path in [INCOME_FILE, EXPENSE_FILE]:
     path = Path(file_path)
     if not path.exists():
         path.parent.mkdir(exist_ok=True)
-        with open(path, 'w') as f:
-            json.dump([], f)
+        path.touch()  # empty file; the header is written by the first append
+    migrate_amounts_to_paisa(file_path)
+    recover(file_path)  # finish whatever a crash left in the write-ahead log
+    migrate_row_ids(file_path)
 
 # --- Page Configuration ---
 st.set_page_config(layout="wide", page_title="Cashflow Stress Scanner", page_icon="💰")
 
+# Hidden diagnostics panel: open the app with ?diagnostics=1. Instrumentation
+# is process-wide, so it then times every session until the panel turns it off.
+show_diagnostics = st.query_params.get('diagnostics') == '1'
+if show_diagnostics and st.session_state.get('diagnostics_enabled', True):
+    instrument.enable(memory=st.session_state.get('diagnostics_memory', False))
+
 # --- Title ---
 st.title("💰 Cashflow Stress Scanner")
 st.markdown("Predict cash shortages before they happen. Analyze your income and expenses.")
 
-# --- Initialize session state ---
-if 'incomes' not in st.session_state:
-    st.session_state['incomes'] = load_data(INCOME_FILE) or []
+# --- Helper Functions ---
+def has_rows(file_path):
+    """Whether a ledger has any rows; reads one page of one row, not the ledger."""
+    from utils.pagination import page_rows  # numpy
+    return page_rows(file_path, 1)['total'] > 0
 
-if 'expenses' not in st.session_state:
-    st.session_state['expenses'] = load_data(EXPENSE_FILE) or []
+# pandas and plotly are imported inside the functions and tab that use them,
+# so a session with empty ledgers never loads them.
+# Everything derived from a ledger is cached under that ledger's fingerprint
+# (size, mtime and content hash), so a write to one file only invalidates the
+# entries built from it.
+@st.cache_data(max_entries=4, show_spinner=False)
+@instrument.timed('frame.load', measure=lambda df, *args: (len(df), 0))
+def load_frame(file_path, fingerprint):
+    """A ledger as a DataFrame sorted newest first, straight from the binary ledger when an up-to-date one exists."""
+    import pandas as pd
+    ledger = load_columns(file_path)
+    df = ledger.to_frame() if ledger is not None else pd.DataFrame(load_data(file_path))
+    if 'amount_paisa' not in df.columns:
+        df['amount_paisa'] = 0
+    df['amount_paisa'] = df['amount_paisa'].astype('int64')
+    df['Amount'] = df['amount_paisa'] / 100
+    return df.sort_values(by='date', ascending=False)
 
-# --- Helper Functions ---
-def refresh_data():
-    st.cache_data.clear()
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_summary(income_fingerprint, expense_fingerprint, day):
+    """Analytics summary; keyed on the day too, since the remaining days change daily."""
+    return running_totals.get_running_totals().summary()
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_month_burn(expense_fingerprint, day):
+    """This month's daily burn; partitioned ledgers answer it from the month manifest."""
+    from features.analytics.cashflow_analysis import month_daily_burn
+    return month_daily_burn()[0]
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_schedule(income_fingerprint, expense_fingerprint, day):
+    """Forecast inputs, rebuilt only when a ledger or the day changes; the projection itself runs on every rerun."""
+    from features.analytics import forecast
+    return forecast.build_schedule(load_data(INCOME_FILE), load_data(EXPENSE_FILE), day)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_simulation(income_fingerprint, expense_fingerprint, day, paths, seed):
+    """Monte Carlo runway; run in-process so the app never starts a process pool."""
+    from features.analytics import simulation
+    return simulation.simulate(load_data(INCOME_FILE), load_data(EXPENSE_FILE), day, paths=paths, seed=seed, workers=1)
+
+@st.cache_data(max_entries=2, show_spinner=False)
+@instrument.timed('frame.categories')
+def expense_categories(fingerprint):
+    """Per-category expense totals for the pie chart, long tail folded into 'Other'."""
+    import pandas as pd
+    totals = load_frame(EXPENSE_FILE, fingerprint).groupby('category', observed=True)['amount_paisa'].sum()
+    labels, paisa = fold_categories(totals.index, totals.to_numpy())
+    by_category = pd.DataFrame({'category': labels, 'amount_paisa': paisa})
+    by_category['Amount'] = by_category['amount_paisa'] / 100
+    return by_category
+
+@st.cache_data(max_entries=8, show_spinner=False)
+@instrument.timed('frame.trend')
+def expense_trend(fingerprint, date_from, date_to):
+    """Expense totals over the visible range, rolled up and downsampled to a bounded number of points."""
+    import pandas as pd
+    df_expense = load_frame(EXPENSE_FILE, fingerprint)
+    dates, paisa, granularity = chart_series(
+        pd.to_datetime(df_expense['date']).to_numpy(), df_expense['amount_paisa'].to_numpy(), date_from, date_to
+    )
+    trend = pd.DataFrame({'date': dates, 'amount_paisa': paisa})
+    trend['Amount'] = trend['amount_paisa'] / 100
+    return trend, granularity
+
+@st.cache_data(max_entries=4, show_spinner=False)
+@instrument.timed('frame.budget_history')
+def budget_history(fingerprint, limits):
+    """Every budget against every month of the expense ledger, in one vectorized pass."""
+    import pandas as pd
+    ledger = load_columns(EXPENSE_FILE)
+    history = budgets.evaluate_history(ledger if ledger is not None else load_data(EXPENSE_FILE), dict(limits))
+    df = pd.DataFrame(history['spent_paisa'] / 100, index=history['months'], columns=history['categories'])
+    return df.sort_index(ascending=False), history['status'][::-1]
+
+def show_budget_alerts(month, totals):
+    """A warning under the form for every budget the month is close to or over."""
+    for result in budgets.alerts(budgets.month_status(month, totals)):
+        label = "Over budget" if result['status'] == 'over' else "Budget warning"
+        st.warning(f"{label} for {month}: {budgets.describe(result)}", icon="⚠️")
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+def show_page(file_path, columns, key):
+    """
+    A ledger table, newest first, one page at a time. Only the rows on the page
+    are fetched and sent to the browser; utils.pagination keeps a date-sorted
+    index per ledger version, so turning pages doesn't re-read or re-sort it.
+    """
+    import pandas as pd
+    from utils.pagination import PAGE_SIZE, page_rows
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        size = st.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(PAGE_SIZE), key=f"{key}_size")
+    number = st.session_state.get(f"{key}_number", 1)
+    page = page_rows(file_path, size, page=number)
+    pages = max(1, -(-page['total'] // size))
+    if number > pages:
+        # The ledger shrank or the page size grew; show the last page instead of an empty one
+        number = st.session_state[f"{key}_number"] = pages
+        page = page_rows(file_path, size, page=number)
+    with col2:
+        st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key=f"{key}_number")
+    with instrument.stage('render.table') as rendering:
+        rendering.rows = len(page['rows'])
+        df = pd.DataFrame(page['rows'], columns=[c for c in columns if c != 'Amount'] + ['amount_paisa'])
+        df['Amount'] = df['amount_paisa'] / 100
+        st.dataframe(df[columns], hide_index=True)
+    first = (number - 1) * size
+    st.caption(f"Rows {first + 1:,}-{first + len(page['rows']):,} of {page['total']:,}")
 
 # --- Layout with Tabs ---
 tab1, tab2, tab3, tab4 = st.tabs(["Income", "Expenses", "Analytics", "Visualizations"])
@@ -63,24 +176,20 @@ with tab1:
                 income_entry = {
                     'date': income_date.strftime('%Y-%m-%d'),
                     'source': income_source,
-                    'amount': float(amount),
+                    'amount_paisa': amount,
                     'description': income_description if income_description else ''
                 }
-                st.session_state['incomes'].append(income_entry)
-                save_data(INCOME_FILE, st.session_state['incomes'])
-                refresh_data()
+                with running_totals.updating() as totals:
+                    append_row(INCOME_FILE, income_entry, INCOME_FIELDS)
+                    totals.add_income(income_entry)
                 st.success("Income added successfully! ✅")
             else:
                 st.error("Invalid amount. Please enter a positive number.")
 
     st.subheader("Current Income Entries")
-    if st.session_state['incomes']:
-        df_income = pd.DataFrame(st.session_state['incomes'])
-        if 'amount' not in df_income.columns:
-            df_income['amount'] = 0.0
-        df_income['Amount'] = df_income['amount'].astype(float)
-        st.dataframe(df_income[['date','source','Amount','description']].sort_values(by='date', ascending=False))
-        st.metric("Total Income", f"₹{df_income['Amount'].sum():,.2f}")
+    if has_rows(INCOME_FILE):
+        show_page(INCOME_FILE, ['date','source','Amount','description'], key='income_page')
+        st.metric("Total Income", f"₹{running_totals.get_running_totals().total_income / 100:,.2f}")
     else:
         st.info("No income entries yet.")
 
@@ -111,14 +220,15 @@ with tab2:
                     'date': fixed_expense_date.strftime('%Y-%m-%d'),
                     'type': 'Fixed',
                     'category': fixed_expense_category,
-                    'amount': float(amount),
+                    'amount_paisa': amount,
                     'description': fixed_expense_description if fixed_expense_description else '',
                     'frequency': fixed_expense_frequency
                 }
-                st.session_state['expenses'].append(expense_entry)
-                save_data(EXPENSE_FILE, st.session_state['expenses'])
-                refresh_data()
+                with running_totals.updating() as totals:
+                    append_row(EXPENSE_FILE, expense_entry, EXPENSE_FIELDS)
+                    totals.add_expense(expense_entry)
                 st.success("Fixed expense added successfully! ✅")
+                show_budget_alerts(expense_entry['date'][:7], totals)
             else:
                 st.error("Invalid amount. Please enter a positive number.")
 
@@ -143,43 +253,79 @@ with tab2:
                     'date': variable_expense_date.strftime('%Y-%m-%d'),
                     'type': 'Variable',
                     'category': variable_expense_category,
-                    'amount': float(amount),
+                    'amount_paisa': amount,
                     'description': variable_expense_description if variable_expense_description else '',
                     'frequency': 'one-time'
                 }
-                st.session_state['expenses'].append(expense_entry)
-                save_data(EXPENSE_FILE, st.session_state['expenses'])
-                refresh_data()
+                with running_totals.updating() as totals:
+                    append_row(EXPENSE_FILE, expense_entry, EXPENSE_FIELDS)
+                    totals.add_expense(expense_entry)
                 st.success("Variable expense added successfully! ✅")
+                show_budget_alerts(expense_entry['date'][:7], totals)
             else:
                 st.error("Invalid amount. Please enter a positive number.")
 
     st.subheader("Current Expense Entries")
-    if st.session_state['expenses']:
-        df_expense = pd.DataFrame(st.session_state['expenses'])
-        if 'amount' not in df_expense.columns:
-            df_expense['amount'] = 0.0
-        df_expense['Amount'] = df_expense['amount'].astype(float)
-        st.dataframe(df_expense[['date','type','category','Amount','description','frequency']].sort_values(by='date', ascending=False))
+    if has_rows(EXPENSE_FILE):
+        show_page(EXPENSE_FILE, ['date','type','category','Amount','description','frequency'], key='expense_page')
     else:
         st.info("No expense entries yet.")
 
+    st.markdown("---")
+    st.subheader("Monthly Budgets")
+    with st.form("set_budget_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            budget_category = st.selectbox("Category", list(dict.fromkeys(FIXED_EXPENSE_CATEGORIES + VARIABLE_EXPENSE_CATEGORIES)), key="budget_category")
+        with col2:
+            budget_amount_str = st.text_input("Monthly limit in Rupees (0 removes it)", key="budget_amount")
+        if st.form_submit_button("Set Budget"):
+            if budget_amount_str.strip() in ('0', '0.0', '0.00'):
+                budgets.set_budget(budget_category, 0)
+                st.success(f"Budget for {budget_category} removed.")
+            else:
+                limit = validate_amount(budget_amount_str)
+                if limit is not None:
+                    budgets.set_budget(budget_category, limit)
+                    st.success(f"Budget for {budget_category} set to ₹{limit / 100:,.2f} a month. ✅")
+                else:
+                    st.error("Invalid amount. Please enter a positive number, or 0.")
+
+    this_month = datetime.now().strftime('%Y-%m')
+    budget_results = budgets.month_status(this_month)
+    if budget_results:
+        import pandas as pd
+        df_budgets = pd.DataFrame(budget_results)
+        df_budgets['Spent'] = df_budgets['spent_paisa'] / 100
+        df_budgets['Limit'] = df_budgets['limit_paisa'] / 100
+        df_budgets['Remaining'] = df_budgets['remaining_paisa'] / 100
+        st.caption(f"Spending against each budget in {this_month}")
+        st.dataframe(df_budgets[['category', 'Spent', 'Limit', 'Remaining', 'percent', 'status']], hide_index=True)
+        with st.expander("Budget history"):
+            df_history, history_status = budget_history(
+                ledger_fingerprint(EXPENSE_FILE), tuple(budgets.load_budgets().items()))
+            if len(df_history):
+                st.caption(f"Spent per month (₹); {int((history_status == 2).sum()):,} budget-months over the limit")
+                st.dataframe(df_history)
+            else:
+                st.info("No expense entries yet.")
+    else:
+        st.info("No budgets set yet.")
+
 # -----------------------------
 # Tab 3: Analytics
 # -----------------------------
 with tab3:
     st.header("Cashflow Analytics")
-    summary = get_analytics_summary(
-        session_incomes=st.session_state.get('incomes', []),
-        session_expenses=st.session_state.get('expenses', [])
-    )
+    summary = load_summary(ledger_fingerprint(INCOME_FILE), ledger_fingerprint(EXPENSE_FILE), datetime.now().date())
 
     st.subheader("Monthly Summary (All amounts in ₹)")
-    st.write(f"**Total Income:** ₹{summary.get('total_income', 0):,.2f}")
-    st.write(f"**Fixed Expenses:** ₹{summary.get('total_fixed', 0):,.2f}")
-    st.write(f"**Variable Expenses:** ₹{summary.get('variable_expenses', 0):,.2f}")
-    st.write(f"**Safe Balance:** ₹{summary.get('safe_balance', 0):,.2f}")
-    st.write(f"**Daily Burn Rate:** ₹{summary.get('daily_burn', 0):,.2f} per day")
+    st.write(f"**Total Income:** ₹{summary.get('total_income', 0) / 100:,.2f}")
+    st.write(f"**Fixed Expenses:** ₹{summary.get('total_fixed', 0) / 100:,.2f}")
+    st.write(f"**Variable Expenses:** ₹{summary.get('variable_expenses', 0) / 100:,.2f}")
+    st.write(f"**Safe Balance:** ₹{summary.get('safe_balance', 0) / 100:,.2f}")
+    st.write(f"**Daily Burn Rate:** ₹{summary.get('daily_burn', 0) / 100:,.2f} per day")
+    st.write(f"**This Month's Daily Burn:** ₹{load_month_burn(ledger_fingerprint(EXPENSE_FILE), datetime.now().date()) / 100:,.2f} per day")
     st.write(f"**Remaining Days Balance Can Last:** {summary.get('remaining_days_balance', 0):.1f} days")
 
     stress_level = summary.get('stress_level', 'N/A')
@@ -189,37 +335,128 @@ with tab3:
         unsafe_allow_html=True
     )
 
+    st.subheader("Forecast")
+    if has_rows(INCOME_FILE) or has_rows(EXPENSE_FILE):
+        import pandas as pd
+        import plotly.express as px
+        from features.analytics import forecast
+        months_ahead = st.slider("Months ahead", 12, 24, 12, key="forecast_months")
+        schedule = load_schedule(ledger_fingerprint(INCOME_FILE), ledger_fingerprint(EXPENSE_FILE), datetime.now().date())
+        projection = forecast.project(schedule, months_ahead)
+        if projection['first_negative']:
+            st.error(f"Projected balance goes negative on {projection['first_negative']}.")
+        else:
+            st.success(f"Projected balance stays positive through {projection['dates'][-1]}.")
+
+        with instrument.stage('render.forecast') as rendering:
+            rendering.rows = len(projection['dates'])
+            df_balance = pd.DataFrame({'date': projection['dates'], 'Balance': projection['balance'] / 100})
+            fig_balance = px.line(df_balance, x='date', y='Balance', title='Projected Balance')
+            fig_balance.update_layout(xaxis_title='Date', yaxis_title='Balance (₹)')
+            st.plotly_chart(fig_balance, use_container_width=True)
+
+        df_months = pd.DataFrame(projection['months'])
+        for column in ['income', 'expenses', 'closing_balance', 'lowest_balance']:
+            df_months[column] = df_months[column] / 100
+        st.dataframe(df_months.rename(columns={
+            'month': 'Month', 'income': 'Income', 'expenses': 'Expenses',
+            'closing_balance': 'Closing Balance', 'lowest_balance': 'Lowest Balance', 'stress_level': 'Stress'
+        }))
+    else:
+        st.info("Add income and expense data to see a forecast.")
+
+    st.subheader("Spending Simulation")
+    if has_rows(EXPENSE_FILE):
+        col1, col2 = st.columns(2)
+        with col1:
+            paths = st.select_slider("Simulated paths", [1_000, 10_000, 50_000, 100_000], value=10_000, key="simulation_paths")
+        with col2:
+            seed = int(st.number_input("Seed", min_value=0, value=0, step=1, key="simulation_seed"))
+        simulated = load_simulation(
+            ledger_fingerprint(INCOME_FILE), ledger_fingerprint(EXPENSE_FILE), datetime.now().date(), paths, seed
+        )
+        if simulated['categories']:
+            runway = simulated['runway_days']
+            st.write(f"**Chance of running out this month:** {simulated['probability_run_out']:.1%}")
+            st.write(f"**Runway (days left: {simulated['days_left']}):** "
+                     f"{runway[5]:.0f} (5th percentile) · {runway[50]:.0f} (median) · {runway[95]:.0f} (95th percentile)")
+            st.write(f"**Month-end balance, median:** ₹{simulated['end_balance'][50] / 100:,.2f}")
+        else:
+            st.info("No variable spending in the last 180 days to simulate from.")
+    else:
+        st.info("Add expense data to run a spending simulation.")
+
 # -----------------------------
 # Tab 4: Visualizations
 # -----------------------------
 with tab4:
     st.header("Visualizations")
-    if st.session_state['expenses']:
-        df_expense['date'] = pd.to_datetime(df_expense['date'])
+    if has_rows(EXPENSE_FILE):
+        import pandas as pd
+        import plotly.express as px
+        # Sums are exact paisa, converted to Rupees only for display
+        expense_fingerprint = ledger_fingerprint(EXPENSE_FILE)
         # Expense Pie Chart
         st.subheader("Expense Distribution by Category")
-        expense_summary = df_expense.groupby('category')['Amount'].sum().reset_index()
-        fig_pie = px.pie(
-            expense_summary,
-            names='category',
-            values='Amount',
-            title='Expenses by Category',
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
-        fig_pie.update_traces(textinfo='percent+label')
-        st.plotly_chart(fig_pie, use_container_width=True)
+        expense_summary = expense_categories(expense_fingerprint)
+        with instrument.stage('render.pie') as rendering:
+            rendering.rows = len(expense_summary)
+            fig_pie = px.pie(
+                expense_summary,
+                names='category',
+                values='Amount',
+                title='Expenses by Category',
+                color_discrete_sequence=px.colors.qualitative.Pastel
+            )
+            fig_pie.update_traces(textinfo='percent+label')
+            st.plotly_chart(fig_pie, use_container_width=True)
 
         # Daily Burn Rate Chart
         st.subheader("Daily Burn Rate")
-        daily_expenses = df_expense.groupby('date')['Amount'].sum().reset_index()
-        fig_line = px.line(
-            daily_expenses,
-            x='date',
-            y='Amount',
-            title='Daily Expense Trend',
-            markers=True
+        expense_dates = pd.to_datetime(load_frame(EXPENSE_FILE, expense_fingerprint)['date'])
+        visible_range = st.date_input(
+            "Visible range", (expense_dates.min().date(), expense_dates.max().date()), key="chart_range"
         )
-        fig_line.update_layout(xaxis_title='Date', yaxis_title='Amount (₹)')
-        st.plotly_chart(fig_line, use_container_width=True)
+        # While a new range is being picked only its start is set
+        date_from, date_to = visible_range if len(visible_range) == 2 else (visible_range[0], None)
+        daily_expenses, granularity = expense_trend(expense_fingerprint, date_from, date_to)
+        with instrument.stage('render.trend') as rendering:
+            rendering.rows = len(daily_expenses)
+            fig_line = px.line(
+                daily_expenses,
+                x='date',
+                y='Amount',
+                title=f"{GRANULARITY_LABELS[granularity]} Expense Trend",
+                markers=len(daily_expenses) <= 60
+            )
+            fig_line.update_layout(xaxis_title='Date', yaxis_title='Amount (₹)')
+            st.plotly_chart(fig_line, use_container_width=True)
     else:
         st.info("Add income and expense data to see visualizations.")
+
+# -----------------------------
+# Diagnostics (hidden, ?diagnostics=1)
+# -----------------------------
+if show_diagnostics:
+    import pandas as pd
+    with st.sidebar:
+        st.header("Diagnostics")
+        if not st.checkbox("Record stage timings", value=True, key="diagnostics_enabled"):
+            instrument.disable()
+        st.checkbox("Track allocation peaks (slow)", value=False, key="diagnostics_memory")
+        if st.button("Reset counters"):
+            instrument.reset()
+        stage_stats = instrument.stats()
+        if stage_stats:
+            df_stats = pd.DataFrame.from_dict(stage_stats, orient='index')
+            st.dataframe(pd.DataFrame({
+                'Calls': df_stats['calls'],
+                'Total ms': (df_stats['seconds'] * 1000).round(1),
+                'Mean ms': (df_stats['seconds'] * 1000 / df_stats['calls'].clip(lower=1)).round(2),
+                'Max ms': (df_stats['max_seconds'] * 1000).round(2),
+                'Rows': df_stats['rows'],
+                'MB read': (df_stats['bytes'] / (1 << 20)).round(2),
+                'Peak KB': (df_stats['peak_bytes'] / 1024).round(0),
+            }))
+        else:
+            st.caption("Nothing recorded yet.")
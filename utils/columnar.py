@@ -0,0 +1,289 @@
+"""
+Columnar binary ledger format.
+
+A `.bin` file sits next to each pipe-delimited ledger (income.txt -> income.bin)
+and stores the same rows column by column:
+
+    amount_paisa  int64   amount in paisa
+    date          int32   proleptic Gregorian day ordinal (date.toordinal())
+    type, category, source, frequency
+                  uint8   codes into a per-file dictionary
+    description, row_id
+                  utf-8 blob + int64 offsets
+
+Layout: 8-byte magic, uint32 header length, JSON header, then each column
+aligned to 8 bytes. Reading maps the file with mmap and wraps every column in
+a NumPy array with no copy. write_table / read_table use the same layout for
+other sets of columns (e.g. the tenant stress report).
+
+The header records the file_version of the text ledger it was converted
+from, and load_columns only uses a copy whose version still matches, so a
+write to the text file can never be answered from a stale copy. With the
+write-ahead log every compaction rewrites an existing copy right after it
+folds the log, which keeps the fast path; other text writes leave the copy
+stale until the next to-bin.
+
+Convert from the command line (run from the project root):
+    python -m utils.columnar to-bin database/expenses.txt
+    python -m utils.columnar to-text database/expenses.bin
+"""
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+from datetime import date
+
+import numpy as np
+
+from utils import helpers, wal
+from utils.helpers import save_data
+
+MAGIC = b'CFLCOL1\0'
+ALIGNMENT = 8
+DICTIONARY_COLUMNS = ['type', 'category', 'source', 'frequency']
+MAX_DICTIONARY_SIZE = 256  # uint8 codes
+STRING_COLUMNS = ['description', 'row_id']
+
+
+def columnar_path(file_path):
+    """Returns the binary path that belongs to a text ledger."""
+    return os.path.splitext(file_path)[0] + '.bin'
+
+
+def is_fresh(header, file_path):
+    """True if a binary ledger's header says it was converted from the text ledger as it is now."""
+    return header.get('source_version') == list(helpers.file_version(file_path))
+
+
+class ColumnarLedger:
+    """Read-only view over a memory-mapped binary ledger."""
+
+    def __init__(self, columns, dictionaries, fieldnames, rows):
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self.fieldnames = fieldnames
+        self.rows = rows
+
+    def __len__(self):
+        return self.rows
+
+    def mask(self, name, value):
+        """Boolean mask of rows whose dictionary column equals value (case-insensitive)."""
+        if name not in self.columns:
+            return np.zeros(self.rows, dtype=bool)
+        codes = [i for i, v in enumerate(self.dictionaries[name]) if v.lower() == value.lower()]
+        return np.isin(self.columns[name], codes)
+
+    def decode(self, name):
+        """Returns the string values of a dictionary column as a NumPy object array."""
+        values = np.array(self.dictionaries[name], dtype=object)
+        return values[self.columns[name]]
+
+    def strings(self, name):
+        """The values of a string column (description, row_id) as a list of str."""
+        return decode_strings(self.columns[f'{name}_offsets'], self.columns[f'{name}_blob'])
+
+    def descriptions(self):
+        return self.strings('description')
+
+    def iter_rows(self):
+        """Yields rows as dictionaries in the text-file format."""
+        decoded = {name: self.decode(name) for name in DICTIONARY_COLUMNS if name in self.columns}
+        strings = {name: self.strings(name) for name in STRING_COLUMNS if name in self.fieldnames}
+        amounts = self.columns['amount_paisa']
+        dates = self.columns['date']
+        for i in range(self.rows):
+            row = {}
+            for field in self.fieldnames:
+                if field == 'date':
+                    row[field] = date.fromordinal(int(dates[i])).isoformat()
+                elif field == 'amount_paisa':
+                    row[field] = int(amounts[i])
+                elif field in strings:
+                    row[field] = strings[field][i]
+                else:
+                    row[field] = decoded[field][i]
+            yield row
+
+    def to_frame(self):
+        """Builds a pandas DataFrame shaped like pd.DataFrame(load_data(...))."""
+        import pandas as pd
+
+        epoch = date(1970, 1, 1).toordinal()
+        frame = {}
+        for field in self.fieldnames:
+            if field == 'date':
+                frame[field] = (self.columns['date'] - epoch).astype('datetime64[D]')
+            elif field == 'amount_paisa':
+                frame[field] = self.columns['amount_paisa']
+            elif field in STRING_COLUMNS:
+                frame[field] = self.strings(field)
+            else:
+                frame[field] = pd.Categorical.from_codes(self.columns[field], self.dictionaries[field])
+        return pd.DataFrame(frame)
+
+
+def write_columnar(bin_path, rows, fieldnames, source_version=None):
+    """
+    Encodes text-format rows and writes them as a binary ledger. source_version
+    is the file_version of the text ledger the rows came from, if any.
+    """
+    dict_fields = [f for f in fieldnames if f in DICTIONARY_COLUMNS]
+    dictionaries = {f: {} for f in dict_fields}
+    codes = {f: [] for f in dict_fields}
+    string_fields = [f for f in STRING_COLUMNS if f == 'description' or f in fieldnames]
+    amounts, dates = [], []
+    strings = {f: [] for f in string_fields}
+
+    for row in rows:
+        amounts.append(int(row['amount_paisa']))
+        dates.append(date.fromisoformat(row['date']).toordinal())
+        for f in dict_fields:
+            lookup = dictionaries[f]
+            value = row[f]
+            if value not in lookup:
+                if len(lookup) == MAX_DICTIONARY_SIZE:
+                    raise ValueError(f"Too many distinct values in column '{f}' (max {MAX_DICTIONARY_SIZE}).")
+                lookup[value] = len(lookup)
+            codes[f].append(lookup[value])
+        for f in string_fields:
+            strings[f].append(row.get(f) or '')
+
+    arrays = {
+        'amount_paisa': np.array(amounts, dtype=np.int64),
+        'date': np.array(dates, dtype=np.int32),
+    }
+    for f in dict_fields:
+        arrays[f] = np.array(codes[f], dtype=np.uint8)
+    for f in string_fields:
+        arrays[f'{f}_offsets'], arrays[f'{f}_blob'] = encode_strings(strings[f])
+    write_table(
+        bin_path, arrays,
+        rows=len(amounts),
+        fieldnames=list(fieldnames),
+        dictionaries={f: list(dictionaries[f]) for f in dict_fields},
+        source_version=list(source_version) if source_version is not None else None
+    )
+
+
+def write_table(bin_path, arrays, **header):
+    """
+    Writes a dict of 1-D NumPy arrays as a columnar file. Keyword arguments go
+    into the JSON header next to the column layout.
+    """
+    # Work out column offsets relative to the start of the data section
+    layout = []
+    position = 0
+    for name, array in arrays.items():
+        layout.append([name, array.dtype.str, position, len(array)])
+        position += _aligned(array.nbytes)
+
+    header = json.dumps(dict(header, columns=layout)).encode('utf-8')
+    preamble = len(MAGIC) + 4 + len(header)
+    padding = _aligned(preamble) - preamble
+
+    tmp_path = bin_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(b'\0' * padding)
+        for array in arrays.values():
+            f.write(array.tobytes())
+            f.write(b'\0' * (_aligned(array.nbytes) - array.nbytes))
+    os.replace(tmp_path, bin_path)
+
+
+def read_columnar(bin_path):
+    """Memory-maps a binary ledger and returns a ColumnarLedger backed by it."""
+    header, columns = read_table(bin_path)
+    return ColumnarLedger(columns, header['dictionaries'], header['fieldnames'], header['rows'])
+
+
+def read_table(bin_path):
+    """Memory-maps a columnar file; returns (JSON header, {column name: array})."""
+    with open(bin_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"{bin_path} is empty.")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{bin_path} is not a columnar ledger file.")
+    (header_len,) = struct.unpack_from('<I', buffer, len(MAGIC))
+    header_start = len(MAGIC) + 4
+    header = json.loads(buffer[header_start:header_start + header_len].decode('utf-8'))
+    data_start = _aligned(header_start + header_len)
+
+    columns = {}
+    for name, dtype, offset, count in header['columns']:
+        # np.frombuffer keeps a reference to the mmap, so it stays open as long as the arrays do
+        columns[name] = np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=data_start + offset)
+    return header, columns
+
+
+def encode_strings(values):
+    """Packs strings as (int64 offsets, utf-8 blob) columns, the way descriptions are stored."""
+    offsets, blob = [0], bytearray()
+    for value in values:
+        blob += value.encode('utf-8')
+        offsets.append(len(blob))
+    return np.array(offsets, dtype=np.int64), np.frombuffer(bytes(blob), dtype=np.uint8)
+
+
+def decode_strings(offsets, blob):
+    """Inverse of encode_strings: a list of str."""
+    blob = blob.tobytes()
+    return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+def load_columns(file_path):
+    """
+    Returns a ColumnarLedger for a text ledger if an up-to-date binary copy exists,
+    otherwise None so the caller can fall back to load_data.
+    """
+    bin_path = columnar_path(file_path)
+    if not os.path.exists(bin_path):
+        return None
+    header, columns = read_table(bin_path)
+    if not is_fresh(header, file_path):
+        return None
+    return ColumnarLedger(columns, header['dictionaries'], header['fieldnames'], header['rows'])
+
+
+def text_to_columnar(file_path, bin_path=None):
+    """Converts a pipe-delimited ledger into the binary format."""
+    bin_path = bin_path or columnar_path(file_path)
+    # Held so the version recorded is the one of the rows read
+    with helpers.ledger_lock(file_path):
+        # Fold the write-ahead log in first so the text file is complete
+        wal.compact(file_path)
+        version = helpers.file_version(file_path)
+        with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f, delimiter='|')
+            fieldnames = reader.fieldnames or []
+            write_columnar(bin_path, reader, fieldnames, source_version=version)
+    return bin_path
+
+
+def columnar_to_text(bin_path, file_path=None):
+    """Converts a binary ledger back into the pipe-delimited format."""
+    file_path = file_path or os.path.splitext(bin_path)[0] + '.txt'
+    ledger = read_columnar(bin_path)
+    save_data(file_path, list(ledger.iter_rows()))
+    return file_path
+
+
+def _aligned(size):
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] not in ('to-bin', 'to-text'):
+        print("Usage: python -m utils.columnar [to-bin|to-text] <path>")
+        sys.exit(1)
+    if sys.argv[1] == 'to-bin':
+        print(f"Wrote {text_to_columnar(sys.argv[2])}")
+    else:
+        print(f"Wrote {columnar_to_text(sys.argv[2])}")
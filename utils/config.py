@@ -0,0 +1,22 @@
+import os
+
+# Storage backend for the income/expense ledgers: 'text' (flat pipe-delimited
+# files in database/), 'partitioned' (one file per month, see utils.partitions)
+# or 'sqlite' (database/cashflow.db). Override with CASHFLOW_STORAGE.
+STORAGE_BACKEND = os.environ.get('CASHFLOW_STORAGE', 'text')
+SQLITE_FILE = os.environ.get('CASHFLOW_SQLITE_FILE', 'database/cashflow.db')
+
+# Text backend: adds, updates and deletes go to a write-ahead log next to each
+# ledger (database/income.wal, see utils.wal), which is folded back into the
+# ledger once it passes WAL_COMPACT_BYTES. CASHFLOW_WAL=0 rewrites the ledger
+# files directly instead.
+WAL_ENABLED = os.environ.get('CASHFLOW_WAL', '1') != '0'
+WAL_COMPACT_BYTES = int(os.environ.get('CASHFLOW_WAL_COMPACT_BYTES', 1 << 20))
+
+# Per-user ledgers (utils.tenants): database/tenants/<shard>/<user id>/, with
+# the shard picked by a hash of the user id. Changing TENANT_SHARDS moves every
+# tenant, so set it once per deployment. TENANT_CACHE_BYTES bounds the memory
+# held by parsed tenant ledgers.
+TENANT_ROOT = os.environ.get('CASHFLOW_TENANT_ROOT', 'database/tenants')
+TENANT_SHARDS = int(os.environ.get('CASHFLOW_TENANT_SHARDS', 256))
+TENANT_CACHE_BYTES = int(os.environ.get('CASHFLOW_TENANT_CACHE_BYTES', 256 << 20))
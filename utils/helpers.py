@@ -1,6 +1,31 @@
 import csv
 import os
+import secrets
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes stay atomic but are not serialized between processes
+    fcntl = None
+
+
+ROW_ID = 'row_id'  # stable id of a ledger row, assigned when it is added
+
+
+class LedgerConflictError(Exception):
+    """A ledger changed between load_for_update and the write that depended on it."""
+
+
+# Group commit state (see group_commit): items queued per key, and the per-key
+# slot that the thread doing the write holds.
+_commit_guard = threading.Lock()
+_commit_queues = {}
+_writer_slots = {}
+_held_locks = threading.local()  # .paths: the ledger locks this thread holds
+
 
 def load_data(file_path):
     """
@@ -17,35 +42,268 @@ def load_data(file_path):
             data.append(row)
     return data
 
-def save_data(file_path, data):
+def iter_rows(file_path, date_from=None, date_to=None, type=None, category=None, source=None):
+    """
+    Streams rows from a CSV file one at a time instead of loading the whole file.
+    amount_paisa is converted to int; dates stay as YYYY-MM-DD strings.
+    Optional filters are applied to the raw fields before a row dict is built:
+    date_from / date_to are inclusive YYYY-MM-DD bounds, type / category / source
+    are case-insensitive exact matches; a filter on a column the file doesn't
+    have is ignored.
+    """
+    if not os.path.exists(file_path):
+        return
+
+    with open(file_path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter='|')
+        header = next(reader, None)
+        if not header:
+            return
+        date_index = header.index('date') if 'date' in header else None
+        if date_index is None:
+            # Like the field filters below, a date filter on a ledger without dates is ignored
+            date_from = date_to = None
+        amount_index = header.index('amount_paisa') if 'amount_paisa' in header else None
+        matches = [
+            (header.index(name), value.lower())
+            for name, value in (('type', type), ('category', category), ('source', source))
+            if value is not None and name in header
+        ]
+
+        for raw in reader:
+            if date_from is not None and raw[date_index] < date_from:
+                continue
+            if date_to is not None and raw[date_index] > date_to:
+                continue
+            if any(raw[i].lower() != value for i, value in matches):
+                continue
+            row = dict(zip(header, raw))
+            if amount_index is not None:
+                row['amount_paisa'] = int(raw[amount_index])
+            yield row
+
+def iter_batches(file_path, batch_size=10000, **filters):
+    """
+    Streams rows from a CSV file as lists of at most batch_size rows.
+    Accepts the same filters as iter_rows.
+    """
+    batch = []
+    for row in iter_rows(file_path, **filters):
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def file_version(file_path):
+    """
+    (inode, size, mtime_ns) of a ledger file, or (0, 0, 0) if it doesn't exist
+    yet (a real version, so creating the file still counts as a change).
+    save_data replaces the file, so every write changes the inode or the size.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return (0, 0, 0)
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+@contextmanager
+def ledger_lock(file_path):
+    """
+    Exclusive advisory lock for writing a ledger, held on a sidecar
+    <file>.lock (the ledger itself is swapped out by os.replace, so a lock
+    on it would not outlive the first save). Re-entrant within a thread: a
+    nested ledger_lock on a file this thread already holds is a no-op.
+    """
+    if fcntl is None:
+        yield
+        return
+    held = _held_locks.__dict__.setdefault('paths', set())
+    key = os.path.abspath(file_path)
+    if key in held:
+        yield
+        return
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(file_path + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        held.add(key)
+        try:
+            yield
+        finally:
+            held.discard(key)
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def load_for_update(file_path):
+    """
+    Loads a ledger for a read-modify-write. Returns (rows, version); pass the
+    version to save_data so a write made in between is detected, not lost.
+    """
+    while True:
+        version = file_version(file_path)
+        data = load_data(file_path)
+        # Retry if an append landed while we were reading
+        if file_version(file_path) == version:
+            return data, version
+
+def save_data(file_path, data, expected_version=None):
     """
     Saves a list of dictionaries to a CSV file.
     The keys of the first dictionary are used as the header.
+    Writes a temp file and os.replace()s it under the ledger lock, so readers
+    never see a half-written file. Raises LedgerConflictError if
+    expected_version is given and the file changed since it was read.
+    Returns the new version.
     """
-    if not data:
-        with open(file_path, 'w', newline='', encoding='utf-8') as f:
-            pass
-        return
+    with ledger_lock(file_path):
+        if expected_version is not None and file_version(file_path) != expected_version:
+            raise LedgerConflictError(f"{file_path} was changed by another writer.")
+        tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            if data:
+                writer = csv.DictWriter(f, fieldnames=data[0].keys(), delimiter='|')
+                writer.writeheader()
+                writer.writerows(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        return file_version(file_path)
+
+def append_row(file_path, row, fieldnames):
+    """
+    Appends a single row to a CSV file without rewriting existing rows.
+    """
+    return append_rows(file_path, [row], fieldnames)
+
+def append_rows(file_path, rows, fieldnames, expected_version=None):
+    """
+    Appends rows to a CSV file in one fsync'd write under the ledger lock.
+    The header is only written when the file is new or empty.
+    Concurrent callers in this process are group-committed: whoever gets the
+    writer slot flushes every queued row in the same write. With
+    expected_version the rows are written on their own, after the same
+    conflict check as save_data. Returns the new version.
+    """
+    if expected_version is not None:
+        with ledger_lock(file_path):
+            if file_version(file_path) != expected_version:
+                raise LedgerConflictError(f"{file_path} was changed by another writer.")
+            return _append_locked(file_path, [(list(rows), fieldnames)])
+    return group_commit(file_path, (list(rows), fieldnames), lambda batches: _append_batches(file_path, batches))
+
+def group_commit(key, item, write):
+    """
+    Calls write(items) with item plus whatever other threads of this process
+    queued under the same key in the meantime, so concurrent writers share
+    one locked, fsync'd write. Every caller gets write's return value, or its
+    exception.
+    """
+    entry = {'item': item, 'done': False, 'error': None, 'result': None}
+    with _commit_guard:
+        _commit_queues.setdefault(key, []).append(entry)
+        writer_slot = _writer_slots.setdefault(key, threading.Lock())
+    with writer_slot:
+        if not entry['done']:
+            with _commit_guard:
+                batch = _commit_queues.pop(key)
+            try:
+                result = write([e['item'] for e in batch])
+            except Exception as e:
+                for pending in batch:
+                    pending['error'], pending['done'] = e, True
+                raise
+            for pending in batch:
+                pending['result'], pending['done'] = result, True
+    if entry['error'] is not None:
+        raise entry['error']
+    return entry['result']
+
+def _append_batches(file_path, batches):
+    with ledger_lock(file_path):
+        return _append_locked(file_path, batches)
+
+def _append_locked(file_path, batches):
+    is_new = not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+    with open(file_path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=batches[0][1], delimiter='|')
+        if is_new:
+            writer.writeheader()
+        for rows, _ in batches:
+            writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+    return file_version(file_path)
+
+def new_row_id():
+    """A random 16-hex-digit id for a new ledger row."""
+    return secrets.token_hex(8)
+
+def assign_row_ids(rows):
+    """
+    Gives every row that has no row_id yet a new one. The dicts are changed
+    in place, so the caller sees the ids it saved. Returns rows.
+    """
+    for row in rows:
+        if not row.get(ROW_ID):
+            row[ROW_ID] = new_row_id()
+    return rows
 
-    fieldnames = data[0].keys()
-    with open(file_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter='|')
-        writer.writeheader()
-        writer.writerows(data)
+def read_header(file_path):
+    """A ledger file's field names, or None if it doesn't exist or is empty."""
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, 'r', newline='', encoding='utf-8') as f:
+        header = f.readline().rstrip('\r\n')
+    return header.split('|') if header else None
 
 def validate_amount(amount_str):
     """
-    Validates if a string represents a positive number (float allowed, in Rupees).
-    Returns the float amount if valid, otherwise None.
+    Validates if a string represents a positive Rupee amount (decimals allowed).
+    Returns the amount as integer paisa if valid, otherwise None.
     """
     try:
-        amount = float(amount_str)
-        if amount > 0:
-            return amount
-    except ValueError:
-        pass
+        amount_paisa = rupees_to_paisa(amount_str)
+    except (InvalidOperation, ValueError):
+        return None
+    if amount_paisa > 0:
+        return amount_paisa
     return None
 
+def rupees_to_paisa(amount):
+    """
+    Converts a Rupee amount (string, int or float) to integer paisa.
+    Uses Decimal so values like '0.29' don't pick up float rounding errors.
+    """
+    rupees = Decimal(str(amount))
+    return int((rupees * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+def migrate_amounts_to_paisa(file_path):
+    """
+    Rewrites a ledger that still has a Rupee 'amount' column so it stores
+    integer 'amount_paisa' instead. Files already in paisa are left untouched.
+    Returns the number of rows migrated.
+    """
+    header = read_header(file_path)
+    if not header or 'amount' not in header or 'amount_paisa' in header:
+        return 0
+
+    rows = load_data(file_path)
+    migrated = []
+    for row in rows:
+        # Rebuild each row so amount_paisa keeps the old column's position
+        migrated.append({
+            ('amount_paisa' if key == 'amount' else key): (rupees_to_paisa(value) if key == 'amount' else value)
+            for key, value in row.items()
+        })
+    if migrated:
+        save_data(file_path, migrated)
+    else:
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            f.write('|'.join('amount_paisa' if h == 'amount' else h for h in header) + '\r\n')
+    return len(migrated)
+
 def validate_date(date_str):
     """
     Validates and parses a date string in YYYY-MM-DD format.
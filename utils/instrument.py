@@ -0,0 +1,254 @@
+"""
+Timing and counting for the load / analyze / render hot paths.
+
+Stages are marked with the @timed(name) decorator or a `with stage(name):`
+block. While instrumentation is enabled each stage records its calls, total
+and slowest time, rows processed and bytes read; with memory=True also the
+peak Python allocation inside it (tracemalloc, which slows everything down
+noticeably). While it is disabled, which is the default, a decorated function
+costs one global check per call and stage() returns a shared no-op context.
+
+Surfaces:
+    python main.py --profile summary          stage table on stderr at exit
+    python main.py --profile-memory ...       same, with allocation peaks
+    python main.py --profile-dump DIR ...     also cProfile + tracemalloc dumps in DIR
+    streamlit run streamlit_app.py, then open ?diagnostics=1   sidebar panel
+    CASHFLOW_PROFILE=1 (or =memory)           enable from the environment
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+_enabled = False
+_memory = False
+_owns_tracing = False  # tracemalloc was started by enable(memory=True), not by someone else
+_lock = threading.Lock()
+_local = threading.local()  # per-thread stack of open stages, for allocation peaks
+_stats = {}  # name -> [calls, seconds, max_seconds, rows, bytes, peak_bytes]
+
+
+def enable(memory=False):
+    """Starts recording. memory=True also tracks allocation peaks with tracemalloc."""
+    global _enabled, _memory, _owns_tracing
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _owns_tracing = True
+    elif not memory:
+        _stop_tracing()
+    _memory = memory
+    _enabled = True
+
+
+def disable():
+    global _enabled, _memory
+    _enabled = _memory = False
+    _stop_tracing()
+
+
+def _stop_tracing():
+    global _owns_tracing
+    if _owns_tracing:
+        tracemalloc.stop()
+        _owns_tracing = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def record(name, seconds=0.0, rows=0, size=0, peak=0, calls=1):
+    """Adds one observation of a stage (what stage() and timed() call on exit)."""
+    with _lock:
+        entry = _stats.get(name)
+        if entry is None:
+            entry = _stats[name] = [0, 0.0, 0.0, 0, 0, 0]
+        entry[0] += calls
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+        entry[3] += rows
+        entry[4] += size
+        entry[5] = max(entry[5], peak)
+
+
+def count(name, rows=0, size=0):
+    """Adds rows / bytes to a stage without timing anything."""
+    if _enabled:
+        record(name, rows=rows, size=size, calls=0)
+
+
+class _Stage:
+    __slots__ = ('name', 'rows', 'size', 'start', 'base', 'peak')
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = self.size = 0
+
+    def __enter__(self):
+        if _memory:
+            # reset_peak() would lose an enclosing stage's peak, so each open
+            # stage keeps the highest peak seen so far and passes it outwards
+            current, peak = tracemalloc.get_traced_memory()
+            stack = _local.__dict__.setdefault('stack', [])
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            stack.append(self)
+            tracemalloc.reset_peak()
+            self.base, self.peak = current, 0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        peak = 0
+        if _memory and getattr(_local, 'stack', None) and _local.stack[-1] is self:
+            _local.stack.pop()
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            peak = self.peak - self.base
+            if _local.stack:
+                _local.stack[-1].peak = max(_local.stack[-1].peak, self.peak)
+        record(self.name, seconds, self.rows, self.size, peak)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+    rows = size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name):
+    """
+    Context manager timing a block. Set .rows / .size on the value it returns
+    to record rows processed and bytes read.
+    """
+    return _Stage(name) if _enabled else _NO_STAGE
+
+
+def timed(name, measure=None):
+    """
+    Decorator timing every call of a function as stage `name`. measure, if
+    given, is called as measure(result, *args, **kwargs) while enabled and
+    returns (rows, bytes) for the call.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Stage(name) as current:
+                result = func(*args, **kwargs)
+                if measure is not None:
+                    current.rows, current.size = measure(result, *args, **kwargs)
+            return result
+        return wrapper
+    return decorate
+
+
+def stats():
+    """{stage: {calls, seconds, max_seconds, rows, bytes, peak_bytes}}, slowest first."""
+    with _lock:
+        items = sorted(_stats.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            name: dict(zip(['calls', 'seconds', 'max_seconds', 'rows', 'bytes', 'peak_bytes'], entry))
+            for name, entry in items
+        }
+
+
+def format_report():
+    """The stage table as text."""
+    lines = [f"{'stage':<28} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9} {'rows':>10}"
+             f" {'MB read':>8} {'peak KB':>9}"]
+    for name, entry in stats().items():
+        mean = entry['seconds'] / entry['calls'] if entry['calls'] else 0.0
+        peak = f"{entry['peak_bytes'] / 1024:>9,.0f}" if _memory else f"{'-':>9}"
+        lines.append(f"{name:<28} {entry['calls']:>7,} {entry['seconds'] * 1000:>10.1f} {mean * 1000:>9.2f}"
+                     f" {entry['max_seconds'] * 1000:>9.2f} {entry['rows']:>10,} {entry['bytes'] / (1 << 20):>8.2f} {peak}")
+    return '\n'.join(lines)
+
+
+def start_dump(directory):
+    """
+    Profiles the rest of the process with cProfile and tracemalloc. Returns a
+    function that writes profile.pstats, profile.txt, tracemalloc.txt and
+    stages.json into directory.
+    """
+    import cProfile
+    os.makedirs(directory, exist_ok=True)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def finish():
+        import pstats
+        profiler.disable()
+        profiler.dump_stats(os.path.join(directory, 'profile.pstats'))
+        with open(os.path.join(directory, 'profile.txt'), 'w', encoding='utf-8') as f:
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(40)
+        snapshot = tracemalloc.take_snapshot()
+        with open(os.path.join(directory, 'tracemalloc.txt'), 'w', encoding='utf-8') as f:
+            current, peak = tracemalloc.get_traced_memory()
+            f.write(f"current {current:,} bytes, peak {peak:,} bytes\n\n")
+            for statistic in snapshot.statistics('lineno')[:40]:
+                f.write(f"{statistic}\n")
+        with open(os.path.join(directory, 'stages.json'), 'w', encoding='utf-8') as f:
+            json.dump(stats(), f, indent=2)
+    return finish
+
+
+def from_argv(argv):
+    """
+    Handles leading --profile, --profile-memory and --profile-dump DIR flags:
+    enables instrumentation and arranges for the report (and dumps) at exit.
+    Returns the remaining arguments.
+    """
+    import atexit
+    argv = list(argv)
+    memory = profile = False
+    dump = None
+    while argv and argv[0].startswith('--profile'):
+        flag = argv.pop(0)
+        if flag == '--profile':
+            profile = True
+        elif flag == '--profile-memory':
+            profile = memory = True
+        elif flag == '--profile-dump' and argv:
+            profile = True
+            dump = argv.pop(0)
+        else:
+            raise SystemExit(f"Unknown option {flag}; use --profile, --profile-memory or --profile-dump DIR")
+    if profile:
+        enable(memory)
+        finish = start_dump(dump) if dump else None
+
+        def report():
+            if finish is not None:
+                finish()
+            print(format_report(), file=sys.stderr)
+        atexit.register(report)
+    return argv
+
+
+_mode = os.environ.get('CASHFLOW_PROFILE', '')
+if _mode and _mode != '0':
+    enable(memory=_mode == 'memory')
@@ -0,0 +1,59 @@
+"""
+One-off ledger migrations.
+
+Run from the project root:
+    python -m utils.migrate paisa        # Rupee 'amount' column -> integer 'amount_paisa'
+    python -m utils.migrate partitions   # Flat ledgers -> database/<ledger>/YYYY-MM.txt
+    python -m utils.migrate row_ids      # A row_id for every row, including every tenant's ledgers
+"""
+import sys
+
+from utils import partitions, storage, tenants
+from utils.helpers import migrate_amounts_to_paisa
+
+INCOME_FILE = 'database/income.txt'
+EXPENSE_FILE = 'database/expenses.txt'
+
+
+def migrate_paisa():
+    for file_path in (INCOME_FILE, EXPENSE_FILE):
+        count = migrate_amounts_to_paisa(file_path)
+        print(f"{file_path}: migrated {count} rows to amount_paisa")
+
+
+def migrate_partitions():
+    for file_path in (INCOME_FILE, EXPENSE_FILE):
+        count = partitions.migrate_flat_file(file_path)
+        months = len(partitions.read_manifest(file_path)['partitions'])
+        print(f"{file_path}: split {count} rows into {months} month partitions")
+    print("The flat files are kept as a backup. Set CASHFLOW_STORAGE=partitioned to use the partitions.")
+
+
+def migrate_row_ids():
+    # The app does this for the shared ledgers at startup, but not for tenants'
+    ledgers = [INCOME_FILE, EXPENSE_FILE]
+    for user_id in tenants.iter_user_ids():
+        tenant = tenants.Tenant(user_id)
+        ledgers += [tenant.income_file, tenant.expense_file]
+    migrated = 0
+    for file_path in ledgers:
+        count = storage.migrate_row_ids(file_path)
+        storage.release(file_path)
+        if count:
+            print(f"{file_path}: gave {count} rows a row_id")
+            migrated += 1
+    print(f"{migrated} of {len(ledgers)} ledgers needed row ids")
+
+
+MIGRATIONS = {
+    'paisa': migrate_paisa,
+    'partitions': migrate_partitions,
+    'row_ids': migrate_row_ids,
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2 or sys.argv[1] not in MIGRATIONS:
+        print(f"Usage: python -m utils.migrate [{'|'.join(MIGRATIONS)}]")
+        sys.exit(1)
+    MIGRATIONS[sys.argv[1]]()
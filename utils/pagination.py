@@ -0,0 +1,178 @@
+"""
+Paged listings of a ledger, newest first.
+
+page_rows() returns one page of matching rows plus the total and a cursor for
+the next page. Pages can be asked for by number (page=3) or by cursor; a
+cursor is the last row's key, "YYYY-MM-DD:position", so paging by cursor is
+not thrown off by rows added in the meantime (they are newer, so they sort
+before it).
+
+SQLite answers a page with one keyset query on its date index. For the text
+and partitioned backends the ledger is read once into a LedgerIndex: the
+rows plus their order by (date, position), built with one stable sort. It is
+kept until the ledger's stamp changes, so scrolling through pages, or
+switching filters, costs a binary search and a slice instead of a re-read and
+a re-sort. The same index maps row ids to ledger positions for
+storage.update_by_id / delete_by_id.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils import storage
+
+PAGE_SIZE = 50
+MAX_INDEXES = 8  # ledgers whose index is kept in memory (two per tenant in use)
+MATCH_FIELDS = ['type', 'category', 'source']
+
+
+def encode_cursor(date, position):
+    return f"{date}:{position}"
+
+
+def decode_cursor(cursor):
+    """'YYYY-MM-DD:position' -> (date, position). Raises ValueError for anything else."""
+    date, sep, position = str(cursor).rpartition(':')
+    if not sep or not date:
+        raise ValueError(f"Invalid cursor {cursor!r}.")
+    return date, int(position)
+
+
+class LedgerIndex:
+    """A ledger's rows in file order plus their positions sorted by (date, position)."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        dates = np.array([row['date'] for row in rows], dtype=str)
+        # Stable, so rows on the same day stay in file order
+        self.order = np.argsort(dates, kind='stable')
+        self.dates = dates[self.order]
+        self._fields = {}  # field -> lowercased values in sorted order
+        self._masks = {}   # (field, value) -> bool array in sorted order
+        self._amounts = None  # amount_paisa in sorted order
+        self._positions = None  # row_id -> position in rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _mask(self, field, value):
+        key = (field, value.lower())
+        mask = self._masks.get(key)
+        if mask is None:
+            values = self._fields.get(field)
+            if values is None:
+                column = np.array([str(self.rows[i].get(field, '')) for i in self.order], dtype=str)
+                values = self._fields[field] = np.char.lower(column)
+            mask = self._masks[key] = values == key[1]
+        return mask
+
+    def position(self, row_id):
+        """Index in rows (and in load_data's list) of the row with this row_id, or None."""
+        if self._positions is None:
+            self._positions = {row.get('row_id'): i for i, row in enumerate(self.rows)}
+        return self._positions.get(row_id)
+
+    def _amount_mask(self, amount_paisa):
+        if self._amounts is None:
+            self._amounts = np.array([int(self.rows[i]['amount_paisa']) for i in self.order], dtype=np.int64)
+        return self._amounts == int(amount_paisa)
+
+    def page(self, limit=PAGE_SIZE, cursor=None, page=None, date_from=None, date_to=None, amount_paisa=None,
+             **matches):
+        """Same arguments and result as page_rows(); filters match utils.helpers.iter_rows."""
+        lo = int(np.searchsorted(self.dates, date_from, 'left')) if date_from is not None else 0
+        hi = int(np.searchsorted(self.dates, date_to, 'right')) if date_to is not None else len(self.dates)
+        hi = max(lo, hi)
+        mask = None
+        fields = self.rows[0].keys() if self.rows else ()
+        for field in MATCH_FIELDS:
+            # Like iter_rows, a filter on a column the ledger doesn't have is ignored
+            if matches.get(field) is not None and field in fields:
+                field_mask = self._mask(field, matches[field])[lo:hi]
+                mask = field_mask if mask is None else mask & field_mask
+        if amount_paisa is not None and self.rows:
+            amount_mask = self._amount_mask(amount_paisa)[lo:hi]
+            mask = amount_mask if mask is None else mask & amount_mask
+        # Sorted slots that match, oldest first
+        slots = np.arange(lo, hi) if mask is None else lo + np.flatnonzero(mask)
+        total = len(slots)
+
+        if cursor is not None:
+            date, position = decode_cursor(cursor)
+            start = int(np.searchsorted(self.dates, date, 'left'))
+            end = int(np.searchsorted(self.dates, date, 'right'))
+            # Within one day the sorted positions are ascending
+            cut = start + int(np.searchsorted(self.order[start:end], position, 'left'))
+            slots = slots[:np.searchsorted(slots, cut, 'left')]
+        offset = (page - 1) * limit if page else 0
+        stop = max(0, len(slots) - offset)
+        window = slots[max(0, stop - limit):stop][::-1]
+
+        rows = [dict(self.rows[self.order[slot]]) for slot in window]
+        next_cursor = None
+        if len(window) and stop - len(window) > 0:
+            last = window[-1]
+            next_cursor = encode_cursor(self.dates[last], int(self.order[last]))
+        return {'rows': rows, 'total': total, 'next_cursor': next_cursor}
+
+
+_indexes = OrderedDict()  # ledger path -> (stamp, LedgerIndex), least recently used first
+_lock = threading.Lock()
+
+
+def ledger_index(file_path):
+    """The LedgerIndex for a ledger's current contents, built on first use and after every change."""
+    # Taken before reading, so a write during the read leaves it stale and forces a rebuild next time
+    stamp = storage.ledger_stamp(file_path)
+    with _lock:
+        cached = _indexes.get(file_path)
+        if cached is not None and cached[0] == stamp:
+            _indexes.move_to_end(file_path)
+            return cached[1]
+    index = LedgerIndex(list(storage.iter_rows(file_path)))
+    with _lock:
+        _indexes[file_path] = (stamp, index)
+        _indexes.move_to_end(file_path)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def page_rows(file_path, limit=PAGE_SIZE, cursor=None, page=None, **filters):
+    """
+    One page of a ledger's rows, newest first: {'rows', 'total', 'next_cursor'}.
+    total counts every row matching the filters (date_from, date_to, type,
+    category, source as in storage.query_rows, and amount_paisa for an exact
+    amount); next_cursor is None on the
+    last page. Give either a 1-based page number or the previous page's
+    next_cursor; neither means the first page.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1.")
+    if page is not None and page < 1:
+        raise ValueError("page must be at least 1.")
+    if storage.use_sqlite():
+        from utils import sqlite_store
+        after = decode_cursor(cursor) if cursor is not None else None
+        offset = (page - 1) * limit if page else 0
+        table = sqlite_store.table_for(file_path)
+        db_path = storage.sqlite_file(file_path)
+        # One row more than asked for tells whether there is a next page
+        keyed = sqlite_store.page_rows(table, limit + 1, offset, after, db_path=db_path, **filters)
+        rows = [row for _, row in keyed[:limit]]
+        next_cursor = encode_cursor(keyed[limit - 1][1]['date'], keyed[limit - 1][0]) if len(keyed) > limit else None
+        return {'rows': rows, 'total': sqlite_store.count_rows(table, db_path=db_path, **filters),
+                'next_cursor': next_cursor}
+    return ledger_index(file_path).page(limit, cursor, page, **filters)
+
+
+def iter_pages(file_path, limit=PAGE_SIZE, **filters):
+    """Every page of a listing in turn, following the cursors."""
+    cursor = None
+    while True:
+        result = page_rows(file_path, limit, cursor, **filters)
+        yield result
+        cursor = result['next_cursor']
+        if cursor is None:
+            return
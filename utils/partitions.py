@@ -0,0 +1,225 @@
+"""
+Month-partitioned ledgers.
+
+A flat ledger such as database/expenses.txt is stored as one pipe-delimited
+file per year-month in a directory of the same name:
+
+    database/expenses/2026-09.txt
+    database/expenses/2026-10.txt
+    database/expenses/manifest.json
+
+The manifest lists every partition with its row count, total paisa and (for
+expenses) per-type totals, so month-level totals never have to open a data
+file. Readers with a date range only open the partitions that overlap it.
+"""
+import json
+import os
+from collections import defaultdict
+
+from utils import helpers, wal
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def partition_dir(file_path):
+    """database/expenses.txt -> database/expenses"""
+    return os.path.splitext(file_path)[0]
+
+
+def partition_path(file_path, month):
+    return os.path.join(partition_dir(file_path), f"{month}.txt")
+
+
+def manifest_path(file_path):
+    return os.path.join(partition_dir(file_path), MANIFEST_NAME)
+
+
+def read_manifest(file_path):
+    path = manifest_path(file_path)
+    if not os.path.exists(path):
+        return {'fieldnames': None, 'partitions': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_manifest(file_path, manifest):
+    path = manifest_path(file_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def months_in_range(manifest, date_from=None, date_to=None):
+    """Partitions (YYYY-MM, ascending) that can hold rows between the two dates."""
+    months = sorted(manifest['partitions'])
+    if date_from is not None:
+        months = [m for m in months if m >= date_from[:7]]
+    if date_to is not None:
+        months = [m for m in months if m <= date_to[:7]]
+    return months
+
+
+def _group_by_month(rows):
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row['date'][:7]].append(row)
+    return grouped
+
+
+def _add_to_entry(entry, rows):
+    for row in rows:
+        amount = int(row['amount_paisa'])
+        entry['rows'] += 1
+        entry['total_paisa'] += amount
+        if 'type' in row:
+            entry['by_type'][row['type']] = entry['by_type'].get(row['type'], 0) + amount
+
+
+def _empty_entry():
+    return {'rows': 0, 'total_paisa': 0, 'by_type': {}}
+
+
+def ledger_version(file_path):
+    """Every partition write rewrites the manifest, so its version stands for the whole ledger."""
+    return helpers.file_version(manifest_path(file_path))
+
+
+def _check_version(file_path, expected_version):
+    if expected_version is not None and ledger_version(file_path) != expected_version:
+        raise helpers.LedgerConflictError(f"{partition_dir(file_path)} was changed by another writer.")
+
+
+def append_rows(file_path, rows, fieldnames, expected_version=None):
+    """Appends rows to their month partitions and updates the manifest. Returns the new version."""
+    with helpers.ledger_lock(manifest_path(file_path)):
+        _check_version(file_path, expected_version)
+        manifest = read_manifest(file_path)
+        manifest['fieldnames'] = list(fieldnames)
+        for month, month_rows in _group_by_month(rows).items():
+            helpers.append_rows(partition_path(file_path, month), month_rows, fieldnames)
+            entry = manifest['partitions'].setdefault(month, _empty_entry())
+            _add_to_entry(entry, month_rows)
+        write_manifest(file_path, manifest)
+        return ledger_version(file_path)
+
+
+def save_data(file_path, data, expected_version=None):
+    """Rewrites every partition from a full list of rows (update/delete path). Returns the new version."""
+    with helpers.ledger_lock(manifest_path(file_path)):
+        _check_version(file_path, expected_version)
+        old_manifest = read_manifest(file_path)
+        manifest = {'fieldnames': list(data[0].keys()) if data else old_manifest['fieldnames'], 'partitions': {}}
+        grouped = _group_by_month(data)
+        for month, month_rows in grouped.items():
+            helpers.save_data(partition_path(file_path, month), month_rows)
+            entry = manifest['partitions'][month] = _empty_entry()
+            _add_to_entry(entry, month_rows)
+        for month in old_manifest['partitions']:
+            if month not in grouped:
+                os.remove(partition_path(file_path, month))
+        write_manifest(file_path, manifest)
+        return ledger_version(file_path)
+
+
+def rewrite_by_id(file_path, months, changes, deleted=(), expected_version=None):
+    """
+    Replaces (changes: {row_id: new row}) and deletes (deleted: row ids) rows
+    by row_id, rewriting only the given months (the ones that hold those rows)
+    and any month a changed date moves a row into. A changed row keeps its
+    place unless it moves. Raises KeyError, and writes nothing, if an id isn't
+    in those months. Returns the new version.
+    """
+    deleted = set(deleted)
+    with helpers.ledger_lock(manifest_path(file_path)):
+        _check_version(file_path, expected_version)
+        manifest = read_manifest(file_path)
+        loaded = {month: helpers.load_data(partition_path(file_path, month))
+                  for month in months if month in manifest['partitions']}
+        present = {row.get(helpers.ROW_ID) for rows in loaded.values() for row in rows}
+        for row_id in (*changes, *deleted):
+            if row_id not in present:
+                raise KeyError(f"No row {row_id} in {partition_dir(file_path)}.")
+
+        rewritten, moved = {}, []
+        for month, rows in loaded.items():
+            kept = rewritten[month] = []
+            for row in rows:
+                row_id = row.get(helpers.ROW_ID)
+                if row_id in deleted:
+                    continue
+                if row_id in changes:
+                    row = changes[row_id]
+                    if row['date'][:7] != month:
+                        moved.append(row)
+                        continue
+                kept.append(row)
+        for row in moved:
+            month = row['date'][:7]
+            if month not in rewritten:
+                exists = month in manifest['partitions']
+                rewritten[month] = helpers.load_data(partition_path(file_path, month)) if exists else []
+            rewritten[month].append(row)
+
+        for month, rows in rewritten.items():
+            if rows:
+                helpers.save_data(partition_path(file_path, month), rows)
+                entry = manifest['partitions'][month] = _empty_entry()
+                _add_to_entry(entry, rows)
+            elif month in manifest['partitions']:
+                os.remove(partition_path(file_path, month))
+                del manifest['partitions'][month]
+        write_manifest(file_path, manifest)
+        return ledger_version(file_path)
+
+
+def iter_rows(file_path, date_from=None, date_to=None, **filters):
+    """Streams rows like helpers.iter_rows, opening only partitions inside the date range."""
+    manifest = read_manifest(file_path)
+    for month in months_in_range(manifest, date_from, date_to):
+        yield from helpers.iter_rows(partition_path(file_path, month), date_from=date_from, date_to=date_to, **filters)
+
+
+def load_data(file_path):
+    return list(iter_rows(file_path))
+
+
+def load_for_update(file_path):
+    """(rows, version) for a read-modify-write, see helpers.load_for_update."""
+    while True:
+        version = ledger_version(file_path)
+        data = load_data(file_path)
+        if ledger_version(file_path) == version:
+            return data, version
+
+
+def month_totals(file_path, date_from=None, date_to=None):
+    """Manifest entries ({'rows', 'total_paisa', 'by_type'}) per month; opens no data files."""
+    manifest = read_manifest(file_path)
+    return {month: manifest['partitions'][month] for month in months_in_range(manifest, date_from, date_to)}
+
+
+def migrate_flat_file(file_path):
+    """
+    Splits a flat ledger into month partitions (replacing any existing ones).
+    The flat file is left in place as a backup. Returns the number of rows moved.
+    """
+    # Fold the write-ahead log in first so the flat file is complete
+    wal.compact(file_path)
+    manifest = read_manifest(file_path)
+    for month in manifest['partitions']:
+        os.remove(partition_path(file_path, month))
+    if os.path.exists(manifest_path(file_path)):
+        os.remove(manifest_path(file_path))
+
+    fieldnames = None
+    if os.path.exists(file_path):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            header = f.readline().rstrip('\r\n')
+        fieldnames = header.split('|') if header else None
+
+    count = 0
+    for batch in helpers.iter_batches(file_path, batch_size=100_000):
+        append_rows(file_path, batch, fieldnames)
+        count += len(batch)
+    return count
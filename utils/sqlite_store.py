@@ -0,0 +1,330 @@
+"""
+SQLite storage backend for the income and expense ledgers.
+
+Each ledger is a table with the same columns as its text file plus an
+integer primary key. Date, type, category and source are indexed (text
+columns use NOCASE so the case-insensitive filters can use the indexes), and
+row_id has a unique index for the ID-keyed updates and deletes.
+The database runs in WAL mode, inserts are batched into one transaction,
+and every query uses a fixed parameterized statement, which sqlite3 keeps
+in its prepared-statement cache.
+
+The pipe-delimited files stay the import/export format:
+    python -m utils.sqlite_store import    # database/*.txt -> database/cashflow.db
+    python -m utils.sqlite_store export    # database/cashflow.db -> database/*.txt
+"""
+import os
+import sqlite3
+import sys
+import threading
+
+from utils import wal
+from utils.config import SQLITE_FILE
+from utils.helpers import ROW_ID, LedgerConflictError, iter_batches, new_row_id, save_data
+
+TABLES = {
+    'income': ['date', 'source', 'amount_paisa', 'description', 'row_id'],
+    'expenses': ['date', 'type', 'category', 'amount_paisa', 'description', 'frequency', 'row_id'],
+}
+FILTER_COLUMNS = ['type', 'category', 'source']
+BUSY_TIMEOUT = 30  # seconds a writer waits for another process's transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS income (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    source TEXT NOT NULL COLLATE NOCASE,
+    amount_paisa INTEGER NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    row_id TEXT
+);
+CREATE INDEX IF NOT EXISTS income_date ON income (date);
+CREATE INDEX IF NOT EXISTS income_source ON income (source, date);
+
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    type TEXT NOT NULL COLLATE NOCASE,
+    category TEXT NOT NULL COLLATE NOCASE,
+    amount_paisa INTEGER NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    frequency TEXT NOT NULL DEFAULT 'one-time',
+    row_id TEXT
+);
+CREATE INDEX IF NOT EXISTS expenses_date ON expenses (date);
+CREATE INDEX IF NOT EXISTS expenses_type ON expenses (type, date);
+CREATE INDEX IF NOT EXISTS expenses_category ON expenses (category, date);
+
+CREATE TABLE IF NOT EXISTS ledger_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+# Created after _add_row_ids, which adds the column to older databases
+ROW_ID_INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS income_row_id ON income (row_id);
+CREATE UNIQUE INDEX IF NOT EXISTS expenses_row_id ON expenses (row_id);
+"""
+
+_local = threading.local()  # one connection per thread (Streamlit runs sessions on threads)
+
+
+def connect(db_path=SQLITE_FILE):
+    """Returns this thread's connection to the ledger database, creating the schema on first use."""
+    if not hasattr(_local, 'connections'):
+        _local.connections = {}
+    conn = _local.connections.get(db_path)
+    if conn is None:
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Writers from other processes queue on the lock instead of failing
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+        conn.row_factory = sqlite3.Row
+        # Switching the journal mode needs an exclusive lock; skip it once it is set
+        if conn.execute('PRAGMA journal_mode').fetchone()[0] != 'wal':
+            conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        _add_row_ids(conn)
+        conn.executescript(ROW_ID_INDEXES)
+        _local.connections[db_path] = conn
+    return conn
+
+
+def _add_row_ids(conn):
+    """Adds the row_id column to tables created before it existed and gives every row an id."""
+    for table in TABLES:
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if ROW_ID in columns:
+            continue
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Another process may have migrated it while we waited for the lock
+            if ROW_ID in [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]:
+                continue
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN row_id TEXT")
+            conn.execute(f"UPDATE {table} SET row_id = lower(hex(randomblob(8)))")
+            _bump_version(conn, table, None)
+
+
+def close(db_path=SQLITE_FILE):
+    """Closes this thread's connection to a database, if it has one."""
+    conn = getattr(_local, 'connections', {}).pop(db_path, None)
+    if conn is not None:
+        conn.close()
+
+
+def table_for(file_path):
+    """Maps a ledger path (database/income.txt) to its table name (income)."""
+    table = os.path.splitext(os.path.basename(file_path))[0]
+    if table not in TABLES:
+        raise ValueError(f"No SQLite table for ledger {file_path}.")
+    return table
+
+
+def _insert(conn, table, rows):
+    columns = TABLES[table]
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    # Rows from older text ledgers have no row_id yet
+    conn.executemany(sql, ([row.get(c, '') for c in columns[:-1]] + [row.get(ROW_ID) or new_row_id()]
+                           for row in rows))
+
+
+def _version(conn, table):
+    row = conn.execute("SELECT version FROM ledger_versions WHERE name = ?", (table,)).fetchone()
+    return row[0] if row else 0
+
+
+def _bump_version(conn, table, expected_version):
+    """Checks and bumps a table's version inside the caller's write transaction."""
+    version = _version(conn, table)
+    if expected_version is not None and version != expected_version:
+        raise LedgerConflictError(f"{table} was changed by another writer.")
+    conn.execute(
+        "INSERT INTO ledger_versions (name, version) VALUES (?, 1) "
+        "ON CONFLICT (name) DO UPDATE SET version = version + 1", (table,)
+    )
+    return version + 1
+
+
+def table_version(table, db_path=SQLITE_FILE):
+    """Counter bumped by every write to the table; the SQLite counterpart of helpers.file_version."""
+    return _version(connect(db_path), table)
+
+
+def insert_rows(table, rows, db_path=SQLITE_FILE, expected_version=None):
+    """Inserts rows in a single transaction. Returns the table's new version."""
+    conn = connect(db_path)
+    with conn:
+        # IMMEDIATE takes the write lock before the version is read
+        conn.execute("BEGIN IMMEDIATE")
+        version = _bump_version(conn, table, expected_version)
+        _insert(conn, table, rows)
+    return version
+
+
+def replace_rows(table, rows, db_path=SQLITE_FILE, expected_version=None):
+    """Replaces the whole table in one transaction (used by update and delete). Returns the new version."""
+    conn = connect(db_path)
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        version = _bump_version(conn, table, expected_version)
+        conn.execute(f"DELETE FROM {table}")
+        _insert(conn, table, rows)
+    return version
+
+
+def update_by_id(table, changes, db_path=SQLITE_FILE, expected_version=None):
+    """
+    Replaces rows by row_id ({row_id: new row}) in one transaction, touching
+    only those rows. Raises KeyError for an id the table doesn't have (and
+    changes nothing). Returns the new version.
+    """
+    columns = TABLES[table][:-1]
+    sql = f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in columns)} WHERE row_id = ?"
+    conn = connect(db_path)
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        version = _bump_version(conn, table, expected_version)
+        for row_id, row in changes.items():
+            if conn.execute(sql, [row.get(c, '') for c in columns] + [row_id]).rowcount == 0:
+                raise KeyError(f"No row {row_id} in {table}.")
+    return version
+
+
+def delete_by_id(table, row_ids, db_path=SQLITE_FILE, expected_version=None):
+    """Deletes rows by row_id in one transaction. Raises KeyError for an unknown id. Returns the new version."""
+    conn = connect(db_path)
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        version = _bump_version(conn, table, expected_version)
+        for row_id in row_ids:
+            if conn.execute(f"DELETE FROM {table} WHERE row_id = ?", (row_id,)).rowcount == 0:
+                raise KeyError(f"No row {row_id} in {table}.")
+    return version
+
+
+def load_for_update(table, db_path=SQLITE_FILE):
+    """(rows, version) read in one transaction, for replace_rows(expected_version=...)."""
+    conn = connect(db_path)
+    with conn:
+        conn.execute("BEGIN")
+        version = _version(conn, table)
+        rows = [dict(row) for row in conn.execute(f"SELECT {', '.join(TABLES[table])} FROM {table} ORDER BY id")]
+    return rows, version
+
+
+def _where(table, date_from=None, date_to=None, amount_paisa=None, **matches):
+    clauses, params = [], []
+    if date_from is not None:
+        clauses.append("date >= ?")
+        params.append(date_from)
+    if date_to is not None:
+        clauses.append("date <= ?")
+        params.append(date_to)
+    for column in FILTER_COLUMNS:
+        value = matches.get(column)
+        if value is not None and column in TABLES[table]:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if amount_paisa is not None:
+        clauses.append("amount_paisa = ?")
+        params.append(int(amount_paisa))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def query_rows(table, date_from=None, date_to=None, type=None, category=None, source=None,
+               newest_first=False, db_path=SQLITE_FILE):
+    """
+    Yields matching rows as dicts in the text-file column order.
+    Filters mirror utils.helpers.iter_rows and are answered from the indexes.
+    """
+    where, params = _where(table, date_from, date_to, type=type, category=category, source=source)
+    order = " ORDER BY date DESC, id DESC" if newest_first else " ORDER BY id"
+    sql = f"SELECT {', '.join(TABLES[table])} FROM {table}{where}{order}"
+    cursor = connect(db_path).execute(sql, params)
+    while True:
+        batch = cursor.fetchmany(1000)
+        if not batch:
+            return
+        for row in batch:
+            yield dict(row)
+
+
+def page_rows(table, limit, offset=0, after=None, date_from=None, date_to=None, type=None, category=None,
+              source=None, amount_paisa=None, db_path=SQLITE_FILE):
+    """
+    One page of matching rows, newest first, as [(id, row), ...]. after is the
+    (date, id) of the last row of the previous page; the date index answers
+    it without counting through the rows before. amount_paisa matches an
+    exact amount.
+    """
+    where, params = _where(table, date_from, date_to, amount_paisa, type=type, category=category, source=source)
+    if after is not None:
+        where += (" AND " if where else " WHERE ") + "(date < ? OR (date = ? AND id < ?))"
+        params += [after[0], after[0], after[1]]
+    sql = (f"SELECT id, {', '.join(TABLES[table])} FROM {table}{where} "
+           f"ORDER BY date DESC, id DESC LIMIT ? OFFSET ?")
+    result = []
+    for row in connect(db_path).execute(sql, params + [limit, offset]):
+        row = dict(row)
+        result.append((row.pop('id'), row))
+    return result
+
+
+def count_rows(table, date_from=None, date_to=None, type=None, category=None, source=None, amount_paisa=None,
+               db_path=SQLITE_FILE):
+    where, params = _where(table, date_from, date_to, amount_paisa, type=type, category=category, source=source)
+    return connect(db_path).execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+
+
+def period_totals(table, group_by=None, date_from=None, date_to=None, db_path=SQLITE_FILE):
+    """
+    SUM(amount_paisa) over an optional date range, optionally grouped by a column.
+    Returns an int, or a {group: int} dict when group_by is given.
+    """
+    where, params = _where(table, date_from, date_to)
+    conn = connect(db_path)
+    if group_by is None:
+        (total,) = conn.execute(f"SELECT COALESCE(SUM(amount_paisa), 0) FROM {table}{where}", params).fetchone()
+        return total
+    if group_by not in TABLES[table]:
+        raise ValueError(f"Cannot group {table} by {group_by}.")
+    sql = f"SELECT {group_by}, SUM(amount_paisa) FROM {table}{where} GROUP BY {group_by}"
+    return {key: total for key, total in conn.execute(sql, params)}
+
+
+def import_text(file_path, db_path=SQLITE_FILE):
+    """Loads a pipe-delimited ledger into its table, replacing what was there."""
+    # Fold the write-ahead log in first so the text file is complete
+    wal.compact(file_path)
+    table = table_for(file_path)
+    conn = connect(db_path)
+    count = 0
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _bump_version(conn, table, None)
+        conn.execute(f"DELETE FROM {table}")
+        for batch in iter_batches(file_path):
+            _insert(conn, table, batch)
+            count += len(batch)
+    return count
+
+
+def export_text(file_path, db_path=SQLITE_FILE):
+    """Writes a table back out as a pipe-delimited ledger."""
+    rows = list(query_rows(table_for(file_path), db_path=db_path))
+    save_data(file_path, rows)
+    return len(rows)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2 or sys.argv[1] not in ('import', 'export'):
+        print("Usage: python -m utils.sqlite_store [import|export]")
+        sys.exit(1)
+    for ledger in ('database/income.txt', 'database/expenses.txt'):
+        if sys.argv[1] == 'import':
+            print(f"{ledger}: imported {import_text(ledger)} rows")
+        else:
+            print(f"{ledger}: exported {export_text(ledger)} rows")
@@ -0,0 +1,365 @@
+"""
+Backend-aware ledger access.
+
+Exposes the same read/write functions as utils.helpers, keyed by the ledger's
+text path (database/income.txt, database/expenses.txt). utils.config.STORAGE_BACKEND
+picks where they go: 'text' uses the flat pipe-delimited files (through the
+write-ahead log in utils.wal unless config.WAL_ENABLED is off), 'partitioned'
+the month partitions in utils.partitions, and 'sqlite' utils.sqlite_store.
+"""
+import hashlib
+import os
+
+from utils import config, helpers, instrument, partitions, wal
+
+# utils.columnar (NumPy) and utils.sqlite_store (sqlite3) are imported where
+# they are used, so the text backend starts without them.
+
+
+def use_sqlite():
+    return config.STORAGE_BACKEND == 'sqlite'
+
+
+def use_partitions():
+    return config.STORAGE_BACKEND == 'partitioned'
+
+
+def use_wal():
+    return config.STORAGE_BACKEND == 'text' and config.WAL_ENABLED
+
+
+def sqlite_file(file_path):
+    """
+    SQLite database that holds a ledger: config.SQLITE_FILE, except for tenant
+    ledgers (under config.TENANT_ROOT, see utils.tenants), which keep their own
+    next to them.
+    """
+    if os.path.abspath(file_path).startswith(os.path.abspath(config.TENANT_ROOT) + os.sep):
+        return os.path.join(os.path.dirname(file_path), os.path.basename(config.SQLITE_FILE))
+    return config.SQLITE_FILE
+
+
+def release(file_path):
+    """Closes any handle this thread keeps open for a tenant ledger (its SQLite connection)."""
+    if not use_sqlite():
+        return
+    db_path = sqlite_file(file_path)
+    if db_path != config.SQLITE_FILE:
+        from utils import sqlite_store
+        sqlite_store.close(db_path)
+
+
+def _measure_load(rows, file_path):
+    return len(rows), ledger_bytes(file_path)
+
+
+@instrument.timed('load_data', measure=_measure_load)
+def load_data(file_path):
+    if use_sqlite():
+        from utils import sqlite_store
+        return list(sqlite_store.query_rows(sqlite_store.table_for(file_path), db_path=sqlite_file(file_path)))
+    if use_partitions():
+        return partitions.load_data(file_path)
+    if use_wal():
+        return wal.load_data(file_path)
+    return helpers.load_data(file_path)
+
+
+@instrument.timed('load_for_update', measure=lambda result, file_path: _measure_load(result[0], file_path))
+def load_for_update(file_path):
+    """
+    (rows, version) for a read-modify-write. Passing the version back to
+    save_data raises helpers.LedgerConflictError instead of losing a write
+    that happened in between.
+    """
+    if use_sqlite():
+        from utils import sqlite_store
+        return sqlite_store.load_for_update(sqlite_store.table_for(file_path), sqlite_file(file_path))
+    if use_partitions():
+        return partitions.load_for_update(file_path)
+    if use_wal():
+        return wal.load_for_update(file_path)
+    return helpers.load_for_update(file_path)
+
+
+def ledger_version(file_path):
+    """Current version of a ledger, as returned by load_for_update and the write functions."""
+    if use_sqlite():
+        from utils import sqlite_store
+        return sqlite_store.table_version(sqlite_store.table_for(file_path), sqlite_file(file_path))
+    if use_partitions():
+        return partitions.ledger_version(file_path)
+    if use_wal():
+        return wal.ledger_version(file_path)
+    return helpers.file_version(file_path)
+
+
+def save_data(file_path, data, expected_version=None):
+    """Replaces a ledger's rows atomically. Returns the new version."""
+    if use_sqlite():
+        from utils import sqlite_store
+        return sqlite_store.replace_rows(
+            sqlite_store.table_for(file_path), data, sqlite_file(file_path), expected_version=expected_version
+        )
+    if use_partitions():
+        return partitions.save_data(file_path, data, expected_version)
+    if use_wal():
+        return wal.save_data(file_path, data, expected_version)
+    return helpers.save_data(file_path, data, expected_version)
+
+
+def append_row(file_path, row, fieldnames):
+    return append_rows(file_path, [row], fieldnames)
+
+
+def append_rows(file_path, rows, fieldnames, expected_version=None):
+    """
+    Appends rows in one write. If the ledger has a row_id field, rows without
+    one get a new id, set on the dicts passed in. Returns the new version.
+    """
+    if helpers.ROW_ID in fieldnames:
+        rows = helpers.assign_row_ids(list(rows))
+    if use_sqlite():
+        from utils import sqlite_store
+        return sqlite_store.insert_rows(
+            sqlite_store.table_for(file_path), rows, sqlite_file(file_path), expected_version=expected_version
+        )
+    if use_partitions():
+        return partitions.append_rows(file_path, rows, fieldnames, expected_version)
+    if use_wal():
+        return wal.append_rows(file_path, rows, fieldnames, expected_version)
+    return helpers.append_rows(file_path, rows, fieldnames, expected_version)
+
+
+def update_rows(file_path, changes, expected_version=None):
+    """
+    Replaces rows by their index in load_data's list ({index: new row}). The
+    write-ahead log records just those rows; the other backends rewrite the
+    ledger. Returns the new version.
+    """
+    if use_wal():
+        return wal.update_rows(file_path, changes, expected_version)
+    data, version = _load_at(file_path, expected_version)
+    for index, row in changes.items():
+        data[index] = row
+    return save_data(file_path, data, expected_version=version)
+
+
+def delete_rows(file_path, indexes, expected_version=None):
+    """
+    Deletes rows by their index in load_data's list, applied in order like
+    successive list.pop calls. Returns the new version.
+    """
+    if use_wal():
+        return wal.delete_rows(file_path, indexes, expected_version)
+    data, version = _load_at(file_path, expected_version)
+    for index in indexes:
+        del data[index]
+    return save_data(file_path, data, expected_version=version)
+
+
+def _locate(file_path, row_ids):
+    """{row_id: (index in load_data's list, row)}. Raises KeyError for an id the ledger doesn't have."""
+    from utils import pagination  # numpy; the ledger index is the one the paged listings use
+    index = pagination.ledger_index(file_path)
+    found = {}
+    for row_id in row_ids:
+        position = index.position(row_id)
+        if position is None:
+            raise KeyError(f"No row {row_id} in {file_path}.")
+        found[row_id] = (position, index.rows[position])
+    return found
+
+
+def update_by_id(file_path, changes, expected_version=None):
+    """
+    Replaces rows by their row_id ({row_id: new row}). SQLite updates just
+    those rows, the write-ahead log records just them, and a partitioned
+    ledger rewrites only the months involved. Raises KeyError for an id the
+    ledger doesn't have. Returns the new version.
+    """
+    changes = {row_id: dict(row, row_id=row_id) for row_id, row in changes.items()}
+    if use_sqlite():
+        from utils import sqlite_store
+        return sqlite_store.update_by_id(
+            sqlite_store.table_for(file_path), changes, sqlite_file(file_path), expected_version=expected_version
+        )
+    # Read before the ids are looked up, so a write in between fails the
+    # version check instead of leaving the positions pointing at other rows
+    version = ledger_version(file_path) if expected_version is None else expected_version
+    found = _locate(file_path, changes)
+    if use_partitions():
+        months = {row['date'][:7] for _, row in found.values()}
+        return partitions.rewrite_by_id(file_path, months, changes, expected_version=version)
+    return update_rows(file_path, {found[row_id][0]: row for row_id, row in changes.items()}, expected_version=version)
+
+
+def delete_by_id(file_path, row_ids, expected_version=None):
+    """Deletes rows by their row_id, see update_by_id. Returns the new version."""
+    if use_sqlite():
+        from utils import sqlite_store
+        return sqlite_store.delete_by_id(
+            sqlite_store.table_for(file_path), row_ids, sqlite_file(file_path), expected_version=expected_version
+        )
+    version = ledger_version(file_path) if expected_version is None else expected_version
+    found = _locate(file_path, row_ids)
+    if use_partitions():
+        months = {row['date'][:7] for _, row in found.values()}
+        return partitions.rewrite_by_id(file_path, months, {}, row_ids, expected_version=version)
+    # Highest first, so each delete leaves the other indexes where they were
+    indexes = sorted((index for index, _ in found.values()), reverse=True)
+    return delete_rows(file_path, indexes, expected_version=version)
+
+
+def _has_row_ids(file_path):
+    if use_partitions():
+        fieldnames = partitions.read_manifest(file_path)['fieldnames']
+        return not fieldnames or helpers.ROW_ID in fieldnames
+    header = helpers.read_header(file_path)
+    if header is None:
+        # Nothing in the file, but rows added before ids existed may be in its log
+        return not wal.has_pending(file_path)
+    return helpers.ROW_ID in header
+
+
+def migrate_row_ids(file_path):
+    """
+    Gives the rows of a ledger written before rows had ids a row_id each
+    (startup check, like helpers.migrate_amounts_to_paisa). A ledger that has
+    the field is only checked, not read; SQLite adds the column itself when it
+    connects. Returns the number of rows that got an id.
+    """
+    if use_sqlite() or _has_row_ids(file_path):
+        return 0
+    data, version = load_for_update(file_path)
+    if not data and use_partitions():
+        # The next append sets the manifest's field names
+        return 0
+    migrated = [dict(row, row_id=row.get(helpers.ROW_ID) or helpers.new_row_id()) for row in data]
+    # With no rows this drops the old header; the next append writes one with row_id
+    save_data(file_path, migrated, expected_version=version)
+    return sum(1 for row in data if not row.get(helpers.ROW_ID))
+
+
+def _load_at(file_path, expected_version):
+    data, version = load_for_update(file_path)
+    if expected_version is not None and version != expected_version:
+        raise helpers.LedgerConflictError(f"{file_path} was changed by another writer.")
+    return data, version
+
+
+def recover(file_path):
+    """
+    Startup check for a text ledger's write-ahead log (see wal.recover). With
+    the log switched off, a leftover log is folded in so plain reads see it.
+    Returns the number of log records folded.
+    """
+    if config.STORAGE_BACKEND != 'text':
+        return 0
+    if not config.WAL_ENABLED:
+        return wal.compact(file_path)
+    return wal.recover(file_path)
+
+
+def iter_rows(file_path, **filters):
+    if use_sqlite():
+        from utils import sqlite_store
+        return sqlite_store.query_rows(sqlite_store.table_for(file_path), db_path=sqlite_file(file_path), **filters)
+    if use_partitions():
+        return partitions.iter_rows(file_path, **filters)
+    if use_wal():
+        return wal.iter_rows(file_path, **filters)
+    return helpers.iter_rows(file_path, **filters)
+
+
+def iter_batches(file_path, batch_size=10000, **filters):
+    if config.STORAGE_BACKEND == 'text' and not use_wal():
+        yield from helpers.iter_batches(file_path, batch_size, **filters)
+        return
+    batch = []
+    for row in iter_rows(file_path, **filters):
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def query_rows(file_path, **filters):
+    """Matching rows as a list, newest first. SQLite answers this with an index scan."""
+    if use_sqlite():
+        from utils import sqlite_store
+        return list(sqlite_store.query_rows(
+            sqlite_store.table_for(file_path), newest_first=True, db_path=sqlite_file(file_path), **filters
+        ))
+    rows = list(iter_rows(file_path, **filters))
+    # ISO dates sort correctly as strings
+    rows.sort(key=lambda x: x['date'], reverse=True)
+    return rows
+
+
+def load_columns(file_path):
+    """Memory-mapped binary ledger for the text backend, or None if unavailable."""
+    if config.STORAGE_BACKEND != 'text':
+        return None
+    if use_wal() and wal.has_pending(file_path):
+        # The .bin copy only mirrors the ledger file, not its log
+        return None
+    from utils import columnar
+    return columnar.load_columns(file_path)
+
+
+_digests = {}  # ledger path -> (stamp, content hash), see ledger_fingerprint
+
+
+def _backing_paths(file_path):
+    if use_sqlite():
+        db_path = sqlite_file(file_path)
+        return [db_path, db_path + '-wal']
+    if use_partitions():
+        # Every partition write also rewrites the manifest
+        return [partitions.manifest_path(file_path)]
+    return [file_path, wal.log_path(file_path)]
+
+
+def ledger_bytes(file_path):
+    """Size in bytes of whatever backs a ledger (for SQLite, the whole database)."""
+    return sum(os.path.getsize(path) for path in _backing_paths(file_path) if os.path.exists(path))
+
+
+def ledger_stamp(file_path):
+    """(size, mtime_ns) of whatever backs a ledger, or None if it doesn't exist yet."""
+    stamp = None
+    for path in _backing_paths(file_path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        stamp = (stamp or ()) + (stat.st_size, stat.st_mtime_ns)
+    return stamp
+
+
+def ledger_fingerprint(file_path):
+    """
+    Cache key for data derived from a ledger: its stamp plus a content hash.
+    The hash is only recomputed when the stamp changes. None if the ledger doesn't exist yet.
+    """
+    stamp = ledger_stamp(file_path)
+    if stamp is None:
+        return None
+    cached = _digests.get(file_path)
+    if cached is None or cached[0] != stamp:
+        cached = _digests[file_path] = (stamp, ledger_digest(file_path))
+    return cached
+
+
+def ledger_digest(file_path):
+    """Content hash (hex) of whatever backs a ledger. Reads every byte; nothing is cached."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in _backing_paths(file_path):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+    return digest.hexdigest()
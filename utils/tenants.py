@@ -0,0 +1,154 @@
+"""
+Per-user ledgers, for serving many households from one deployment.
+
+Each tenant has its own directory holding the same files as database/
+(income.txt, expenses.txt, totals.json, plus whatever the storage backend
+keeps next to them), sharded by a hash of the user id so directories stay
+small (about 400 tenants each for 100k users and the default 256 shards):
+
+    database/tenants/<shard>/<user id>/income.txt
+
+A Tenant is the handle analytics functions take in place of the module-level
+INCOME_FILE / EXPENSE_FILE paths. load_ledgers() reads a tenant's ledgers
+through a process-wide LRU cache that evicts the least recently used ledgers
+once the parsed rows pass config.TENANT_CACHE_BYTES; entries are checked
+against storage.ledger_version, so a write by any process is picked up on the
+next read. get_analytics_summary(tenant=...) reads through it on the text
+backend, so the batch summary and the stress report (and anything else that
+summarizes a tenant more than once in a process) parse each ledger once.
+"""
+import hashlib
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+from utils import config, storage
+
+# Also what keeps a user id from naming a path outside its shard
+USER_ID_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.@-]{0,127}')
+
+
+def shard_for(user_id):
+    """Shard directory name for a user id, e.g. '3f'."""
+    digest = hashlib.blake2b(user_id.encode('utf-8'), digest_size=8).digest()
+    width = len(f"{config.TENANT_SHARDS - 1:x}")
+    return f"{int.from_bytes(digest, 'big') % config.TENANT_SHARDS:0{width}x}"
+
+
+class Tenant:
+    """One user's ledger paths. Creating a handle touches nothing on disk."""
+
+    def __init__(self, user_id):
+        if not USER_ID_PATTERN.fullmatch(user_id):
+            raise ValueError(f"Invalid user id {user_id!r}.")
+        self.user_id = user_id
+        self.directory = os.path.join(config.TENANT_ROOT, shard_for(user_id), user_id)
+        self.income_file = os.path.join(self.directory, 'income.txt')
+        self.expense_file = os.path.join(self.directory, 'expenses.txt')
+        self.totals_file = os.path.join(self.directory, 'totals.json')
+
+    def __repr__(self):
+        return f"Tenant({self.user_id!r})"
+
+    def create(self):
+        """Creates the tenant's directory; needed before the first write."""
+        os.makedirs(self.directory, exist_ok=True)
+        return self
+
+
+def iter_user_ids():
+    """Yields the id of every tenant with a directory under config.TENANT_ROOT, shard by shard."""
+    root = config.TENANT_ROOT
+    if not os.path.isdir(root):
+        return
+    for shard in sorted(os.listdir(root)):
+        shard_dir = os.path.join(root, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        with os.scandir(shard_dir) as entries:
+            for entry in entries:
+                if entry.is_dir() and USER_ID_PATTERN.fullmatch(entry.name):
+                    yield entry.name
+
+
+def estimate_bytes(rows):
+    """Approximate memory held by a list of row dicts (field names are shared, so not counted)."""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(map(sys.getsizeof, row.values()))
+    return size
+
+
+class LedgerCache:
+    """
+    LRU of parsed ledgers keyed by path, bounded by the estimated size of the
+    rows it holds. Cached row lists are shared between callers: treat them as
+    read-only.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # path -> (version, rows, size)
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, file_path):
+        # Version first: if a write lands before the load, the entry is just
+        # stale and reloaded next time, never newer than its version says
+        version = storage.ledger_version(file_path)
+        with self._lock:
+            entry = self.entries.get(file_path)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(file_path)
+                self.hits += 1
+                return entry[1]
+        rows = storage.load_data(file_path)
+        size = estimate_bytes(rows)
+        with self._lock:
+            self.misses += 1
+            self._drop(file_path)
+            if size <= self.max_bytes:
+                self.entries[file_path] = (version, rows, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    self._drop(next(iter(self.entries)))
+                    self.evictions += 1
+            else:
+                storage.release(file_path)
+        return rows
+
+    def _drop(self, file_path):
+        entry = self.entries.pop(file_path, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+            storage.release(file_path)
+
+    def clear(self):
+        with self._lock:
+            for file_path in list(self.entries):
+                self._drop(file_path)
+
+    def stats(self):
+        return {
+            'ledgers': len(self.entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+_cache = LedgerCache(config.TENANT_CACHE_BYTES)
+
+
+def load_ledgers(tenant):
+    """(incomes, expenses) row lists for a tenant, from the cache when current. Read-only."""
+    return _cache.get(tenant.income_file), _cache.get(tenant.expense_file)
+
+
+def cache_stats():
+    return _cache.stats()
@@ -0,0 +1,498 @@
+"""
+Write-ahead log for the text ledgers.
+
+Adds, updates and deletes on database/income.txt are appended to
+database/income.wal as small JSON records instead of rewriting the ledger, and
+readers replay the log over the ledger. Once the log passes
+config.WAL_COMPACT_BYTES a background thread folds it back into the ledger.
+recover() (run at startup) trims a record torn by a crash, finishes an
+interrupted fold and compacts an oversized log. A ledger converted to the
+binary format (utils.columnar) gets its .bin rewritten whenever its file is.
+
+One JSON object per line:
+
+    {"base": [ino, size, mtime_ns], "rows": 120}    header: the ledger file it applies to
+    {"op": "add", "row": {...}}                     takes the next position
+    {"op": "update", "pos": 17, "row": {...}}
+    {"op": "delete", "pos": 17}
+    {"op": "fold", "into": [ino, size, mtime_ns]}   a compaction is replacing the ledger
+
+Positions number the ledger's rows 0..rows-1 and then the added rows. A delete
+doesn't shift them, so replaying the log is a plain overlay. Every compaction
+renumbers them.
+
+Run from the project root:
+    python -m utils.wal status database/expenses.txt
+    python -m utils.wal compact database/expenses.txt
+"""
+import bisect
+import csv
+import glob
+import json
+import os
+import sys
+import threading
+
+from utils import config, helpers
+
+_compacting = set()  # ledgers with a background compaction running
+_compacting_guard = threading.Lock()
+
+
+def log_path(file_path):
+    """Returns the log path that belongs to a text ledger (income.txt -> income.wal)."""
+    return os.path.splitext(file_path)[0] + '.wal'
+
+
+def ledger_version(file_path):
+    """Versions of the ledger file and of its log; every write changes one of them."""
+    return (helpers.file_version(file_path), helpers.file_version(log_path(file_path)))
+
+
+# --- Replay ---
+
+def read_log(file_path):
+    """
+    Replays a ledger's log into a state dict:
+        base, rows   the header (None and 0 when there is no log)
+        added        rows added since the header, in position order
+        overlay      position -> updated row, or None once deleted
+        deleted      deleted positions, sorted
+        fold         target version of the last fold record, if any
+        records      number of add/update/delete records
+        end, size    offset after the last complete record, and the file size
+    A last line torn by a crash is left out.
+    """
+    state = {
+        'base': None, 'rows': 0, 'added': [], 'overlay': {}, 'deleted': [],
+        'fold': None, 'records': 0, 'end': 0, 'size': 0
+    }
+    try:
+        f = open(log_path(file_path), 'rb')
+    except FileNotFoundError:
+        return state
+    with f:
+        state['size'] = os.fstat(f.fileno()).st_size
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            _apply(state, record)
+            state['end'] += len(line)
+    return state
+
+
+def _apply(state, record):
+    op = record.get('op')
+    if op is None:
+        state['base'], state['rows'] = tuple(record['base']), record['rows']
+        return
+    if op == 'fold':
+        state['fold'] = tuple(record['into'])
+        return
+    if op == 'add':
+        state['added'].append(record['row'])
+    elif op == 'update':
+        state['overlay'][record['pos']] = record['row']
+    elif op == 'delete':
+        state['overlay'][record['pos']] = None
+        bisect.insort(state['deleted'], record['pos'])
+    state['records'] += 1
+
+
+def _version_of(f):
+    """file_version for an open ledger file (None: the ledger doesn't exist)."""
+    if f is None:
+        return (0, 0, 0)
+    stat = os.fstat(f.fileno())
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _open_ledger(file_path):
+    try:
+        return open(file_path, 'r', newline='', encoding='utf-8')
+    except FileNotFoundError:
+        return None
+
+
+def _snapshot(file_path):
+    """
+    Opens the ledger together with the log state that applies to that exact
+    file. Returns (file or None, state or None); state is None when there is
+    nothing to replay.
+    """
+    state = read_log(file_path)
+    f = _open_ledger(file_path)
+    if state['base'] is None or state['base'] == _version_of(f):
+        return f, (state if state['records'] else None)
+    # A compaction replaced the ledger between the two reads; under the lock
+    # both are settled
+    if f is not None:
+        f.close()
+    with helpers.ledger_lock(file_path):
+        state = read_log(file_path)
+        f = _open_ledger(file_path)
+    if state['base'] != _version_of(f) or not state['records']:
+        # A finished fold, or a log left behind by a write that bypassed it
+        state = None
+    return f, state
+
+
+def _merged_rows(f, state):
+    """Ledger rows from f with the log replayed over them, values as strings."""
+    overlay = state['overlay']
+    if f is not None:
+        for position, row in enumerate(csv.DictReader(f, delimiter='|')):
+            if position in overlay:
+                row = overlay[position]
+                if row is None:
+                    continue
+            yield row
+    for position, row in enumerate(state['added'], start=state['rows']):
+        if position in overlay:
+            row = overlay[position]
+            if row is None:
+                continue
+        yield row
+
+
+def has_pending(file_path):
+    """True if the ledger has log records that aren't folded into the file yet."""
+    state = read_log(file_path)
+    return bool(state['records']) and state['base'] == helpers.file_version(file_path)
+
+
+# --- Reads ---
+
+def load_data(file_path):
+    """Like helpers.load_data, with the log replayed."""
+    f, state = _snapshot(file_path)
+    if f is None and state is None:
+        return []
+    try:
+        if state is None:
+            return list(csv.DictReader(f, delimiter='|'))
+        return list(_merged_rows(f, state))
+    finally:
+        if f is not None:
+            f.close()
+
+
+def load_for_update(file_path):
+    """(rows, version) for a read-modify-write, see helpers.load_for_update."""
+    while True:
+        version = ledger_version(file_path)
+        data = load_data(file_path)
+        if ledger_version(file_path) == version:
+            return data, version
+
+
+def iter_rows(file_path, date_from=None, date_to=None, type=None, category=None, source=None):
+    """Like helpers.iter_rows (same filters, amount_paisa as int), with the log replayed."""
+    f, state = _snapshot(file_path)
+    if state is None:
+        if f is not None:
+            f.close()
+        yield from helpers.iter_rows(file_path, date_from, date_to, type, category, source)
+        return
+
+    matches = [
+        (name, value.lower())
+        for name, value in (('type', type), ('category', category), ('source', source))
+        if value is not None
+    ]
+    try:
+        for row in _merged_rows(f, state):
+            if date_from is not None and 'date' in row and row['date'] < date_from:
+                continue
+            if date_to is not None and 'date' in row and row['date'] > date_to:
+                continue
+            if any(name in row and row[name].lower() != value for name, value in matches):
+                continue
+            row = dict(row)
+            if 'amount_paisa' in row:
+                row['amount_paisa'] = int(row['amount_paisa'])
+            yield row
+    finally:
+        if f is not None:
+            f.close()
+
+
+# --- Writes ---
+
+def _text_row(row, fieldnames=None):
+    """A row as the ledger file would store it: every value a string, in field order."""
+    fieldnames = fieldnames or row.keys()
+    return {name: '' if row.get(name) is None else str(row.get(name)) for name in fieldnames}
+
+
+def _check_version(file_path, expected_version):
+    if expected_version is not None and ledger_version(file_path) != expected_version:
+        raise helpers.LedgerConflictError(f"{file_path} was changed by another writer.")
+
+
+def _count_rows(file_path):
+    with open(file_path, 'r', newline='', encoding='utf-8') as f:
+        return max(sum(1 for _ in csv.reader(f, delimiter='|')) - 1, 0)
+
+
+def _write_header(file_path, rows):
+    """Starts an empty log for the current ledger file (atomically)."""
+    path = log_path(file_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    header = {'base': list(helpers.file_version(file_path)), 'rows': rows}
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(header) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _writable_state(file_path):
+    """
+    The log state to append to; the caller holds the ledger lock. Trims a
+    torn last record, and starts a new log if the current one doesn't apply
+    to the ledger file: after a finished fold it is simply replaced, and a log
+    left behind by a write that bypassed it is kept as <log>.orphaned.
+    """
+    state = read_log(file_path)
+    version = helpers.file_version(file_path)
+    if state['base'] is not None and state['base'] == version:
+        if state['end'] < state['size']:
+            with open(log_path(file_path), 'r+b') as f:
+                f.truncate(state['end'])
+            state['size'] = state['end']
+        return state
+
+    if state['records'] and state['fold'] != version:
+        orphan_path = log_path(file_path) + '.orphaned'
+        os.replace(log_path(file_path), orphan_path)
+        print(f"warning: {file_path} was rewritten without its log; "
+              f"kept the {state['records']} unapplied records in {orphan_path}", file=sys.stderr)
+    if not os.path.exists(file_path):
+        # The header needs a real file version to point at
+        open(file_path, 'a').close()
+    rows = _count_rows(file_path)
+    _write_header(file_path, rows)
+    return read_log(file_path)
+
+
+def _append_records(file_path, records):
+    """Appends records in one fsync'd write; the caller holds the ledger lock."""
+    data = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records)
+    with open(log_path(file_path), 'ab') as f:
+        f.write(data.encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+    return ledger_version(file_path)
+
+
+def _append_batches(file_path, batches):
+    with helpers.ledger_lock(file_path):
+        _writable_state(file_path)
+        return _append_records(file_path, [record for batch in batches for record in batch])
+
+
+def append_rows(file_path, rows, fieldnames, expected_version=None):
+    """
+    Logs added rows. Concurrent callers in this process share one write (see
+    helpers.group_commit). Returns the new version.
+    """
+    records = [{'op': 'add', 'row': _text_row(row, fieldnames)} for row in rows]
+    if expected_version is not None:
+        with helpers.ledger_lock(file_path):
+            _check_version(file_path, expected_version)
+            _writable_state(file_path)
+            version = _append_records(file_path, records)
+    else:
+        version = helpers.group_commit(log_path(file_path), records, lambda batches: _append_batches(file_path, batches))
+    compact_if_needed(file_path)
+    return version
+
+
+def _position(deleted, index):
+    """Position of the index-th live row, given the sorted deleted positions."""
+    position = index
+    for gone in deleted:
+        if gone > position:
+            break
+        position += 1
+    return position
+
+
+def _live_rows(state):
+    return state['rows'] + len(state['added']) - len(state['deleted'])
+
+
+def update_rows(file_path, changes, expected_version=None):
+    """
+    Logs replaced rows; changes maps an index in load_data's list to the new
+    row. Returns the new version.
+    """
+    with helpers.ledger_lock(file_path):
+        _check_version(file_path, expected_version)
+        state = _writable_state(file_path)
+        records = []
+        for index, row in changes.items():
+            if not 0 <= index < _live_rows(state):
+                raise IndexError(f"No row {index} in {file_path}.")
+            records.append({'op': 'update', 'pos': _position(state['deleted'], index), 'row': _text_row(row)})
+        version = _append_records(file_path, records)
+    compact_if_needed(file_path)
+    return version
+
+
+def delete_rows(file_path, indexes, expected_version=None):
+    """
+    Logs deleted rows. Indexes are applied in order, each to the list left by
+    the ones before it (like successive list.pop calls). Returns the new version.
+    """
+    with helpers.ledger_lock(file_path):
+        _check_version(file_path, expected_version)
+        state = _writable_state(file_path)
+        deleted = list(state['deleted'])
+        live = _live_rows(state)
+        records = []
+        for index in indexes:
+            if not 0 <= index < live:
+                raise IndexError(f"No row {index} in {file_path}.")
+            position = _position(deleted, index)
+            bisect.insort(deleted, position)
+            live -= 1
+            records.append({'op': 'delete', 'pos': position})
+        version = _append_records(file_path, records)
+    compact_if_needed(file_path)
+    return version
+
+
+def _write_temp(file_path, rows, fieldnames):
+    """Writes rows to a fsync'd temp file next to the ledger. Returns (path, row count)."""
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    count = 0
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        if fieldnames:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter='|')
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp_path, count
+
+
+def _replace_ledger(file_path, tmp_path, rows):
+    """
+    Swaps a new ledger file in and resets the log; the caller holds the lock.
+    The fold record marks the log as applied in case of a crash between the
+    two steps.
+    """
+    has_log = os.path.exists(log_path(file_path))
+    if has_log:
+        _append_records(file_path, [{'op': 'fold', 'into': list(helpers.file_version(tmp_path))}])
+    os.replace(tmp_path, file_path)
+    if has_log:
+        _write_header(file_path, rows)
+
+
+def save_data(file_path, data, expected_version=None):
+    """Replaces the whole ledger (and clears its log). Returns the new version."""
+    with helpers.ledger_lock(file_path):
+        _check_version(file_path, expected_version)
+        tmp_path, count = _write_temp(file_path, data, list(data[0].keys()) if data else None)
+        _replace_ledger(file_path, tmp_path, count)
+        _refresh_columnar(file_path)
+        return ledger_version(file_path)
+
+
+def _refresh_columnar(file_path):
+    """Rewrites the ledger's binary copy, if it has one, from the new file; the caller holds the lock."""
+    if not os.path.exists(os.path.splitext(file_path)[0] + '.bin'):
+        return
+    from utils import columnar  # numpy
+    try:
+        columnar.text_to_columnar(file_path)
+    except ValueError:
+        pass  # e.g. too many distinct categories; the stale copy is never read
+
+
+# --- Compaction and recovery ---
+
+def compact(file_path):
+    """Folds the log into the ledger file. Returns the number of records folded."""
+    with helpers.ledger_lock(file_path):
+        state = read_log(file_path)
+        if not state['records'] or state['base'] != helpers.file_version(file_path):
+            return 0
+        f = _open_ledger(file_path)
+        try:
+            fieldnames = None
+            if f is not None:
+                fieldnames = csv.DictReader(f, delimiter='|').fieldnames
+                f.seek(0)
+            if not fieldnames and state['added']:
+                fieldnames = list(state['added'][0].keys())
+            tmp_path, count = _write_temp(file_path, _merged_rows(f, state), fieldnames)
+        finally:
+            if f is not None:
+                f.close()
+        _replace_ledger(file_path, tmp_path, count)
+        _refresh_columnar(file_path)
+        return state['records']
+
+
+def _compact_in_background(file_path):
+    try:
+        compact(file_path)
+    finally:
+        with _compacting_guard:
+            _compacting.discard(file_path)
+
+
+def compact_if_needed(file_path):
+    """Starts a background compaction once the log passes config.WAL_COMPACT_BYTES."""
+    try:
+        if os.path.getsize(log_path(file_path)) < config.WAL_COMPACT_BYTES:
+            return
+    except FileNotFoundError:
+        return
+    with _compacting_guard:
+        if file_path in _compacting:
+            return
+        _compacting.add(file_path)
+    # A compaction cut short when the process exits is safe, see _replace_ledger
+    threading.Thread(target=_compact_in_background, args=(file_path,), daemon=True).start()
+
+
+def recover(file_path):
+    """
+    Startup recovery: removes temp files left by an interrupted write, trims
+    a record torn by a crash, finishes an interrupted fold, and compacts a log
+    that is over config.WAL_COMPACT_BYTES. Returns the number of records folded.
+    """
+    with helpers.ledger_lock(file_path):
+        for pattern in (file_path, log_path(file_path)):
+            # Every write runs under this lock, so any temp file is abandoned
+            for tmp_path in glob.glob(glob.escape(pattern) + '.*.tmp'):
+                os.remove(tmp_path)
+        if os.path.exists(log_path(file_path)):
+            _writable_state(file_path)
+    if os.path.exists(log_path(file_path)) and os.path.getsize(log_path(file_path)) >= config.WAL_COMPACT_BYTES:
+        return compact(file_path)
+    return 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] not in ('status', 'compact'):
+        print("Usage: python -m utils.wal [status|compact] <ledger>")
+        sys.exit(1)
+    ledger = sys.argv[2]
+    if sys.argv[1] == 'status':
+        state = read_log(ledger)
+        print(f"{log_path(ledger)}: {state['records']} records, {state['size']:,} bytes, "
+              f"{'pending' if has_pending(ledger) else 'nothing to replay'}")
+    else:
+        print(f"{ledger}: folded {compact(ledger)} log records")